@@ -0,0 +1,105 @@
+"""Adds image_counts table.
+
+Revision ID: 15250d60915a
+Revises: 2c9e16be9dba
+Create Date: 2026-10-18 11:40:27.905166
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "15250d60915a"
+down_revision: Union[str, None] = "2c9e16be9dba"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "image_counts",
+        sa.Column(
+            "status",
+            postgresql.ENUM(
+                "IN_PROGRESS",
+                "DONE",
+                "CORRUPTED",
+                name="imagestatus",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("status"),
+    )
+    # NOTE: Blocks writes to images until the migration is committed - so that no
+    # image is missed (or counted twice) between the backfill and the triggers.
+    op.execute("LOCK TABLE images IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(
+        """
+        INSERT INTO image_counts (status, total)
+        SELECT _status, count(*) FROM images GROUP BY _status
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION count_images() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                DELETE FROM image_counts;
+            ELSIF TG_OP = 'INSERT' THEN
+                INSERT INTO image_counts (status, total)
+                SELECT _status, count(*) FROM new_images GROUP BY _status ORDER BY _status
+                ON CONFLICT (status) DO UPDATE SET total = image_counts.total + EXCLUDED.total;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO image_counts (status, total)
+                SELECT _status, -count(*) FROM old_images GROUP BY _status ORDER BY _status
+                ON CONFLICT (status) DO UPDATE SET total = image_counts.total + EXCLUDED.total;
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO image_counts (status, total)
+                SELECT status, sum(delta) FROM (
+                    SELECT _status AS status, -1 AS delta FROM old_images
+                    UNION ALL
+                    SELECT _status AS status, 1 AS delta FROM new_images
+                ) AS deltas
+                GROUP BY status HAVING sum(delta) <> 0 ORDER BY status
+                ON CONFLICT (status) DO UPDATE SET total = image_counts.total + EXCLUDED.total;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER count_inserted_images AFTER INSERT ON images "
+        "REFERENCING NEW TABLE AS new_images "
+        "FOR EACH STATEMENT EXECUTE FUNCTION count_images()"
+    )
+    op.execute(
+        "CREATE TRIGGER count_deleted_images AFTER DELETE ON images "
+        "REFERENCING OLD TABLE AS old_images "
+        "FOR EACH STATEMENT EXECUTE FUNCTION count_images()"
+    )
+    op.execute(
+        "CREATE TRIGGER count_updated_images AFTER UPDATE ON images "
+        "REFERENCING OLD TABLE AS old_images NEW TABLE AS new_images "
+        "FOR EACH STATEMENT EXECUTE FUNCTION count_images()"
+    )
+    op.execute(
+        "CREATE TRIGGER count_truncated_images AFTER TRUNCATE ON images "
+        "FOR EACH STATEMENT EXECUTE FUNCTION count_images()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER count_truncated_images ON images")
+    op.execute("DROP TRIGGER count_updated_images ON images")
+    op.execute("DROP TRIGGER count_deleted_images ON images")
+    op.execute("DROP TRIGGER count_inserted_images ON images")
+    op.execute("DROP FUNCTION count_images()")
+    op.drop_table("image_counts")
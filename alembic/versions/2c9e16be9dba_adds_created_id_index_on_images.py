@@ -0,0 +1,41 @@
+"""Adds (created, id) index on images.
+
+Revision ID: 2c9e16be9dba
+Revises: d4052e0e2fc1
+Create Date: 2026-10-18 09:12:03.417512
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2c9e16be9dba"
+down_revision: Union[str, None] = "d4052e0e2fc1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NOTE: Built concurrently (i.e. outside of a transaction) so writes to images are
+    # not blocked while the index is built.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_images_created_id",
+            "images",
+            ["created", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_images_created_id",
+            table_name="images",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,47 @@
+"""Adds renditions table.
+
+Revision ID: 3f8e1c2a9b7d
+Revises: 7a5c486b8754
+Create Date: 2026-10-18 16:21:08.417392
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8e1c2a9b7d"
+down_revision: Union[str, None] = "7a5c486b8754"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "renditions",
+        sa.Column("image_id", sa.UUID(), nullable=False),
+        sa.Column("path", sa.Unicode(length=255), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("checksum", sa.Unicode(length=64), nullable=False),
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("created", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["image_id"], ["images.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("path"),
+    )
+    op.create_index(op.f("ix_renditions_id"), "renditions", ["id"], unique=True)
+    op.create_index(
+        op.f("ix_renditions_image_id"), "renditions", ["image_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_renditions_image_id"), table_name="renditions")
+    op.drop_index(op.f("ix_renditions_id"), table_name="renditions")
+    op.drop_table("renditions")
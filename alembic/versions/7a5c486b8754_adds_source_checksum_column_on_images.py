@@ -0,0 +1,45 @@
+"""Adds source_checksum column on images.
+
+Revision ID: 7a5c486b8754
+Revises: 15250d60915a
+Create Date: 2026-10-18 14:05:51.238804
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a5c486b8754"
+down_revision: Union[str, None] = "15250d60915a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "images", sa.Column("source_checksum", sa.Unicode(length=64), nullable=True)
+    )
+    # NOTE: Built concurrently (i.e. outside of a transaction) so writes to images are
+    # not blocked while the index is built.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_images_source_checksum"),
+            "images",
+            ["source_checksum"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_images_source_checksum"),
+            table_name="images",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("images", "source_checksum")
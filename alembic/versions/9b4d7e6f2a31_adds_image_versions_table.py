@@ -0,0 +1,56 @@
+"""Adds image_versions table.
+
+Revision ID: 9b4d7e6f2a31
+Revises: 3f8e1c2a9b7d
+Create Date: 2026-10-18 17:48:52.103276
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b4d7e6f2a31"
+down_revision: Union[str, None] = "3f8e1c2a9b7d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "image_versions",
+        sa.Column("id", sa.SmallInteger(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("modified", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION version_images() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO image_versions (id, version, modified)
+            VALUES (mod(pg_backend_pid(), 16), 1, clock_timestamp())
+            ON CONFLICT (id) DO UPDATE
+            SET version = image_versions.version + 1,
+                modified = GREATEST(image_versions.modified, EXCLUDED.modified);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    for table in ("images", "renditions"):
+        op.execute(
+            f"CREATE TRIGGER version_{table} "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION version_images()"
+        )
+
+
+def downgrade() -> None:
+    for table in ("images", "renditions"):
+        op.execute(f"DROP TRIGGER version_{table} ON {table}")
+    op.execute("DROP FUNCTION version_images()")
+    op.drop_table("image_versions")
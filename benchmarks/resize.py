@@ -0,0 +1,155 @@
+"""
+Benchmark of `utils.image.resize` - i.e. of its default and fast paths.
+
+Synthetic JPEGs are downscaled to `ImageService.image_width` by both paths, reporting
+the time taken, the number of pixels decoded and the quality of the fast path relative
+to the default one (i.e. PSNR and SSIM).
+
+Example:
+    $ python -m benchmarks.resize --megapixels 12 24 --repeat 5
+"""
+
+import argparse
+import io
+import math
+import statistics
+import time
+
+from PIL import Image as PILImage
+from PIL import ImageChops, ImageMath, ImageStat
+
+from src.images.utils.image import resize
+
+
+def synthetic_jpeg(megapixels: float, quality: int = 90) -> bytes:
+    """
+    Generate a (photo-like, 3:2) JPEG with the given number of megapixels.
+
+    Args:
+        megapixels (float): The number of megapixels.
+        quality (int): The JPEG quality.
+
+    Returns:
+        bytes: The encoded JPEG.
+    """
+    width = int(math.sqrt(megapixels * 1e6 * 3 / 2))
+    height = int(width * 2 / 3)
+    image = PILImage.merge(
+        "RGB",
+        [
+            PILImage.effect_mandelbrot((width, height), (-2.0, -1.2, 1.0, 1.2), 64),
+            PILImage.effect_noise((width, height), 48),
+            PILImage.linear_gradient("L").resize((width, height)),
+        ],
+    )
+
+    with io.BytesIO() as buffer:
+        image.save(buffer, format="JPEG", quality=quality)
+
+        return buffer.getvalue()
+
+
+def psnr(reference: PILImage.Image, image: PILImage.Image) -> float:
+    """
+    Compute the peak signal-to-noise ratio (in dB) of an image relative to a reference.
+    """
+    squared = ImageStat.Stat(ImageChops.difference(reference, image)).rms
+    mse = statistics.mean(channel**2 for channel in squared)
+
+    return math.inf if mse == 0 else 10 * math.log10(255**2 / mse)
+
+
+def ssim(reference: PILImage.Image, image: PILImage.Image, window: int = 8) -> float:
+    """
+    Compute the structural similarity (of the luminance) of an image relative to a
+    reference - averaged over non-overlapping windows.
+    """
+    x = reference.convert("L").convert("F")
+    y = image.convert("L").convert("F")
+    size = (max(1, x.width // window), max(1, x.height // window))
+
+    def mean(expression, **images):
+        return ImageMath.lambda_eval(expression, **images).resize(size, PILImage.BOX)
+
+    mu_x, mu_y = x.resize(size, PILImage.BOX), y.resize(size, PILImage.BOX)
+    xx = mean(lambda args: args["x"] * args["x"], x=x)
+    yy = mean(lambda args: args["y"] * args["y"], y=y)
+    xy = mean(lambda args: args["x"] * args["y"], x=x, y=y)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    ssim_map = ImageMath.lambda_eval(
+        lambda args: (
+            (2 * args["mx"] * args["my"] + c1)
+            * (2 * (args["xy"] - args["mx"] * args["my"]) + c2)
+        )
+        / (
+            (args["mx"] * args["mx"] + args["my"] * args["my"] + c1)
+            * (
+                args["xx"]
+                - args["mx"] * args["mx"]
+                + args["yy"]
+                - args["my"] * args["my"]
+                + c2
+            )
+        ),
+        mx=mu_x,
+        my=mu_y,
+        xx=xx,
+        yy=yy,
+        xy=xy,
+    )
+
+    # NOTE: ImageStat is histogram based - i.e. does not apply to float images.
+    return ssim_map.resize((1, 1), PILImage.BOX).getpixel((0, 0))
+
+
+def run(data: bytes, width: int, fast: bool) -> tuple[float, int, PILImage.Image]:
+    """
+    Decode and resize a JPEG.
+
+    Returns:
+        tuple[float, int, PILImage.Image]: The time taken (in seconds), the number of
+            pixels decoded and the resized image.
+    """
+    start = time.perf_counter()
+    with PILImage.open(io.BytesIO(data)) as input_image:
+        output_image = resize(input_image, width, fast=fast)
+        decoded = input_image.size[0] * input_image.size[1]
+    elapsed = time.perf_counter() - start
+
+    return elapsed, decoded, output_image
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[3, 12, 24, 50])
+    parser.add_argument("--width", type=int, default=1500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'MP':>6} {'default (s)':>12} {'fast (s)':>10} {'speedup':>8} "
+        f"{'decoded (MP)':>13} {'PSNR (dB)':>10} {'SSIM':>7}"
+    )
+    for megapixels in args.megapixels:
+        data = synthetic_jpeg(megapixels)
+        results = {}
+        for fast in (False, True):
+            runs = [run(data, args.width, fast) for _ in range(args.repeat)]
+            results[fast] = (
+                statistics.median(elapsed for elapsed, _, _ in runs),
+                runs[0][1],
+                runs[0][2],
+            )
+        (default_time, _, reference), (fast_time, decoded, image) = (
+            results[False],
+            results[True],
+        )
+        print(
+            f"{megapixels:>6.1f} {default_time:>12.3f} {fast_time:>10.3f} "
+            f"{default_time / fast_time:>7.1f}x {decoded / 1e6:>13.2f} "
+            f"{psnr(reference, image):>10.2f} {ssim(reference, image):>7.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+"""
+Benchmark suite of the image pipeline (see `utils.image`) and of the service layer (see
+`services.image.ImageService`) - with a regression check against a baseline.
+
+Synthetic JPEG and PNG inputs are decoded, resized, encoded, hashed and created (i.e.
+`ImageService.create`) - and, with the images table filled up to each number of rows,
+batches of images are inserted and listed (i.e. `ImageService.list` by page - first and
+last - and by cursor). Pages of images are also listed and serialized (to JSON) as the
+list endpoint did (i.e. as Image objects - orm) and does (i.e. as rows - lean), per row.
+
+The median time (in seconds) of each stage is written to a JSON baseline, which later
+runs (e.g. after upgrading Pillow) are checked against - failing if any stage slowed
+down beyond a threshold.
+
+NOTE: The database stages empty the images table - i.e. DATABASE_URL must point at a
+disposable (e.g. the test) database. Baselines are only comparable on the same machine.
+
+Example:
+    $ DATABASE_URL=<test-database-url> python -m benchmarks.suite run
+    $ DATABASE_URL=<test-database-url> python -m benchmarks.suite check --threshold 0.2
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Callable
+
+import PIL
+import sqlalchemy
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from PIL import Image as PILImage
+from sqlalchemy import insert, select, text
+
+from benchmarks.resize import synthetic_jpeg
+from src.images.endpoints.image import Image as ImageModel
+from src.images.endpoints.image import _dump_rows
+from src.images.models.base import DeclarativeBase
+from src.images.models.database import Session, engine
+from src.images.models.image import Image, ImageStatus
+from src.images.services.image import LIST_COLUMNS, ImageService, TmpImage
+from src.images.utils.image import encode, resize, sha256_checksum
+from src.images.utils.pagination import encode_cursor
+
+
+FORMATS = {"jpeg": ".jpg", "png": ".png"}
+
+# NOTE: Rows are generated in the database - i.e. filling is not timed.
+FILL_STATEMENT = text(
+    """
+    INSERT INTO images (id, path, _checksum, _status, created, updated)
+    SELECT
+        gen_random_uuid(),
+        'benchmarks/' || g || '.jpg',
+        md5(g::text) || md5(g::text),
+        'DONE',
+        now() - make_interval(secs => :stop - g),
+        now()
+    FROM generate_series(:start, :stop) AS g
+    """
+)
+
+
+def measure(function: Callable[[], Any], repeat: int) -> float:
+    """
+    Time a function.
+
+    Args:
+        function (Callable[[], Any]): The function timed.
+        repeat (int): The number of times it is called.
+
+    Returns:
+        float: The median time taken (in seconds).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings)
+
+
+def synthetic_image(megapixels: float, image_format: str) -> bytes:
+    """
+    Generate a (photo-like) image with the given number of megapixels and format.
+
+    Args:
+        megapixels (float): The number of megapixels.
+        image_format (str): The format - see FORMATS.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    data = synthetic_jpeg(megapixels)
+    if image_format == "jpeg":
+        return data
+
+    with PILImage.open(io.BytesIO(data)) as image:
+        return encode(image, image_format.upper())
+
+
+def image_stages(
+    megapixels: list[float], width: int, repeat: int, database: bool
+) -> dict[str, float]:
+    """
+    Time the stages of the image pipeline - for each format and number of megapixels.
+
+    Args:
+        megapixels (list[float]): The numbers of megapixels of the inputs.
+        width (int): The width inputs are resized to.
+        repeat (int): The number of times each stage is timed.
+        database (bool): Whether images are created (i.e. ImageService.create), too.
+
+    Returns:
+        dict[str, float]: The median time of each stage - by stage/format/megapixels.
+    """
+    results = {}
+    directory = tempfile.mkdtemp(prefix="benchmarks.")
+    service = ImageService(base_path=directory, image_width=width)
+    try:
+        for image_format, suffix in FORMATS.items():
+            for mp in megapixels:
+                key = f"{image_format}/{mp}mp"
+                data = synthetic_image(mp, image_format)
+                path = os.path.join(directory, f"input{suffix}")
+                with open(path, "wb") as file:
+                    file.write(data)
+
+                def decode() -> PILImage.Image:
+                    image = PILImage.open(io.BytesIO(data))
+                    image.load()
+                    return image
+
+                decoded = decode()
+                resized = resize(decoded, width)
+                results[f"decode/{key}"] = measure(decode, repeat)
+                results[f"resize/{key}"] = measure(
+                    lambda: resize(decoded, width), repeat
+                )
+                results[f"encode/{key}"] = measure(
+                    lambda: encode(resized, image_format.upper()), repeat
+                )
+                results[f"hash/{key}"] = measure(lambda: sha256_checksum(path), repeat)
+                if database:
+
+                    def create() -> None:
+                        # NOTE: A copy, since each image is created from a new upload.
+                        upload = os.path.join(directory, f"{uuid.uuid4()}{suffix}")
+                        shutil.copyfile(path, upload)
+                        service.create(
+                            TmpImage(
+                                path=upload,
+                                headers={},
+                                content_type=f"image/{image_format}",
+                            )
+                        )
+
+                    results[f"create/{key}"] = measure(create, repeat)
+                print(f"{key}: done", file=sys.stderr)
+    finally:
+        service.session.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return results
+
+
+def serialize_orm(limit: int) -> bytes:
+    """
+    List (the first page of) images and serialize them - as Image objects, rebuilt as
+    (pydantic) Image models and encoded by FastAPI.
+
+    Args:
+        limit (int): The number of images listed.
+
+    Returns:
+        bytes: The JSON array of images.
+    """
+    with Session() as session:
+        images = session.scalars(
+            select(Image).order_by(Image.created.asc(), Image.id.asc()).limit(limit)
+        ).all()
+        models = [
+            ImageModel(
+                id=image.id,
+                path=image.path,
+                status=image.status,
+                checksum=image.checksum,
+                created=image.created,
+                updated=image.updated,
+            )
+            for image in images
+        ]
+
+        return JSONResponse(jsonable_encoder(models)).body
+
+
+def serialize_lean(limit: int) -> bytes:
+    """
+    List (the first page of) images and serialize them - as rows (see LIST_COLUMNS),
+    dumped straight to JSON.
+
+    Args:
+        limit (int): The number of images listed.
+
+    Returns:
+        bytes: The JSON array of images.
+    """
+    with Session() as session:
+        rows = session.execute(
+            select(*LIST_COLUMNS)
+            .order_by(Image.created.asc(), Image.id.asc())
+            .limit(limit)
+        ).all()
+
+        return _dump_rows(rows)
+
+
+def database_stages(
+    rows: list[int], batch: int, limit: int, repeat: int, serialize_limit: int = 99
+) -> dict[str, float]:
+    """
+    Time inserting and listing images - with the images table filled up to each number
+    of rows.
+
+    Args:
+        rows (list[int]): The numbers of rows.
+        batch (int): The number of images inserted per (timed) insert.
+        limit (int): The number of images listed per (timed) list.
+        repeat (int): The number of times each stage is timed.
+        serialize_limit (int): The number of images listed per (timed) serialization -
+            whose time is per row.
+
+    Returns:
+        dict[str, float]: The median time of each stage - by stage/rows.
+    """
+    results = {}
+    service = ImageService()
+    try:
+        filled = 0
+        for target in sorted(rows):
+            with Session() as session:
+                session.execute(FILL_STATEMENT, {"start": filled + 1, "stop": target})
+                session.execute(text("ANALYZE images"))
+                session.commit()
+            filled = target
+            key = f"{target}rows"
+
+            def insert_batch() -> None:
+                # NOTE: A bulk INSERT - i.e. as in ImageService.acreate_many.
+                with Session() as session:
+                    session.execute(
+                        insert(Image),
+                        [
+                            {
+                                "id": uuid.uuid4(),
+                                "path": f"benchmarks/inserted/{uuid.uuid4()}.jpg",
+                                "_checksum": "0" * 64,
+                                "_status": ImageStatus.DONE,
+                            }
+                            for _ in range(batch)
+                        ],
+                    )
+                    session.commit()
+
+            results[f"insert/{key}"] = measure(insert_batch, repeat)
+            # NOTE: Inserted images are removed - i.e. each level has its rows.
+            with Session() as session:
+                session.execute(
+                    text("DELETE FROM images WHERE path LIKE 'benchmarks/inserted/%'")
+                )
+                session.commit()
+
+            def list_page(offset: int) -> Callable[[], list[Image]]:
+                return lambda: service.list(offset=offset, limit=limit).query.all()
+
+            last = service.list(offset=max(target - limit - 1, 0), limit=1).query.one()
+            cursor = encode_cursor(last.created, last.id)
+            results[f"list-first-page/{key}"] = measure(list_page(0), repeat)
+            results[f"list-last-page/{key}"] = measure(
+                list_page(target - limit), repeat
+            )
+            results[f"list-cursor/{key}"] = measure(
+                lambda: service.list(after=cursor, limit=limit).query.all(), repeat
+            )
+            for name, serialize in [("orm", serialize_orm), ("lean", serialize_lean)]:
+                results[f"list-serialize-{name}/{key}"] = (
+                    measure(lambda: serialize(serialize_limit), repeat)
+                    / serialize_limit
+                )
+            service.session.rollback()
+            print(f"{key}: done", file=sys.stderr)
+    finally:
+        service.session.close()
+
+    return results
+
+
+def _empty() -> None:
+    with Session() as session:
+        session.execute(text("TRUNCATE images"))
+        session.commit()
+
+
+def compare(
+    baseline: dict[str, float],
+    results: dict[str, float],
+    threshold: float,
+    min_seconds: float,
+) -> list[str]:
+    """
+    Compare results against a baseline.
+
+    Args:
+        baseline (dict[str, float]): The baseline time of each stage.
+        results (dict[str, float]): The time of each stage.
+        threshold (float): The max. relative slowdown - e.g. 0.2 for 20%.
+        min_seconds (float): The min. absolute slowdown - i.e. to disregard noise in
+            fast stages.
+
+    Returns:
+        list[str]: A description of each regression.
+    """
+    regressions = []
+    for stage, seconds in sorted(results.items()):
+        reference = baseline.get(stage)
+        if reference is None:
+            continue
+        if seconds > reference * (1 + threshold) and seconds - reference > min_seconds:
+            regressions.append(
+                f"{stage}: {reference:.4f}s -> {seconds:.4f}s "
+                f"(+{(seconds / reference - 1) * 100:.0f}%)"
+            )
+
+    return regressions
+
+
+def run(config: dict[str, Any]) -> dict[str, float]:
+    """
+    Run the suite.
+
+    Args:
+        config (dict[str, Any]): The configuration - see main.
+
+    Returns:
+        dict[str, float]: The median time of each stage.
+    """
+    database = not config["skip_database"]
+    if database:
+        DeclarativeBase.metadata.create_all(bind=engine)
+        _empty()
+    try:
+        results = image_stages(
+            config["megapixels"], config["width"], config["repeat"], database
+        )
+        if database and config["rows"]:
+            _empty()
+            results.update(
+                database_stages(
+                    config["rows"],
+                    config["batch"],
+                    config["limit"],
+                    config["repeat"],
+                    # NOTE: Defaulted - i.e. for baselines written before it existed.
+                    config.get("serialize_limit", 99),
+                )
+            )
+    finally:
+        if database:
+            _empty()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("command", choices=["run", "check"])
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[0.3, 3, 12, 50])
+    parser.add_argument(
+        "--rows", type=int, nargs="*", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--width", type=int, default=1500)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--serialize-limit", type=int, default=99)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-database", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-seconds", type=float, default=0.001)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        config = {
+            "megapixels": args.megapixels,
+            "rows": args.rows,
+            "width": args.width,
+            "batch": args.batch,
+            "limit": args.limit,
+            "serialize_limit": args.serialize_limit,
+            "repeat": args.repeat,
+            "skip_database": args.skip_database,
+        }
+        baseline = {
+            "config": config,
+            "environment": {
+                "python": platform.python_version(),
+                "pillow": PIL.__version__,
+                "sqlalchemy": sqlalchemy.__version__,
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+            },
+            "results": run(config),
+        }
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+        print(f"Baseline written: {args.baseline}")
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    # NOTE: Runs with the configuration of the baseline - i.e. so results compare.
+    results = run(baseline["config"])
+    regressions = compare(
+        baseline["results"], results, args.threshold, args.min_seconds
+    )
+    for stage, seconds in sorted(results.items()):
+        reference = baseline["results"].get(stage)
+        change = f"{(seconds / reference - 1) * 100:+.0f}%" if reference else "new"
+        print(f"{stage:>40} {seconds:>10.4f}s {change:>6}")
+    if regressions:
+        print("Regressions:\n" + "\n".join(regressions), file=sys.stderr)
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,529 @@
+"""
+Command importing (i.e. backfilling) a directory tree of images - without going through
+the API one upload at a time.
+
+Files are walked in (lexicographic) order, processed (i.e. hashed, resized and hashed
+again) in the process pool (see `services.workers`) and loaded in batches via COPY - into
+staging tables from which they are inserted in a single statement per batch. Images are
+also saved in the alternate formats and rendition widths of uploads (see
+`ImageService`) - i.e. imported images are indistinguishable from uploaded ones.
+
+Progress is checkpointed after each batch, so an interrupted import resumes after the
+last file imported. Image IDs are derived from the (absolute) path of each file, so a
+batch imported again (e.g. when interrupted before its checkpoint was written) is not
+duplicated - while files at the same relative path of other directories are distinct
+images (i.e. never overwrite each other).
+
+NOTE: Files which fail to be processed are imported as CORRUPTED (see
+`ImageService.acreate_many`). Uploads already created from identical files are not
+deduplicated.
+
+Example:
+    $ DATABASE_URL=<database-url> python -m src.images.commands.bulk_import <directory>
+"""
+
+import argparse
+import csv
+import io
+import logging
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from typing import Iterator
+
+from PIL import Image as PILImage
+from sqlalchemy import text
+
+from src.images.commands import checkpoints
+from src.images.models.database import engine
+from src.images.models.image import Image, ImageStatus
+from src.images.services.workers import get_executor, shutdown
+from src.images.settings.base import Settings
+from src.images.utils.image import (
+    FORMATS,
+    EncodingOptions,
+    RenditionFile,
+    encoding_options,
+    process,
+    sha256_checksum,
+    supported_formats,
+)
+from src.images.utils.layout import alternate_paths, rendition_paths, sharded_path
+from src.images.utils.storage import Storage, get_storage
+
+
+logger = logging.getLogger(__name__)
+
+settings = Settings()
+storage = get_storage(settings)
+encoding = encoding_options(settings)
+
+# NOTE: Namespace of the IDs of imported images - see `image_id`.
+NAMESPACE = uuid.UUID("3c4e1a79-29f8-4abc-b47d-075091b3900a")
+
+STAGING_STATEMENTS = [
+    text(
+        """
+        CREATE TEMPORARY TABLE IF NOT EXISTS imported_images (
+            id uuid,
+            path text,
+            _checksum text,
+            _status text,
+            source_checksum text
+        ) ON COMMIT DELETE ROWS
+        """
+    ),
+    text(
+        """
+        CREATE TEMPORARY TABLE IF NOT EXISTS imported_renditions (
+            image_id uuid,
+            path text,
+            width integer,
+            height integer,
+            size bigint,
+            checksum text
+        ) ON COMMIT DELETE ROWS
+        """
+    ),
+]
+COPY_STATEMENT = (
+    "COPY imported_images (id, path, _checksum, _status, source_checksum) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+COPY_RENDITIONS_STATEMENT = (
+    "COPY imported_renditions (image_id, path, width, height, size, checksum) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+# NOTE: Images already imported (i.e. with the same ID or path) are skipped - as are
+# their renditions, which are only inserted along with their image.
+INSERT_STATEMENT = text(
+    """
+    WITH inserted AS (
+        INSERT INTO images (
+            id, path, _checksum, _status, source_checksum, created, updated
+        )
+        SELECT id, path, _checksum, _status::imagestatus, source_checksum, now(), now()
+        FROM imported_images
+        ON CONFLICT DO NOTHING
+        RETURNING id, _status
+    ), inserted_renditions AS (
+        INSERT INTO renditions (
+            id, image_id, path, width, height, size, checksum, created, updated
+        )
+        SELECT
+            gen_random_uuid(), image_id, path, width, height, size, checksum, now(),
+            now()
+        FROM imported_renditions JOIN inserted ON inserted.id = image_id
+    )
+    SELECT _status FROM inserted
+    """
+)
+
+
+@dataclass
+class Checkpoint:
+    """
+    The progress of an import.
+
+    Attributes:
+        directory (str): The (absolute) directory imported.
+        after (list[str] | None): The (relative) path - as components - of the last
+            file imported.
+        imported (int): The number of images imported - i.e. DONE.
+        failed (int): The number of files which failed to be processed - i.e. imported
+            CORRUPTED (or not at all, if their image path is too long).
+        skipped (int): The number of files already imported.
+        bytes (int): The total size of the files imported.
+    """
+
+    directory: str
+    after: list[str] | None = None
+    imported: int = 0
+    failed: int = 0
+    skipped: int = 0
+    bytes: int = 0
+
+    @classmethod
+    def load(cls, path: str, directory: str) -> "Checkpoint":
+        """
+        Load the checkpoint at the path - a new one if there is none.
+
+        Args:
+            path (str): The path to the checkpoint.
+            directory (str): The (absolute) directory imported.
+
+        Returns:
+            Checkpoint: The checkpoint.
+
+        Raises:
+            ValueError: If the checkpoint is of another directory.
+        """
+        data = checkpoints.load(path)
+        if data is None:
+            return cls(directory=directory)
+
+        checkpoint = cls(**data)
+        if checkpoint.directory != directory:
+            raise ValueError(
+                f"checkpoint is of another directory: {checkpoint.directory}"
+            )
+
+        return checkpoint
+
+    def save(self, path: str) -> None:
+        """
+        Save the checkpoint at the path - atomically.
+
+        Args:
+            path (str): The path to the checkpoint.
+        """
+        checkpoints.save(path, asdict(self))
+
+
+@dataclass
+class Batch:
+    """
+    A batch of files being processed.
+
+    Attributes:
+        files (list[tuple[list[str], str]]): The (relative) path - as components - and
+            path of each file.
+        futures (list[Future | None]): The future of processing each file - None if
+            it was not submitted.
+        output_paths (list[str | None]): The path each file is processed to.
+    """
+
+    files: list[tuple[list[str], str]]
+    futures: list[Future | None] = field(default_factory=list)
+    output_paths: list[str | None] = field(default_factory=list)
+
+
+def walk(directory: str, after: list[str] | None = None) -> Iterator[list[str]]:
+    """
+    Walk the image files of a directory tree - in lexicographic order of their
+    (relative) paths.
+
+    Args:
+        directory (str): The directory.
+        after (list[str] | None): The (relative) path - as components - after which
+            files are walked. Subtrees entirely before it are not walked at all.
+
+    Yields:
+        list[str]: The (relative) path - as components - of each file.
+    """
+    extensions = PILImage.registered_extensions()
+
+    def _walk(parts: list[str]) -> Iterator[list[str]]:
+        with os.scandir(os.path.join(directory, *parts)) as entries:
+            names = sorted(
+                (entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries
+            )
+        for name, is_dir in names:
+            path = parts + [name]
+            if is_dir:
+                if after is None or path >= after[: len(path)]:
+                    yield from _walk(path)
+            elif os.path.splitext(name)[1].lower() in extensions:
+                if after is None or path > after:
+                    yield path
+
+    return _walk([])
+
+
+def image_id(path: str) -> uuid.UUID:
+    """
+    Derive the ID of the image imported from a file.
+
+    Args:
+        path (str): The (absolute) path of the file - i.e. including the directory
+            imported.
+
+    Returns:
+        uuid.UUID: The ID.
+    """
+    return uuid.uuid5(NAMESPACE, path)
+
+
+def _import(
+    input_path: str,
+    output_path: str,
+    width: int,
+    fast: bool,
+    storage: Storage,
+    options: EncodingOptions,
+    alternate_paths: tuple[str, ...] = (),
+    renditions: tuple[tuple[int, str], ...] = (),
+) -> tuple[str, str, list[RenditionFile]]:
+    """
+    Process a file - i.e. hash, resize and save it (and its alternate encodings and
+    renditions, if any).
+
+    NOTE: Defined at the module level (i.e. picklable) so it can be run in a process
+    pool.
+
+    Args:
+        input_path (str): The path to the file.
+        output_path (str): The path the image is saved to.
+        width (int): The desired width of the image.
+        fast (bool): Whether to resize via the fast path.
+        storage (Storage): The storage the image is saved to.
+        options (EncodingOptions): The encoding options of the image.
+        alternate_paths (tuple[str, ...]): The paths the image is also saved to - see
+            `utils.image.process`.
+        renditions (tuple[tuple[int, str], ...]): The width and path of each rendition
+            of the image.
+
+    Returns:
+        tuple[str, str, list[RenditionFile]]: The SHA256 checksum of the file and of
+            the saved image - and the saved renditions.
+    """
+    source_checksum = sha256_checksum(input_path)
+    rendered: list[RenditionFile] = []
+    checksum = process(
+        input_path,
+        output_path,
+        width,
+        fast=fast,
+        storage=storage,
+        options=options,
+        alternate_paths=alternate_paths,
+        renditions=renditions,
+        rendered=rendered,
+        max_threads=settings.rendition_max_threads,
+    )
+
+    return source_checksum, checksum, rendered
+
+
+def submit(
+    batch: Batch,
+    base_path: str,
+    width: int,
+    fast: bool,
+    checkpoint: Checkpoint,
+    alternate_formats: tuple[str, ...] = (),
+    rendition_widths: tuple[int, ...] = (),
+) -> None:
+    """
+    Submit (the files of) a batch to the process pool.
+
+    Files whose image (or rendition) path would be too long to be inserted are counted
+    as failed.
+
+    Args:
+        batch (Batch): The batch.
+        base_path (str): The directory images are saved to.
+        width (int): The desired width of images.
+        fast (bool): Whether to resize via the fast path.
+        checkpoint (Checkpoint): The progress of the import.
+        alternate_formats (tuple[str, ...]): The formats images are also saved in - see
+            `utils.image.FORMATS`.
+        rendition_widths (tuple[int, ...]): The widths images are also saved in.
+    """
+    executor = get_executor()
+    max_length = Image.__table__.c.path.type.length
+    extensions = tuple(
+        FORMATS[alternate_format][1] for alternate_format in alternate_formats
+    )
+    for parts, path in batch.files:
+        output_path = sharded_path(
+            base_path, image_id(path), f"{image_id(path)}.{parts[-1]}"
+        )
+        renditions = rendition_paths(output_path, rendition_widths, width)
+        paths = (output_path, *(rendition for _, rendition in renditions))
+        if max(len(output) for output in paths) > max_length:
+            logger.error(f"Failed to import {path}: path too long")
+            checkpoint.failed += 1
+            batch.output_paths.append(None)
+            batch.futures.append(None)
+            continue
+        batch.output_paths.append(output_path)
+        batch.futures.append(
+            executor.submit(
+                _import,
+                path,
+                output_path,
+                width,
+                fast,
+                storage,
+                encoding,
+                alternate_paths=alternate_paths(output_path, extensions),
+                renditions=renditions,
+            )
+        )
+
+
+def load(batch: Batch, checkpoint: Checkpoint) -> None:
+    """
+    Wait for (the files of) a batch to be processed and load them - via COPY.
+
+    Args:
+        batch (Batch): The batch.
+        checkpoint (Checkpoint): The progress of the import - updated once the batch is
+            committed.
+    """
+    buffer, renditions_buffer = io.StringIO(), io.StringIO()
+    writer, renditions_writer = csv.writer(buffer), csv.writer(renditions_buffer)
+    rows, size = 0, 0
+    for (parts, path), output_path, future in zip(
+        batch.files, batch.output_paths, batch.futures
+    ):
+        if future is None:
+            continue
+        exc = future.exception()
+        if exc is None:
+            source_checksum, checksum, rendered = future.result()
+            renditions_writer.writerows(
+                [
+                    image_id(path),
+                    rendition.path,
+                    rendition.width,
+                    rendition.height,
+                    rendition.size,
+                    rendition.checksum,
+                ]
+                for rendition in rendered
+            )
+            writer.writerow(
+                [
+                    image_id(path),
+                    output_path,
+                    checksum,
+                    ImageStatus.DONE.name,
+                    source_checksum,
+                ]
+            )
+            size += os.path.getsize(path)
+        else:
+            logger.error(f"Failed to process {path}: {exc}")
+            writer.writerow(
+                [image_id(path), output_path, None, ImageStatus.CORRUPTED.name, None]
+            )
+        rows += 1
+    buffer.seek(0)
+    renditions_buffer.seek(0)
+
+    with engine.begin() as connection:
+        for statement in STAGING_STATEMENTS:
+            connection.execute(statement)
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(COPY_STATEMENT, buffer)
+            cursor.copy_expert(COPY_RENDITIONS_STATEMENT, renditions_buffer)
+        statuses = connection.execute(INSERT_STATEMENT).scalars().all()
+
+    # NOTE: Counted from the rows inserted - i.e. each file is counted once, whether
+    # imported (DONE), failed (CORRUPTED) or skipped.
+    imported = sum(status == ImageStatus.DONE.name for status in statuses)
+    checkpoint.after = batch.files[-1][0]
+    checkpoint.imported += imported
+    checkpoint.failed += len(statuses) - imported
+    checkpoint.skipped += rows - len(statuses)
+    checkpoint.bytes += size
+
+
+def import_directory(
+    directory: str,
+    base_path: str,
+    checkpoint_path: str,
+    batch_size: int = 500,
+    width: int = 1500,
+    fast: bool = False,
+    alternate_formats: tuple[str, ...] = tuple(
+        supported_formats(settings.output_alternate_formats)
+    ),
+    rendition_widths: tuple[int, ...] = tuple(settings.rendition_widths),
+) -> Checkpoint:
+    """
+    Import a directory tree of images - resuming from the checkpoint (if any).
+
+    The next batch is processed while the previous one is loaded - i.e. at most two
+    batches are in flight.
+
+    Args:
+        directory (str): The directory.
+        base_path (str): The directory images are saved to.
+        checkpoint_path (str): The path to the checkpoint.
+        batch_size (int): The number of files loaded per batch.
+        width (int): The desired width of images.
+        fast (bool): Whether to resize via the fast path.
+        alternate_formats (tuple[str, ...]): The formats images are also saved in -
+            defaults to those of uploads.
+        rendition_widths (tuple[int, ...]): The widths images are also saved in -
+            defaults to those of uploads.
+
+    Returns:
+        Checkpoint: The progress of the import - i.e. once done.
+    """
+    directory = os.path.abspath(directory)
+    checkpoint = Checkpoint.load(checkpoint_path, directory)
+    os.makedirs(base_path, exist_ok=True)
+
+    start = time.perf_counter()
+    imported, size = checkpoint.imported, checkpoint.bytes
+    files = (
+        (parts, os.path.join(directory, *parts))
+        for parts in walk(directory, checkpoint.after)
+    )
+    previous: Batch | None = None
+    try:
+        while True:
+            batch = Batch(files=[file for _, file in zip(range(batch_size), files)])
+            if batch.files:
+                submit(
+                    batch,
+                    base_path,
+                    width,
+                    fast,
+                    checkpoint,
+                    alternate_formats=alternate_formats,
+                    rendition_widths=rendition_widths,
+                )
+            if previous is not None:
+                load(previous, checkpoint)
+                checkpoint.save(checkpoint_path)
+                elapsed = time.perf_counter() - start
+                logger.info(
+                    f"{checkpoint.imported} imported, {checkpoint.failed} failed, "
+                    f"{checkpoint.skipped} skipped - "
+                    f"{(checkpoint.imported - imported) / elapsed:.1f} images/s, "
+                    f"{(checkpoint.bytes - size) / elapsed / 1024**2:.1f} MiB/s"
+                )
+            if not batch.files:
+                break
+            previous = batch
+    finally:
+        shutdown()
+
+    return checkpoint
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory")
+    parser.add_argument("--base-path", default="data/images")
+    parser.add_argument("--checkpoint", default="data/import.checkpoint.json")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--width", type=int, default=1500)
+    parser.add_argument("--fast", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    checkpoint = import_directory(
+        args.directory,
+        args.base_path,
+        args.checkpoint,
+        batch_size=args.batch_size,
+        width=args.width,
+        fast=args.fast,
+    )
+    print(
+        f"Done: {checkpoint.imported} imported, {checkpoint.failed} failed, "
+        f"{checkpoint.skipped} skipped"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+This module persists the checkpoints of (long-running) commands - i.e. so that they
+resume where they stopped.
+"""
+
+import json
+import os
+from typing import Any
+
+
+def load(path: str) -> dict[str, Any] | None:
+    """
+    Load the checkpoint at the path.
+
+    Args:
+        path (str): The path to the checkpoint.
+
+    Returns:
+        dict[str, Any] | None: The checkpoint - None if there is none.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def save(path: str, checkpoint: dict[str, Any]) -> None:
+    """
+    Save the checkpoint at the path - atomically, i.e. either the previous or the new
+    checkpoint is at the path (even if interrupted).
+
+    Args:
+        path (str): The path to the checkpoint.
+        checkpoint (dict[str, Any]): The checkpoint.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(checkpoint, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,321 @@
+"""
+Command scrubbing (i.e. re-verifying the checksums of) images - so that bit rot and
+truncated (or missing) files are detected.
+
+Images (DONE) are walked in keyset order (i.e. by created and id - see
+`ix_images_created_id`) and their files re-hashed across threads, with large reads.
+Images whose file does not match their checksum (or cannot be read) are marked
+CORRUPTED. Images whose storage fails (e.g. S3 being unreachable) are skipped - i.e.
+verified again in the next pass.
+
+Both IO (bytes/s) and images (rows/s) are rate-limited, so the scrubber can run
+continuously without hurting serving latency. The position reached is checkpointed
+after each batch, so a restarted scrubber resumes where it stopped.
+
+Example:
+    $ DATABASE_URL=<database-url> python -m src.images.commands.scrub
+"""
+
+import argparse
+import hashlib
+import logging
+import signal
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from botocore.exceptions import BotoCoreError, ClientError
+from sqlalchemy import select, tuple_, update
+
+from src.images.commands import checkpoints
+from src.images.models.database import Session
+from src.images.models.image import Image, ImageStatus
+from src.images.settings.base import Settings
+from src.images.utils.ratelimit import TokenBucket
+from src.images.utils.storage import Storage, get_storage
+
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+storage = get_storage(Settings())
+
+
+@dataclass
+class Position:
+    """
+    The position (and progress) of a scrubber.
+
+    Attributes:
+        created (str | None): The creation time (ISO 8601) of the last image scrubbed -
+            None at the start of a pass.
+        id (str | None): The ID of the last image scrubbed.
+        passes (int): The number of (complete) passes over the images.
+        scrubbed (int): The number of images scrubbed.
+        corrupted (int): The number of images marked CORRUPTED.
+        skipped (int): The number of images skipped - i.e. whose storage failed.
+        bytes (int): The total size of the files scrubbed.
+    """
+
+    created: str | None = None
+    id: str | None = None
+    passes: int = 0
+    scrubbed: int = 0
+    corrupted: int = 0
+    skipped: int = 0
+    bytes: int = 0
+
+    @classmethod
+    def load(cls, path: str) -> "Position":
+        """
+        Load the position at the path - the start if there is none.
+
+        Args:
+            path (str): The path to the position.
+
+        Returns:
+            Position: The position.
+        """
+        return cls(**(checkpoints.load(path) or {}))
+
+    def save(self, path: str) -> None:
+        """
+        Save the position at the path - atomically.
+
+        Args:
+            path (str): The path to the position.
+        """
+        checkpoints.save(path, asdict(self))
+
+
+def checksum(
+    path: str, limiter: TokenBucket | None = None, storage: Storage | None = None
+) -> tuple[str, int]:
+    """
+    Calculate the SHA256 checksum of a file - reading it in large blocks into a reused
+    buffer (or, if not local, streaming it from storage).
+
+    NOTE: hashlib releases the GIL while hashing large blocks - i.e. files are hashed
+    in parallel across threads.
+
+    Args:
+        path (str): The path (i.e. key in storage) to the file.
+        limiter (TokenBucket | None): The limiter of bytes read (per second).
+        storage (Storage | None): The storage of the file - defaults to the local
+            filesystem.
+
+    Returns:
+        tuple[str, int]: The SHA256 checksum and the size of the file.
+    """
+    sha256 = hashlib.sha256()
+    if storage is not None and storage.path(path) is None:
+        size = 0
+        for chunk in storage.read(path):
+            if limiter is not None:
+                limiter.acquire(len(chunk))
+            sha256.update(chunk)
+            size += len(chunk)
+        return sha256.hexdigest(), size
+
+    buffer = bytearray(READ_BLOCK_SIZE)
+    view = memoryview(buffer)
+    size = 0
+
+    with open(path, "rb", buffering=0) as file:
+        while read := file.readinto(buffer):
+            if limiter is not None:
+                limiter.acquire(read)
+            sha256.update(view[:read])
+            size += read
+
+    return sha256.hexdigest(), size
+
+
+def _verify(
+    path: str, expected: str, limiter: TokenBucket | None
+) -> tuple[bool | None, int]:
+    """
+    Verify the file of an image - None if it could not be verified (i.e. skipped).
+    """
+    try:
+        actual, size = checksum(path, limiter, storage)
+    except OSError as exc:
+        logger.error(f"Failed to scrub image file {path}: {exc}")
+        return False, 0
+    # NOTE: Missing objects are FileNotFoundError (see S3Storage) - any other error of
+    # the object store is not the file's fault.
+    except (BotoCoreError, ClientError) as exc:
+        logger.error(f"Failed to read image file {path}, skipped: {exc}")
+        return None, 0
+
+    return actual == expected, size
+
+
+def scrub_batch(
+    position: Position,
+    executor: ThreadPoolExecutor,
+    batch_size: int,
+    bytes_limiter: TokenBucket | None = None,
+    rows_limiter: TokenBucket | None = None,
+) -> int:
+    """
+    Scrub the next batch of images - i.e. after the position, which is advanced.
+
+    Args:
+        position (Position): The position.
+        executor (ThreadPoolExecutor): The threads files are hashed in.
+        batch_size (int): The max. number of images scrubbed.
+        bytes_limiter (TokenBucket | None): The limiter of bytes read (per second).
+        rows_limiter (TokenBucket | None): The limiter of images scrubbed (per second).
+
+    Returns:
+        int: The number of images scrubbed - 0 at the end of a pass.
+    """
+    statement = (
+        select(Image.id, Image.path, Image._checksum, Image.created)
+        .where(Image._status == ImageStatus.DONE)
+        .order_by(Image.created.asc(), Image.id.asc())
+        .limit(batch_size)
+    )
+    if position.created is not None:
+        statement = statement.where(
+            tuple_(Image.created, Image.id)
+            > (datetime.fromisoformat(position.created), uuid.UUID(position.id))
+        )
+
+    with Session() as session:
+        rows = session.execute(statement).all()
+        if not rows:
+            return 0
+
+        def verify(
+            row: tuple[uuid.UUID, str, str, datetime]
+        ) -> tuple[bool | None, int]:
+            if rows_limiter is not None:
+                rows_limiter.acquire()
+            return _verify(row[1], row[2], bytes_limiter)
+
+        corrupted, skipped = [], 0
+        for row, (valid, size) in zip(rows, executor.map(verify, rows)):
+            position.bytes += size
+            if valid is None:
+                skipped += 1
+            elif not valid:
+                logger.error(f"Image is corrupted: {row[0]} ({row[1]})")
+                corrupted.append((row[0], row[2]))
+
+        # NOTE: Only images still DONE with the verified checksum are marked - i.e. not
+        # those (re)processed meanwhile.
+        for image_id, expected in corrupted:
+            session.execute(
+                update(Image)
+                .where(
+                    Image.id == image_id,
+                    Image._status == ImageStatus.DONE,
+                    Image._checksum == expected,
+                )
+                .values(_status=ImageStatus.CORRUPTED)
+            )
+        session.commit()
+
+    last = rows[-1]
+    position.created, position.id = last[3].isoformat(), str(last[0])
+    position.scrubbed += len(rows) - skipped
+    position.corrupted += len(corrupted)
+    position.skipped += skipped
+
+    return len(rows)
+
+
+def scrub(
+    position_path: str,
+    batch_size: int = 100,
+    threads: int = 4,
+    max_bytes_per_second: float | None = None,
+    max_rows_per_second: float | None = None,
+    once: bool = False,
+    pause: float = 60.0,
+    stop: threading.Event | None = None,
+) -> Position:
+    """
+    Scrub images - resuming from the persisted position (if any).
+
+    Args:
+        position_path (str): The path to the position.
+        batch_size (int): The number of images scrubbed per batch.
+        threads (int): The number of threads files are hashed in.
+        max_bytes_per_second (float | None): The max. number of bytes read per second.
+        max_rows_per_second (float | None): The max. number of images scrubbed per
+            second.
+        once (bool): Whether to stop at the end of the (current) pass - instead of
+            starting over.
+        pause (float): The number of seconds waited between passes.
+        stop (threading.Event | None): Set to stop (after the current batch).
+
+    Returns:
+        Position: The position reached.
+    """
+    stop = stop or threading.Event()
+    position = Position.load(position_path)
+    bytes_limiter = TokenBucket(max_bytes_per_second) if max_bytes_per_second else None
+    rows_limiter = TokenBucket(max_rows_per_second) if max_rows_per_second else None
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while not stop.is_set():
+            if scrub_batch(position, executor, batch_size, bytes_limiter, rows_limiter):
+                position.save(position_path)
+                continue
+
+            if position.created is not None:
+                logger.info(
+                    f"Scrub pass done: {position.scrubbed} scrubbed, "
+                    f"{position.corrupted} corrupted, {position.skipped} skipped"
+                )
+                position.created, position.id = None, None
+                position.passes += 1
+                position.save(position_path)
+            if once:
+                break
+            stop.wait(pause)
+
+    return position
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--position", default="data/scrub.position.json")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--max-bytes-per-second", type=float, default=32 * 1024**2)
+    parser.add_argument("--max-rows-per-second", type=float, default=100)
+    parser.add_argument("--pause", type=float, default=60.0)
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    position = scrub(
+        args.position,
+        batch_size=args.batch_size,
+        threads=args.threads,
+        max_bytes_per_second=args.max_bytes_per_second,
+        max_rows_per_second=args.max_rows_per_second,
+        once=args.once,
+        pause=args.pause,
+        stop=stop,
+    )
+    print(
+        f"Stopped: {position.passes} passes, {position.scrubbed} scrubbed, "
+        f"{position.corrupted} corrupted, {position.skipped} skipped"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Command migrating image files to the sharded layout (see `utils.layout`) - online, i.e.
+while the application keeps serving (and creating) images.
+
+Images are walked in keyset order (i.e. by created and id) in batches. The file of each
+image not yet sharded is linked (or, across filesystems, copied) at its sharded path,
+then Image.path is rewritten - once per batch, in a single statement - and, only after
+a grace period, the former file is removed. Requests which read an image's former path
+before it was rewritten (or from a cached row, hence the grace period is at least
+image_cache_ttl) can hence still serve its file.
+
+NOTE: Files are linked (or copied) before - i.e. outside - the transaction rewriting
+paths: it bumps a row of image versions (see `models.image.ImageVersion`), which
+uploads (and deletes) sharing its stripe wait for until it commits.
+
+Only images whose file is (flat) in the base path are migrated. Images IN_PROGRESS are
+skipped (i.e. they are being written at their reserved path) - as are images whose file
+is missing. Running the command again migrates them.
+
+NOTE: Only files on local storage (see `utils.storage`) are migrated - object stores do
+not suffer from large directories.
+
+The position reached (and the files pending removal) are checkpointed after each
+batch, so an interrupted migration resumes where it stopped.
+
+Example:
+    $ DATABASE_URL=<database-url> python -m src.images.commands.shard
+"""
+
+import argparse
+import errno
+import logging
+import os
+import shutil
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from sqlalchemy import UUID, Unicode, column, select, tuple_, update, values
+
+from src.images.commands import checkpoints
+from src.images.models.database import Session
+from src.images.models.image import Image, ImageStatus
+from src.images.settings.base import Settings
+from src.images.utils.layout import is_sharded, sharded_path
+
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+
+@dataclass
+class Migration:
+    """
+    The position (and progress) of a migration.
+
+    Attributes:
+        created (str | None): The creation time (ISO 8601) of the last image walked.
+        id (str | None): The ID of the last image walked.
+        migrated (int): The number of images migrated.
+        skipped (int): The number of images skipped - i.e. IN_PROGRESS or missing.
+        pending (list[tuple[float, str]]): The time each former file was unlinked from
+            its image (i.e. its path rewritten) - and its path, to be removed.
+    """
+
+    created: str | None = None
+    id: str | None = None
+    migrated: int = 0
+    skipped: int = 0
+    pending: list[tuple[float, str]] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: str) -> "Migration":
+        """
+        Load the migration at the path - a new one if there is none.
+
+        Args:
+            path (str): The path to the migration.
+
+        Returns:
+            Migration: The migration.
+        """
+        data = checkpoints.load(path) or {}
+        data["pending"] = [tuple(item) for item in data.get("pending", [])]
+
+        return cls(**data)
+
+    def save(self, path: str) -> None:
+        """
+        Save the migration at the path - atomically.
+
+        Args:
+            path (str): The path to the migration.
+        """
+        checkpoints.save(path, asdict(self))
+
+
+def link(source: str, destination: str) -> None:
+    """
+    Link a file at a new path - copying it if across filesystems.
+
+    The directory of the new path is created (lazily) and a file left at it (e.g. by an
+    interrupted migration) is replaced.
+
+    Args:
+        source (str): The path to the file.
+        destination (str): The new path.
+    """
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    tmp_path = f"{destination}.tmp"
+    try:
+        os.link(source, tmp_path)
+    except FileExistsError:
+        os.remove(tmp_path)
+        os.link(source, tmp_path)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, destination)
+
+
+def remove_pending(migration: Migration, grace: float) -> None:
+    """
+    Remove the former files whose grace period is over.
+
+    Args:
+        migration (Migration): The migration.
+        grace (float): The number of seconds former files are kept for.
+    """
+    now = time.time()
+    pending = []
+    for unlinked, path in migration.pending:
+        if now - unlinked < grace:
+            pending.append((unlinked, path))
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    migration.pending = pending
+
+
+def migrate_batch(migration: Migration, base_path: str, batch_size: int) -> int:
+    """
+    Migrate the next batch of images - i.e. after the position, which is advanced.
+
+    Args:
+        migration (Migration): The migration.
+        base_path (str): The directory images are stored in.
+        batch_size (int): The max. number of images walked.
+
+    Returns:
+        int: The number of images walked - 0 once all were.
+    """
+    statement = (
+        select(Image.id, Image.path, Image._status, Image.created)
+        .order_by(Image.created.asc(), Image.id.asc())
+        .limit(batch_size)
+    )
+    if migration.created is not None:
+        statement = statement.where(
+            tuple_(Image.created, Image.id)
+            > (datetime.fromisoformat(migration.created), uuid.UUID(migration.id))
+        )
+
+    with Session() as session:
+        rows = session.execute(statement).all()
+    if not rows:
+        return 0
+
+    linked = []
+    for image_id, path, status, _ in rows:
+        if is_sharded(base_path, image_id, path) or os.path.normpath(
+            os.path.dirname(path)
+        ) != os.path.normpath(base_path):
+            continue
+        if status == ImageStatus.IN_PROGRESS or not os.path.exists(path):
+            migration.skipped += 1
+            continue
+        new_path = sharded_path(base_path, image_id, os.path.basename(path))
+        link(path, new_path)
+        linked.append((image_id, path, new_path))
+
+    moved = []
+    if linked:
+        paths = values(
+            column("id", UUID),
+            column("path", Unicode),
+            column("new_path", Unicode),
+            name="paths",
+        ).data(linked)
+        # NOTE: Only images whose path is unchanged are rewritten - i.e. not those
+        # updated (or deleted) meanwhile.
+        with Session() as session:
+            updated = set(
+                session.scalars(
+                    update(Image)
+                    .where(Image.id == paths.c.id, Image.path == paths.c.path)
+                    .values(path=paths.c.new_path)
+                    .returning(Image.id)
+                    .execution_options(synchronize_session=False)
+                )
+            )
+            session.commit()
+        for image_id, path, new_path in linked:
+            if image_id in updated:
+                moved.append(path)
+            else:
+                os.remove(new_path)
+
+    unlinked = time.time()
+    migration.pending.extend((unlinked, path) for path in moved)
+    migration.migrated += len(moved)
+    last = rows[-1]
+    migration.created, migration.id = last[3].isoformat(), str(last[0])
+
+    return len(rows)
+
+
+def migrate(
+    migration_path: str,
+    base_path: str = "data/images",
+    batch_size: int = 500,
+    grace: float = 60.0,
+) -> Migration:
+    """
+    Migrate image files to the sharded layout - resuming from the checkpointed
+    migration (if any).
+
+    Args:
+        migration_path (str): The path to the migration.
+        base_path (str): The directory images are stored in.
+        batch_size (int): The number of images walked per batch.
+        grace (float): The number of seconds former files are kept for - after their
+            image's path is rewritten. At least image_cache_ttl, i.e. until rows
+            cached with the former path expire (see `ImageService.aget_row`).
+
+    Returns:
+        Migration: The (done) migration.
+
+    Raises:
+        ValueError: If the grace period is shorter than image_cache_ttl.
+    """
+    if grace < settings.image_cache_ttl:
+        raise ValueError(
+            f"grace must be at least image_cache_ttl ({settings.image_cache_ttl}): "
+            f"{grace}"
+        )
+
+    migration = Migration.load(migration_path)
+    while migrate_batch(migration, base_path, batch_size):
+        remove_pending(migration, grace)
+        migration.save(migration_path)
+        logger.info(
+            f"{migration.migrated} migrated, {migration.skipped} skipped, "
+            f"{len(migration.pending)} pending removal"
+        )
+
+    while migration.pending:
+        time.sleep(max(0.0, migration.pending[0][0] + grace - time.time()))
+        remove_pending(migration, grace)
+        migration.save(migration_path)
+
+    return migration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-path", default="data/images")
+    parser.add_argument("--migration", default="data/shard.migration.json")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--grace", type=float, default=60.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    migration = migrate(
+        args.migration,
+        base_path=args.base_path,
+        batch_size=args.batch_size,
+        grace=args.grace,
+    )
+    print(f"Done: {migration.migrated} migrated, {migration.skipped} skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,21 +5,60 @@ The `images` router is included in the application to handle the endpoints relat
 images.
 """
 
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
 from src.images.endpoints.config import setup_logger
+from src.images.endpoints.database import router as database_router
 from src.images.endpoints.image import router as image_router
+from src.images.endpoints.metrics import router as metrics_router
+from src.images.endpoints.processing import router as processing_router
+from src.images.endpoints.uploads import UploadGuard
+from src.images.models.database import async_engine
+from src.images.services.image import watch_source_checksums
+from src.images.services.workers import shutdown
 from ..settings.base import Settings
 
 
 settings = Settings()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Handle the application lifespan - i.e. load (and keep merging) the checksums of
+    uploaded images (see services.image.watch_source_checksums) in the background on
+    startup, and wait for images being processed (and release the process pool and
+    database connections) on shutdown.
+    """
+    # NOTE: A daemon thread - i.e. startup (and shutdown) never wait for the scan.
+    stop = threading.Event()
+    threading.Thread(
+        target=watch_source_checksums,
+        args=(stop,),
+        name="watch-source-checksums",
+        daemon=True,
+    ).start()
+    yield
+    stop.set()
+    shutdown()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.app_name,
     description=settings.description,
     debug=settings.debug,
+    lifespan=lifespan,
 )
+# NOTE: Batches are not rejected for files which are not images - each fails alone.
+app.add_middleware(UploadGuard, paths={"/api/submit": True, "/api/submit/batch": False})
 app.include_router(image_router)
+app.include_router(database_router)
+app.include_router(processing_router)
+app.include_router(metrics_router)
 
 setup_logger()
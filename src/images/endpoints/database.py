@@ -0,0 +1,26 @@
+"""
+This module defines the endpoints exposing the state of the database connection pools -
+e.g. to size them (see Settings.database_pool_*) against the number of workers.
+"""
+
+from fastapi import APIRouter, status
+
+from src.images.models.database import PoolStats, async_engine, engine, pool_stats
+
+
+router = APIRouter(
+    prefix="/api",
+    tags=["database"],
+)
+
+
+@router.get("/database/pools", status_code=status.HTTP_200_OK)
+async def get_pools() -> dict[str, PoolStats]:
+    """
+    Retrieve the stats of the connection pools of the (worker) process - i.e. of the
+    sync and asyncio engines.
+
+    Returns:
+        dict[str, PoolStats]: The stats of each pool.
+    """
+    return {"sync": pool_stats(engine), "asyncio": pool_stats(async_engine)}
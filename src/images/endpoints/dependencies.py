@@ -0,0 +1,37 @@
+"""
+This module defines the dependencies (see FastAPI's Depends) of the endpoints.
+
+Sessions are scoped to requests - i.e. each request gets its own session (and, hence,
+connection) which is closed once the request is handled.
+"""
+
+from typing import AsyncIterator
+
+from fastapi import Depends
+
+from src.images.models.database import AsyncSession
+from src.images.services.image import ImageService
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """
+    Provide a session scoped to the request.
+
+    Yields:
+        AsyncSession: The session.
+    """
+    async with AsyncSession() as session:
+        yield session
+
+
+def get_image_service(session: AsyncSession = Depends(get_session)) -> ImageService:
+    """
+    Provide an image service bound to the session of the request.
+
+    Args:
+        session (AsyncSession): The session of the request.
+
+    Returns:
+        ImageService: The image service.
+    """
+    return ImageService(async_session=session)
@@ -1,76 +1,166 @@
+import io
 import logging
 import os
-import shutil
 import tempfile
+from functools import partial
+from typing import Any
+from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Query, Response
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    UploadFile,
+    File,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.concurrency import run_in_threadpool
+import orjson
 from pydantic import BaseModel
+from sqlalchemy import Row
 
 from src.images.endpoints.base import Base
-from src.images.models.image import ImageStatus
-from src.images.services.exceptions import ClientError, ConflictError, ServerError
-from src.images.services.image import ImageService, TmpImage
+from src.images.endpoints.dependencies import get_image_service
+from src.images.endpoints.responses import (
+    FileRangeResponse,
+    StorageRangeResponse,
+    compressed_response,
+    http_date,
+    is_not_modified,
+    match_etag,
+    negotiate_media_types,
+    parse_range,
+)
+from src.images.models.image import Image as ImageEntity, ImageStatus
+from src.images.services.exceptions import (
+    ClientError,
+    ConflictError,
+    NotFoundError,
+    OverloadedError,
+    ServerError,
+)
+from src.images.services.image import ImageService, TmpImage, VariantFormat
+from src.images.services.metrics import bytes_in_total, stage_seconds
+from src.images.settings.base import Settings
+from src.images.utils.image import copy_with_checksum
+from src.images.utils.pagination import encode_cursor
+from src.images.utils.storage import Storage
 
 
 logger = logging.getLogger(__name__)
 
+settings = Settings()
+
 router = APIRouter(
     prefix="/api",
     tags=["images"],
 )
 
 
+class Rendition(BaseModel):
+    """
+    Represents a rendition of an image - i.e. the image resized to another width.
+
+    Attributes:
+        path (str): The path of the rendition file.
+        width (int): The width of the rendition.
+        height (int): The height of the rendition.
+        size (int): The size (in bytes) of the rendition file.
+        checksum (str): The checksum of the rendition file.
+    """
+
+    path: str
+    width: int
+    height: int
+    size: int
+    checksum: str
+
+
 class Image(Base):
     """
     Represents an image.
 
     Attributes:
         status (ImageStatus): The status of the image.
-        checksum (str): The checksum of the image.
+        checksum (str | None): The checksum of the image - unset while IN_PROGRESS.
+        renditions (list[Rendition] | None): The renditions of the image (by width) -
+            only listed (see list_images) or got (see get_image).
     """
 
     path: str
     status: ImageStatus
-    checksum: str
+    checksum: str | None
+    renditions: list[Rendition] | None = None
 
 
-@router.post("/submit", status_code=status.HTTP_201_CREATED)
-async def create_image(image_file: UploadFile = File(...)) -> Image:
+class BatchResult(BaseModel):
+    """
+    Represents the result of creating an image from one of the files of a batch.
+
+    Attributes:
+        filename (str | None): The name of the uploaded file.
+        status_code (int): The status code creating the image (alone) is answered with.
+        image (Image | None): The created image - unset if it failed to be created.
+        detail (str | None): The reason the image failed to be created.
+    """
+
+    filename: str | None
+    status_code: int
+    image: Image | None = None
+    detail: str | None = None
+
+
+@router.post(
+    "/submit",
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": Image}},
+)
+async def create_image(
+    response: Response,
+    image_file: UploadFile = File(...),
+    service: ImageService = Depends(get_image_service),
+) -> Image:
     """
     Create a new image from an uploaded file.
 
+    If the image is processed asynchronously, 202 is returned (with the image still
+    IN_PROGRESS) and its status can be polled at the location given in the response.
+
     Args:
+        response (Response): The FastAPI response object.
         image_file (UploadFile): The uploaded image file.
+        service (ImageService): The image service (of the request).
 
     Returns:
         Image: The created image.
 
     Raises:
-        HTTPException: If there is a conflict, bad request, or internal server error.
+        HTTPException: If there is a conflict, bad request, or internal server error -
+            or too many images are being processed (i.e. 503, see Retry-After).
     """
-    # TODO: assert content type.
+    # NOTE: Uploads which are not images (or too large) are rejected while received -
+    # see endpoints.uploads.
     try:
         logger.info(f"Creating image from uploaded file: {image_file.filename}")
-        prefix, suffix = os.path.splitext(os.path.basename(image_file.filename))
-        with (
-            tempfile.NamedTemporaryFile(
-                prefix=f"{prefix}.", suffix=suffix, delete=False, mode="wb"
-            ) as tmp,
-        ):
-            shutil.copyfileobj(image_file.file, tmp)
-            tmp_image = TmpImage(
-                path=tmp.name,
-                headers=image_file.headers,
-                content_type=image_file.content_type,
-            )
+        tmp_image = await _spill(image_file)
 
-        image = ImageService().create(tmp_image)
+        image = await service.acreate(tmp_image)
     except ConflictError as exc:
         logger.error(f"Failed to create image: {exc.message}")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=exc.message)
     except ClientError as exc:
         logger.error(f"Failed to create image: {exc.message}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=exc.message)
+    except OverloadedError as exc:
+        logger.error(f"Failed to create image: {exc.message}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=exc.message,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
     except ServerError as exc:
         logger.error(f"Failed to create image: {exc.message}")
         raise HTTPException(
@@ -79,6 +169,12 @@ async def create_image(image_file: UploadFile = File(...)) -> Image:
 
     logger.info(f"Image created: {image.id}")
 
+    if image.status == ImageStatus.IN_PROGRESS:
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Location"] = router.url_path_for(
+            "get_image_status", image_id=str(image.id)
+        )
+
     return Image(
         id=image.id,
         path=image.path,
@@ -89,9 +185,505 @@ async def create_image(image_file: UploadFile = File(...)) -> Image:
     )
 
 
-@router.get("/list", status_code=status.HTTP_200_OK)
+@router.post("/submit/batch", status_code=status.HTTP_200_OK)
+async def create_images(
+    image_files: list[UploadFile] = File(...),
+    service: ImageService = Depends(get_image_service),
+) -> list[BatchResult]:
+    """
+    Create new images from (a batch of) uploaded files.
+
+    Images are processed in parallel and inserted in a single transaction. Failures are
+    reported per file - i.e. a file failing to be created does not fail the batch.
+
+    Args:
+        image_files (list[UploadFile]): The uploaded image files.
+        service (ImageService): The image service (of the request).
+
+    Returns:
+        list[BatchResult]: The result of each uploaded file - in order.
+
+    Raises:
+        HTTPException: If there is an internal server error or too many images are being
+            processed - i.e. no image is created.
+    """
+    try:
+        logger.info(f"Creating images from uploaded files: {len(image_files)}")
+        tmp_images = []
+        try:
+            for image_file in image_files:
+                tmp_images.append(await _spill(image_file))
+        except BaseException:
+            for tmp_image in tmp_images:
+                tmp_image.discard()
+            raise
+
+        results = await service.acreate_many(tmp_images)
+    except OverloadedError as exc:
+        logger.error(f"Failed to create images: {exc.message}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=exc.message,
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    except ServerError as exc:
+        logger.error(f"Failed to create images: {exc.message}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=exc.message
+        )
+
+    batch = []
+    for image_file, result in zip(image_files, results):
+        if isinstance(result, ClientError):
+            logger.error(
+                f"Failed to create image ({image_file.filename}): {result.message}"
+            )
+            batch.append(
+                BatchResult(
+                    filename=image_file.filename,
+                    status_code=(
+                        status.HTTP_409_CONFLICT
+                        if isinstance(result, ConflictError)
+                        else status.HTTP_400_BAD_REQUEST
+                    ),
+                    detail=result.message,
+                )
+            )
+            continue
+        batch.append(
+            BatchResult(
+                filename=image_file.filename,
+                status_code=(
+                    status.HTTP_202_ACCEPTED
+                    if result.status == ImageStatus.IN_PROGRESS
+                    else status.HTTP_201_CREATED
+                ),
+                image=Image(
+                    id=result.id,
+                    path=result.path,
+                    status=result.status,
+                    checksum=result.checksum,
+                    created=result.created,
+                    updated=result.updated,
+                ),
+            )
+        )
+
+    logger.info(
+        f"Images created: {sum(result.image is not None for result in batch)} "
+        f"(of {len(batch)})"
+    )
+
+    return batch
+
+
+async def _spill(image_file: UploadFile) -> TmpImage:
+    """
+    Copy an uploaded file to memory - or, if larger than upload_memory_max_bytes, to a
+    temporary file (deleted by the service, once processed) - hashing it meanwhile.
+
+    The copy is timed (i.e. as the spill stage) and its size counted as bytes in.
+
+    Args:
+        image_file (UploadFile): The uploaded image file.
+
+    Returns:
+        TmpImage: The temporary image.
+    """
+    # NOTE: The size is known once the upload is parsed - i.e. before it is copied.
+    if (
+        image_file.size is not None
+        and image_file.size <= settings.upload_memory_max_bytes
+    ):
+        with io.BytesIO() as buffer, stage_seconds.time(stage="spill"):
+            checksum = await run_in_threadpool(
+                copy_with_checksum, image_file.file, buffer
+            )
+            content = buffer.getvalue()
+            bytes_in_total.inc(len(content))
+
+        return TmpImage(
+            path=os.path.basename(image_file.filename),
+            headers=image_file.headers,
+            content_type=image_file.content_type,
+            checksum=checksum,
+            content=content,
+        )
+
+    prefix, suffix = os.path.splitext(os.path.basename(image_file.filename))
+    with (
+        tempfile.NamedTemporaryFile(
+            prefix=f"{prefix}.", suffix=suffix, delete=False, mode="wb"
+        ) as tmp,
+        stage_seconds.time(stage="spill"),
+    ):
+        try:
+            checksum = await run_in_threadpool(copy_with_checksum, image_file.file, tmp)
+        except BaseException:
+            os.remove(tmp.name)
+            raise
+        bytes_in_total.inc(tmp.tell())
+
+    return TmpImage(
+        path=tmp.name,
+        headers=image_file.headers,
+        content_type=image_file.content_type,
+        checksum=checksum,
+        delete=True,
+    )
+
+
+@router.get("/images/{image_id}", status_code=status.HTTP_200_OK)
+async def get_image(
+    image_id: UUID, service: ImageService = Depends(get_image_service)
+) -> Image:
+    """
+    Retrieve an image - including its renditions.
+
+    Processed images are served from memory, if cached (see ImageService.aget_row) -
+    i.e. use /images/{image_id}/status to poll images being processed.
+
+    Args:
+        image_id (UUID): The ID of the image.
+        service (ImageService): The image service (of the request).
+
+    Returns:
+        Image: The image.
+
+    Raises:
+        HTTPException: If the image is not found.
+    """
+    try:
+        row = await service.aget_row(image_id)
+    except NotFoundError as exc:
+        logger.error(f"Failed to get image: {exc.message}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=exc.message)
+
+    return Image(**row._mapping)
+
+
+@router.delete("/images/{image_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_image(
+    image_id: UUID, service: ImageService = Depends(get_image_service)
+) -> None:
+    """
+    Delete an image - and its files (e.g. renditions).
+
+    Args:
+        image_id (UUID): The ID of the image.
+        service (ImageService): The image service (of the request).
+
+    Raises:
+        HTTPException: If the image is not found, is being processed or there is an
+            internal server error.
+    """
+    try:
+        await service.adelete(image_id)
+    except NotFoundError as exc:
+        logger.error(f"Failed to delete image: {exc.message}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=exc.message)
+    except ConflictError as exc:
+        logger.error(f"Failed to delete image: {exc.message}")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=exc.message)
+    except ServerError as exc:
+        logger.error(f"Failed to delete image: {exc.message}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=exc.message
+        )
+
+
+@router.get("/images/{image_id}/status", status_code=status.HTTP_200_OK)
+async def get_image_status(
+    image_id: UUID, service: ImageService = Depends(get_image_service)
+) -> Image:
+    """
+    Retrieve an image - e.g. to poll the status of an image being processed.
+
+    Args:
+        image_id (UUID): The ID of the image.
+        service (ImageService): The image service (of the request).
+
+    Returns:
+        Image: The image.
+
+    Raises:
+        HTTPException: If the image is not found.
+    """
+    try:
+        image = await service.aget(image_id)
+    except NotFoundError as exc:
+        logger.error(f"Failed to get image: {exc.message}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=exc.message)
+
+    return Image(
+        id=image.id,
+        path=image.path,
+        status=image.status,
+        checksum=image.checksum,
+        created=image.created,
+        updated=image.updated,
+    )
+
+
+@router.api_route(
+    "/images/{image_id}/file",
+    methods=["GET", "HEAD"],
+    status_code=status.HTTP_200_OK,
+    response_class=FileRangeResponse,
+    responses={
+        status.HTTP_206_PARTIAL_CONTENT: {"description": "A range of the image file"},
+        status.HTTP_304_NOT_MODIFIED: {"description": "The image file is unchanged"},
+    },
+)
+async def get_image_file(
+    image_id: UUID,
+    request: Request,
+    width: int | None = Query(
+        None,
+        gt=0,
+        le=ImageService.image_width,
+        alias="w",
+        description="The width of the (resized) variant",
+    ),
+    variant_format: VariantFormat | None = Query(
+        None, alias="fmt", description="The format of the (encoded) variant"
+    ),
+    service: ImageService = Depends(get_image_service),
+) -> Response:
+    """
+    Serve the file of an image - or of a variant of it (see w and fmt).
+
+    The image checksum is used as (strong) ETag - i.e. If-None-Match is answered with
+    304 - and single byte ranges (see Range and If-Range) are answered with 206.
+
+    Args:
+        image_id (UUID): The ID of the image.
+        request (Request): The FastAPI request object.
+        width (int | None): The width of the variant - never larger than the image's.
+        variant_format (VariantFormat | None): The format of the variant.
+        service (ImageService): The image service (of the request).
+
+    Returns:
+        Response: The (range of the) image file.
+
+    Raises:
+        HTTPException: If the image (or its file) is not found, is not processed yet
+            (or is corrupted) or the range is not satisfiable.
+    """
+    try:
+        image = await service.aget(image_id)
+    except NotFoundError as exc:
+        logger.error(f"Failed to get image file: {exc.message}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=exc.message)
+
+    if image.status != ImageStatus.DONE:
+        message = f"Image is {image.status.value}: {image_id}"
+        logger.error(f"Failed to get image file: {message}")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=message)
+
+    if width is None and variant_format is None:
+        return await _encoding_response(request, image, service)
+
+    # NOTE: Releases the connection of the request while the variant is loaded - the
+    # (detached) image remains usable.
+    await service.async_session.close()
+
+    variant = service.get_variant(image, width, variant_format)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and match_etag(if_none_match, variant.etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": variant.etag, "Cache-Control": "public, no-cache"},
+        )
+
+    # NOTE: A variant cached on disk may be evicted (e.g. by another request) before
+    # it is served - i.e. it is loaded (and produced, if no longer cached) again.
+    size = None
+    for _ in range(2):
+        try:
+            variant = await run_in_threadpool(service.load_variant, image, variant)
+        except OSError as exc:
+            logger.error(f"Failed to get image variant: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)
+            )
+
+        if variant.content is not None:
+            return Response(
+                variant.content,
+                media_type=variant.media_type,
+                headers={"ETag": variant.etag, "Cache-Control": "public, no-cache"},
+            )
+
+        size = await _file_size(variant.path)
+        if size is not None:
+            break
+
+    return await _file_response(
+        request, variant.path, variant.etag, variant.media_type, size=size
+    )
+
+
+async def _encoding_response(
+    request: Request, image: ImageEntity, service: ImageService
+) -> Response:
+    """
+    Build the response serving the best (stored) encoding of an image - i.e. the first
+    (see ImageService.get_encodings) whose media type is accepted (see Accept) and whose
+    file exists. The image file itself is served otherwise.
+
+    Args:
+        request (Request): The FastAPI request object.
+        image (ImageEntity): The (processed) image.
+        service (ImageService): The image service (of the request).
+
+    Returns:
+        Response: The (range of the) encoding - see `_file_response`.
+    """
+    encodings = service.get_encodings(image)
+    if len(encodings) == 1:
+        encoding = encodings[0]
+        return await _file_response(
+            request,
+            encoding.path,
+            encoding.etag,
+            encoding.media_type,
+            storage=service.storage,
+        )
+
+    # NOTE: Alternate encodings are opted into - i.e. only served if named in Accept,
+    # so clients accepting anything (e.g. scripts, with */*) get the image file itself.
+    by_media_type = {encoding.media_type: encoding for encoding in encodings}
+    alternates = tuple(encoding.media_type for encoding in encodings[:-1])
+    for media_type in negotiate_media_types(
+        request.headers.get("accept"), list(by_media_type), named=alternates
+    ):
+        encoding = by_media_type[media_type]
+        size = await _file_size(encoding.path, service.storage)
+        if size is not None:
+            break
+    else:
+        encoding, size = encodings[-1], None
+
+    return await _file_response(
+        request,
+        encoding.path,
+        encoding.etag,
+        encoding.media_type,
+        storage=service.storage,
+        size=size,
+        vary="Accept",
+    )
+
+
+async def _file_size(path: str, storage: Storage | None = None) -> int | None:
+    """
+    Get the size of a file - or None, if it does not exist.
+
+    Args:
+        path (str): The path (i.e. key in storage) to the file.
+        storage (Storage | None): The storage of the file - defaults to the local
+            filesystem.
+
+    Returns:
+        int | None: The size of the file.
+    """
+    local_path = path if storage is None else storage.path(path)
+    try:
+        if local_path is not None:
+            return os.stat(local_path).st_size
+        return await run_in_threadpool(storage.size, path)
+    except FileNotFoundError:
+        return None
+
+
+async def _file_response(
+    request: Request,
+    path: str,
+    etag: str,
+    media_type: str | None,
+    storage: Storage | None = None,
+    size: int | None = None,
+    vary: str | None = None,
+) -> Response:
+    """
+    Build the response serving a file - honoring conditional and range requests.
+
+    Args:
+        request (Request): The FastAPI request object.
+        path (str): The path (i.e. key in storage) to the file.
+        etag (str): The (strong) ETag of the file.
+        media_type (str | None): The media type of the file.
+        storage (Storage | None): The storage of the file - defaults to the local
+            filesystem.
+        size (int | None): The size of the file - if already known.
+        vary (str | None): The Vary header of the response - e.g. Accept, if the file
+            was negotiated.
+
+    Returns:
+        Response: The (range of the) file - or 304, if the file is unchanged.
+
+    Raises:
+        HTTPException: If the file is not found or the range is not satisfiable.
+    """
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+    if vary is not None:
+        headers["Vary"] = vary
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and match_etag(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    local_path = path if storage is None else storage.path(path)
+    if size is None:
+        size = await _file_size(path, storage)
+    if size is None:
+        message = f"Image file not found: {path}"
+        logger.error(f"Failed to get image file: {message}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=message)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    # NOTE: If-Range makes the range conditional - i.e. the whole (changed) file is
+    # served if it does not match.
+    if range_header is not None and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError as exc:
+            logger.error(f"Failed to get image file: {exc}")
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail=str(exc),
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+
+    if local_path is not None:
+        file_response = partial(FileRangeResponse, local_path)
+    else:
+        file_response = partial(StorageRangeResponse, storage, path)
+
+    if byte_range is None:
+        return file_response(size, headers=headers, media_type=media_type)
+
+    start, end = byte_range
+    return file_response(
+        size,
+        start=start,
+        end=end,
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        headers=headers,
+        media_type=media_type,
+    )
+
+
+@router.get(
+    "/list",
+    status_code=status.HTTP_200_OK,
+    response_model=list[Image],
+    response_class=Response,
+)
 async def list_images(
-    response: Response,
+    request: Request,
     page: int = Query(1, gt=0, alias="page", description="The page number"),
     limit: int = Query(
         10,
@@ -100,27 +692,84 @@ async def list_images(
         alias="limit",
         description="The maximum number of images per page",
     ),
-) -> list[Image]:
+    after: str | None = Query(
+        None,
+        alias="after",
+        description="The cursor (see X-Next-Cursor) after which images are listed - "
+        "takes precedence over page",
+    ),
+    exact: bool = Query(
+        False,
+        alias="exact",
+        description="Whether X-Total-Count is counted from the images table (slower) "
+        "instead of read from the maintained counts",
+    ),
+    service: ImageService = Depends(get_image_service),
+) -> Response:
     """
     Retrieve a list of images - always ordered by creation time (ASC).
 
+    Images are either paginated by page (i.e. OFFSET) or by cursor (i.e. keyset). The
+    latter should be preferred, since its cost does not depend on how deep the page is.
+
+    Images are listed as rows (i.e. not as Image objects) and serialized straight to
+    JSON - see `_dump_rows` - and large lists are compressed (see Accept-Encoding).
+
+    Lists are validated by the version of the images (see ImageService.aversion) - i.e.
+    a weak ETag. Conditional requests (see If-None-Match) whose list is unchanged are
+    answered with 304, without listing (or counting) images.
+
+    NOTE: Last-Modified is informative only - If-Modified-Since is not evaluated, since
+    the time of the last change is neither precise (i.e. to the second) nor in commit
+    order across the stripes of the version.
+
     Args:
-        response (Response): The FastAPI response object.
+        request (Request): The FastAPI request object.
         page (int): The page number.
         limit (int): The maximum number of images per page.
+        after (str | None): The cursor after which images are listed.
+        exact (bool): Whether the total count is counted from the images table.
+        service (ImageService): The image service (of the request).
 
     Returns:
-        list[Image]: A list of Image objects representing images within the parameters
-            of the request.
+        Response: A list of images (see Image) within the parameters of the request.
 
     Raises:
         HTTPException: If there is a bad request or internal server error.
     """
+    # NOTE: Read before the list - i.e. the list is never older than its ETag (at worst,
+    # newer, and then listed again once the ETag changes).
+    version, modified = await service.aversion()
+    cache_headers = {
+        "ETag": f'W/"{version}"',
+        "Cache-Control": (
+            f"public, max-age={settings.list_cache_max_age}, must-revalidate"
+        ),
+    }
+    if modified is not None:
+        cache_headers["Last-Modified"] = http_date(modified)
+    if settings.response_compression_min_bytes is not None:
+        cache_headers["Vary"] = "Accept-Encoding"
+    if is_not_modified(
+        request.headers.get("if-none-match"), None, cache_headers["ETag"]
+    ):
+        logger.info(f"Images not modified since version: {version}")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
     try:
-        logger.info(
-            f"Listing images as per page ({page}) and limit ({limit}) parameters"
-        )
-        result = ImageService().list(offset=(page - 1) * limit, limit=limit)
+        if after is None:
+            logger.info(
+                f"Listing images as per page ({page}) and limit ({limit}) parameters"
+            )
+            result = await service.alist_rows(
+                offset=(page - 1) * limit, limit=limit, exact=exact
+            )
+        else:
+            logger.info(
+                f"Listing images as per after ({after}) and limit ({limit}) parameters"
+            )
+            result = await service.alist_rows(after=after, limit=limit, exact=exact)
+        images = result.results
     except ClientError as exc:
         logger.error(f"Failed to list images: {exc.message}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=exc.message)
@@ -132,22 +781,54 @@ async def list_images(
 
     # NOTE: To simplify client logic, no error is raised (i.e. 404) if no images are found.
     logger.info(
-        f"Images listed for request (page={page} & limit={limit}): {result.query.count()}"
+        f"Images listed for request (page={page}, after={after} & limit={limit}): "
+        f"{len(images)}"
     )
 
-    response.headers["X-Page"] = str(page)
-    response.headers["X-Page-Size"] = str(limit)
-    response.headers["X-Total-Count"] = str(result.total)
-    response.headers["X-Total-Pages"] = str((result.total - 1) // limit + 1)
-
-    return [
-        Image(
-            id=image.id,
-            path=image.path,
-            status=image.status,
-            checksum=image.checksum,
-            created=image.created,
-            updated=image.updated,
-        )
-        for image in result.query
-    ]
+    headers = dict(cache_headers)
+    if after is None:
+        headers["X-Page"] = str(page)
+    headers["X-Page-Size"] = str(limit)
+    headers["X-Total-Count"] = str(result.total)
+    headers["X-Total-Pages"] = str((result.total - 1) // limit + 1)
+    # NOTE: A full page suggests (but does not guarantee) there are more images.
+    if len(images) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(images[-1].created, images[-1].id)
+
+    return compressed_response(
+        _dump_rows(images),
+        request.headers.get("accept-encoding"),
+        settings.response_compression_min_bytes,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def _dump_rows(rows: list[Row]) -> bytes:
+    """
+    Serialize rows of images (see `ImageService.alist_rows`) to JSON - as Image would
+    be, without building an Image per row.
+
+    Args:
+        rows (list[Row]): The rows.
+
+    Returns:
+        bytes: The JSON array of images.
+    """
+    if not rows:
+        return b"[]"
+
+    fields = rows[0]._fields
+    # NOTE: Datetimes (in UTC, as Z) and enums are natively serialized.
+    return orjson.dumps(
+        [dict(zip(fields, row)) for row in rows],
+        default=_dump_uuid,
+        option=orjson.OPT_UTC_Z,
+    )
+
+
+def _dump_uuid(value: Any) -> str:
+    # NOTE: asyncpg returns (subclasses of) UUIDs orjson does not natively serialize.
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value)}")
@@ -0,0 +1,84 @@
+"""
+This module defines the endpoint exposing the metrics of the (worker) process in the
+Prometheus text format - i.e. those of creating images (see `services.metrics`) and the
+stats of the processing queue and of the database connection pools.
+"""
+
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+
+from src.images.models.database import async_engine, engine, pool_stats
+from src.images.services.workers import jobs
+from src.images.utils.metrics import family, registry
+
+
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _queue_metrics() -> list[str]:
+    stats = jobs.stats()
+    return [
+        *family(
+            "images_queue_pending_jobs",
+            "Images queued or being processed.",
+            "gauge",
+            {(): stats.pending_jobs},
+        ),
+        *family(
+            "images_queue_pending_bytes",
+            "Bytes of images queued or being processed.",
+            "gauge",
+            {(): stats.pending_bytes},
+        ),
+        *family(
+            "images_queue_rejected_total",
+            "Images rejected since the queue was full.",
+            "counter",
+            {(): stats.rejected},
+        ),
+        *family(
+            "images_queue_wait_seconds_total",
+            "Time spent by (finished) images waiting in the queue.",
+            "counter",
+            {(): stats.wait_seconds},
+        ),
+    ]
+
+
+def _pool_metrics() -> list[str]:
+    pools = {"sync": pool_stats(engine), "asyncio": pool_stats(async_engine)}
+    return [
+        *family(
+            "images_database_pool_checked_out",
+            "Connections checked out of the pool.",
+            "gauge",
+            {(name,): stats.checked_out for name, stats in pools.items()},
+            ("pool",),
+        ),
+        *family(
+            "images_database_pool_wait_seconds_total",
+            "Time spent waiting for a connection of the pool.",
+            "counter",
+            {(name,): stats.wait_seconds for name, stats in pools.items()},
+            ("pool",),
+        ),
+    ]
+
+
+registry.register_collector(_queue_metrics)
+registry.register_collector(_pool_metrics)
+
+
+@router.get(
+    "/metrics", status_code=status.HTTP_200_OK, response_class=PlainTextResponse
+)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Retrieve the metrics of the (worker) process - in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: The metrics.
+    """
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,26 @@
+"""
+This module defines the endpoints exposing the state of image processing - e.g. to
+autoscale on the depth of (and the time spent waiting in) the queue of images to be
+processed.
+"""
+
+from fastapi import APIRouter, status
+
+from src.images.services.workers import QueueStats, jobs
+
+
+router = APIRouter(
+    prefix="/api",
+    tags=["processing"],
+)
+
+
+@router.get("/processing/queue", status_code=status.HTTP_200_OK)
+async def get_queue() -> QueueStats:
+    """
+    Retrieve the stats of the queue of images to be processed by the (worker) process.
+
+    Returns:
+        QueueStats: The stats of the queue.
+    """
+    return jobs.stats()
@@ -0,0 +1,419 @@
+"""
+This module defines responses (and helpers) used to serve image files - and lists of
+images.
+
+Files are sent with zero-copy transfer (i.e. `sendfile`) whenever the ASGI server
+supports it - see the `http.response.zerocopy` and `http.response.pathsend` extensions -
+and read in chunks (off the event loop) otherwise. Files of non-local storages (e.g. S3)
+are streamed - see `StorageRangeResponse`.
+
+Large (non-file) responses are compressed - with brotli or gzip, as negotiated via
+Accept-Encoding (see `compressed_response`) - and conditional requests (i.e.
+If-None-Match and If-Modified-Since) are evaluated with `is_not_modified`.
+"""
+
+import gzip
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+import anyio
+import brotli
+from starlette.concurrency import iterate_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from src.images.utils.storage import Storage
+
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# NOTE: Low levels (i.e. fast ones) - responses are compressed on every request.
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse the Range header of a request for a file of a given size.
+
+    Only single ranges are supported - any other (valid) range specifier is ignored,
+    i.e. the whole file is served.
+
+    Args:
+        header (str): The value of the Range header.
+        size (int): The size of the file.
+
+    Returns:
+        tuple[int, int] | None: The first and last (inclusive) bytes of the range - or
+            None if the header is to be ignored.
+
+    Raises:
+        ValueError: If the range is not satisfiable.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # NOTE: A suffix range - i.e. the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError(f"Range not satisfiable: {header}")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end:
+        if last and int(last) < start:
+            return None
+        raise ValueError(f"Range not satisfiable: {header}")
+
+    return start, end
+
+
+def negotiate_encoding(header: str | None) -> str | None:
+    """
+    Negotiate the content coding of a response from the Accept-Encoding header of a
+    request - brotli is preferred over gzip.
+
+    Args:
+        header (str | None): The value of the Accept-Encoding header.
+
+    Returns:
+        str | None: The content coding - i.e. br or gzip - or None if neither is
+            accepted.
+    """
+    if not header:
+        return None
+
+    weights = {}
+    for coding in header.split(","):
+        name, _, params = coding.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    for name in ("br", "gzip"):
+        if weights.get(name, weights.get("*", 0.0)) > 0:
+            return name
+
+    return None
+
+
+def negotiate_media_types(
+    header: str | None, offered: list[str], named: tuple[str, ...] = ()
+) -> list[str]:
+    """
+    Negotiate the media type of a response from the Accept header of a request - i.e.
+    rank the offered media types the request accepts.
+
+    Each offered media type is weighted by the most specific media range matching it
+    (e.g. image/webp over image/* over */*). Ties are broken by the order of offered
+    media types - i.e. the server's preference.
+
+    Args:
+        header (str | None): The value of the Accept header.
+        offered (list[str]): The offered media types - e.g. image/webp.
+        named (tuple[str, ...]): The offered media types only accepted if named - i.e.
+            not by wildcards (e.g. */*, as sent by clients which may not decode them).
+
+    Returns:
+        list[str]: The accepted media types - best first. All of them but the named
+            ones (i.e. in the order offered) if the header is missing.
+    """
+    if not header:
+        return [media_type for media_type in offered if media_type not in named]
+
+    weights = {}
+    for media_range in header.split(","):
+        name, _, params = media_range.strip().partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    ranked = []
+    for index, media_type in enumerate(offered):
+        kind = media_type.split("/")[0]
+        if media_type in named:
+            weight = weights.get(media_type, 0.0)
+        else:
+            weight = weights.get(
+                media_type, weights.get(f"{kind}/*", weights.get("*/*", 0.0))
+            )
+        if weight > 0:
+            ranked.append((-weight, index, media_type))
+
+    return [media_type for _, _, media_type in sorted(ranked)]
+
+
+def compressed_response(
+    content: bytes,
+    accept_encoding: str | None,
+    min_bytes: int | None,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+    media_type: str | None = None,
+) -> Response:
+    """
+    Build a response - compressing its content if it is large enough and the request
+    accepts a supported content coding (see `negotiate_encoding`).
+
+    Args:
+        content (bytes): The content of the response.
+        accept_encoding (str | None): The value of the Accept-Encoding header.
+        min_bytes (int | None): The min. size of content compressed - None to never
+            compress it.
+        status_code (int): The status code of the response.
+        headers (dict[str, str] | None): Additional headers of the response.
+        media_type (str | None): The media type of the content.
+
+    Returns:
+        Response: The response.
+    """
+    headers = dict(headers or {})
+    if min_bytes is not None:
+        # NOTE: The response depends on Accept-Encoding - i.e. for caches.
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is not None and len(content) >= min_bytes:
+            if encoding == "br":
+                content = brotli.compress(content, quality=BROTLI_QUALITY)
+            else:
+                content = gzip.compress(content, compresslevel=GZIP_LEVEL)
+            headers["Content-Encoding"] = encoding
+
+    return Response(
+        content, status_code=status_code, headers=headers, media_type=media_type
+    )
+
+
+def match_etag(header: str, etag: str) -> bool:
+    """
+    Check whether an If-None-Match header matches an ETag.
+
+    Args:
+        header (str): The value of the If-None-Match header.
+        etag (str): The (strong or weak) ETag of the resource.
+
+    Returns:
+        bool: Whether the header matches the ETag.
+    """
+    tags = [tag.strip() for tag in header.split(",")]
+
+    # NOTE: If-None-Match uses weak comparison - i.e. W/ prefixes are disregarded.
+    return "*" in tags or etag.removeprefix("W/") in [
+        tag.removeprefix("W/") for tag in tags
+    ]
+
+
+def http_date(value: datetime) -> str:
+    """
+    Format a datetime as an HTTP date - e.g. for Last-Modified.
+
+    Args:
+        value (datetime): The (timezone-aware) datetime.
+
+    Returns:
+        str: The HTTP date - e.g. Sun, 18 Oct 2026 17:48:52 GMT.
+    """
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    etag: str,
+    last_modified: datetime | None = None,
+) -> bool:
+    """
+    Check whether a conditional request is answered with 304 - i.e. whether the
+    representation the client has is still current.
+
+    If-Modified-Since is only evaluated without If-None-Match (see RFC 9110) - and at
+    the resolution of HTTP dates (i.e. seconds), hence ETags should be preferred.
+
+    Args:
+        if_none_match (str | None): The value of the If-None-Match header.
+        if_modified_since (str | None): The value of the If-Modified-Since header.
+        etag (str): The ETag of the resource.
+        last_modified (datetime | None): The time the resource was last modified.
+
+    Returns:
+        bool: Whether the request is answered with 304.
+    """
+    if if_none_match is not None:
+        return match_etag(if_none_match, etag)
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return last_modified.replace(microsecond=0) <= since
+
+
+class FileRangeResponse(Response):
+    """
+    A response serving (a range of) a file.
+
+    Attributes:
+        chunk_size (int): The size of chunks the file is read in, if the ASGI server
+            does not support zero-copy transfer.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        start: int = 0,
+        end: int | None = None,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        media_type: str | None = None,
+    ) -> None:
+        """
+        Initialize the response.
+
+        Args:
+            path (str): The path to the file.
+            size (int): The size of the file.
+            start (int): The first byte served.
+            end (int | None): The last (inclusive) byte served - defaults to the last
+                byte of the file.
+            status_code (int): The status code of the response.
+            headers (dict[str, str] | None): Additional headers of the response.
+            media_type (str | None): The media type of the file.
+        """
+        self.path = path
+        self.start = start
+        self.end = size - 1 if end is None else end
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["content-length"] = str(self.end - self.start + 1)
+        if status_code == 206:
+            self.headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensions = scope.get("extensions") or {}
+        count = self.end - self.start + 1
+        if "http.response.zerocopy" in extensions:
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopy",
+                        "file": file,
+                        "offset": self.start,
+                        "count": count,
+                    }
+                )
+        elif "http.response.pathsend" in extensions and count == os.path.getsize(
+            self.path
+        ):
+            await send(
+                {"type": "http.response.pathsend", "path": os.path.abspath(self.path)}
+            )
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.start)
+                while count > 0:
+                    chunk = await file.read(min(self.chunk_size, count))
+                    if not chunk:
+                        break
+                    count -= len(chunk)
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": count > 0,
+                        }
+                    )
+                if count > 0:
+                    # NOTE: The file was truncated while being served.
+                    await send({"type": "http.response.body", "body": b""})
+
+
+class StorageRangeResponse(FileRangeResponse):
+    """
+    A response serving (a range of) a file of a (non-local) storage - e.g. S3, see
+    `utils.storage`.
+
+    The file is streamed as it is read - i.e. a ranged read of the storage, never
+    staged whole.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        key: str,
+        size: int,
+        start: int = 0,
+        end: int | None = None,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        media_type: str | None = None,
+    ) -> None:
+        """
+        Initialize the response - see `FileRangeResponse`.
+
+        Args:
+            storage (Storage): The storage of the file.
+            key (str): The key of the file.
+        """
+        super().__init__(key, size, start, end, status_code, headers, media_type)
+        self.storage = storage
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        # NOTE: Reads block (e.g. on the network) - hence, they run in the threadpool.
+        chunks = iterate_in_threadpool(
+            self.storage.read(self.path, self.start, self.end)
+        )
+        async for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,298 @@
+"""
+This module defines the validation of uploads (i.e. multipart/form-data requests) while
+they are received - so that bad or oversized ones are rejected before the rest of their
+body is read (and spilled to disk).
+
+Each uploaded file is sniffed (see `utils.image.sniff`) and the size of images is read
+from their header - i.e. from the first few KB, without decoding them. Images whose
+header lies beyond the first SNIFF_MAX_BYTES (e.g. JPEGs with large EXIF, XMP or ICC
+segments) are not rejected - their pixels are left to be limited when decoded. Uploads
+are rejected with:
+    - 413, if a file is larger than upload_max_bytes (or an image has more pixels
+      than upload_max_pixels).
+    - 415, if a file is not an image - of a sniffed format.
+
+NOTE: Rejected requests are answered (and their connection closed) without waiting for
+the rest of their body.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from PIL import Image as PILImage
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.images.services.metrics import uploads_rejected_total
+from src.images.settings.base import Settings
+from src.images.utils.image import MAGIC_BYTES_LENGTH, header_size, sniff
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    # NOTE: python-multipart < 0.0.13 (e.g. as locked) is only importable as multipart.
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+logger = logging.getLogger(__name__)
+
+settings = Settings()
+
+# NOTE: Headers are read from growing heads of files - i.e. 1, 2, 4, ... KiB - up to
+# this size (e.g. JPEGs whose EXIF precedes the frame header).
+SNIFF_MIN_BYTES = 1024
+SNIFF_MAX_BYTES = 64 * 1024
+
+# NOTE: Room for the (multipart) framing of a single file - see UploadGuard.
+MAX_FRAMING_BYTES = 16 * 1024
+
+
+@dataclass
+class UploadRejected(Exception):
+    """
+    Exception raised when an upload is rejected while received.
+
+    Attributes:
+        status_code (int): The status code of the rejection.
+        reason (str): The reason of the rejection - i.e. bytes, pixels or format.
+        message (str): The message of the rejection.
+    """
+
+    status_code: int
+    reason: str
+    message: str
+
+
+class UploadGuard:
+    """
+    ASGI middleware validating uploads while they are received - see the module's
+    docstring.
+
+    NOTE: The request body is validated as it is read (i.e. parsed) by the application
+    - i.e. the upload is streamed through, not buffered.
+
+    Attributes:
+        paths (dict[str, bool]): The paths guarded - and whether files which are not
+            (sniffed) images are rejected. E.g. not for batches, whose files fail
+            individually.
+    """
+
+    def __init__(self, app: ASGIApp, paths: dict[str, bool]) -> None:
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        images_only = (
+            self.paths.get(scope["path"])
+            if scope["type"] == "http" and scope["method"] == "POST"
+            else None
+        )
+        if images_only is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_type, options = parse_options_header(headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in options:
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = settings.upload_max_bytes
+        content_length = headers.get("content-length", "")
+        # NOTE: Single files (i.e. images only) larger than the limit are rejected
+        # before any of their body is read.
+        if (
+            images_only
+            and max_bytes is not None
+            and content_length.isdigit()
+            and int(content_length) > max_bytes + MAX_FRAMING_BYTES
+        ):
+            await _reject(_too_many_bytes(max_bytes), scope, receive, send)
+            return
+
+        validator = UploadValidator(
+            options[b"boundary"], images_only, max_bytes, settings.upload_max_pixels
+        )
+
+        async def validating_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and validator.rejection is None:
+                validator.write(message.get("body", b""))
+            return message
+
+        async def validating_send(message: Message) -> None:
+            # NOTE: Once rejected, the application's response (e.g. to the body it
+            # failed to parse) is superseded.
+            if validator.rejection is None:
+                await send(message)
+
+        try:
+            await self.app(scope, validating_receive, validating_send)
+        except Exception:
+            if validator.rejection is None:
+                raise
+
+        if validator.rejection is not None:
+            await _reject(validator.rejection, scope, receive, send)
+
+
+class UploadValidator:
+    """
+    Incremental validator of (the files of) a multipart/form-data body.
+
+    Attributes:
+        images_only (bool): Whether files which are not (sniffed) images are rejected.
+        max_bytes (int | None): The max. size of a file.
+        max_pixels (int | None): The max. number of pixels of an image.
+        rejection (UploadRejected | None): The rejection of the body - if rejected.
+    """
+
+    def __init__(
+        self,
+        boundary: bytes,
+        images_only: bool,
+        max_bytes: int | None,
+        max_pixels: int | None,
+    ) -> None:
+        self.images_only = images_only
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.rejection: UploadRejected | None = None
+        self._parser = MultipartParser(
+            boundary,
+            callbacks={
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+        self._on_part_begin()
+
+    def write(self, data: bytes) -> None:
+        """
+        Validate the next chunk of the body.
+
+        Args:
+            data (bytes): The chunk.
+
+        Raises:
+            UploadRejected: If the body is rejected - see `rejection`.
+        """
+        try:
+            self._parser.write(data)
+        except UploadRejected as exc:
+            self.rejection = exc
+            uploads_rejected_total.inc(reason=exc.reason)
+            raise
+
+    def _on_part_begin(self) -> None:
+        self._field = bytearray()
+        self._value = bytearray()
+        self._is_file = False
+        self._size = 0
+        self._head = bytearray()
+        self._next_sniff = SNIFF_MIN_BYTES
+        self._checked = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._field.lower() == b"content-disposition":
+            _, options = parse_options_header(bytes(self._value))
+            self._is_file = b"filename" in options
+        self._field, self._value = bytearray(), bytearray()
+
+    def _on_headers_finished(self) -> None:
+        self._checked = not self._is_file
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._is_file:
+            return
+
+        self._size += end - start
+        if self.max_bytes is not None and self._size > self.max_bytes:
+            raise _too_many_bytes(self.max_bytes)
+
+        if self._checked:
+            return
+        self._head += data[start : min(end, start + SNIFF_MAX_BYTES - len(self._head))]
+        if len(self._head) >= self._next_sniff:
+            self._check(final=False)
+            self._next_sniff *= 2
+
+    def _on_part_end(self) -> None:
+        if not self._checked:
+            self._check(final=True)
+        self._on_part_begin()
+
+    def _check(self, final: bool) -> None:
+        """
+        Check the head of the current file - i.e. whether it is an image (and its size).
+
+        Args:
+            final (bool): Whether the file is complete - i.e. an incomplete header is
+                invalid (instead of read again from a longer head), unless the head
+                was truncated at SNIFF_MAX_BYTES.
+        """
+        if len(self._head) >= MAGIC_BYTES_LENGTH or final:
+            image_format = sniff(bytes(self._head))
+            if image_format is None:
+                self._checked = True
+                if self.images_only:
+                    raise UploadRejected(415, "format", "File is not an image")
+                return
+
+            try:
+                width, height = header_size(bytes(self._head), image_format)
+            except PILImage.DecompressionBombError:
+                raise _too_many_pixels(self.max_pixels)
+            except ValueError:
+                if not final:
+                    return
+                self._checked = True
+                # NOTE: The header may just lie beyond the head - i.e. the sniffed
+                # image is accepted (fail open) rather than rejected as invalid.
+                if self._size > len(self._head):
+                    logger.warning(f"Image header beyond head: {image_format}")
+                    return
+                if self.images_only:
+                    raise UploadRejected(
+                        415, "format", f"Image header is invalid: {image_format}"
+                    )
+                return
+
+            self._checked = True
+            if self.max_pixels is not None and width * height > self.max_pixels:
+                raise _too_many_pixels(self.max_pixels)
+
+
+def _too_many_bytes(max_bytes: int) -> UploadRejected:
+    return UploadRejected(413, "bytes", f"File is larger than {max_bytes} bytes")
+
+
+def _too_many_pixels(max_pixels: int | None) -> UploadRejected:
+    return UploadRejected(413, "pixels", f"Image has more than {max_pixels} pixels")
+
+
+async def _reject(
+    rejection: UploadRejected, scope: Scope, receive: Receive, send: Send
+) -> None:
+    """
+    Answer a rejected upload - closing the connection, as its body is not read.
+    """
+    logger.error(f"Failed to create image: {rejection.message}")
+    response = JSONResponse(
+        {"detail": rejection.message},
+        status_code=rejection.status_code,
+        headers={"Connection": "close"},
+    )
+    await response(scope, receive, send)
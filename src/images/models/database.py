@@ -7,6 +7,13 @@ The engine is configured with the connection string to the database.
 
 The Session class is a sessionmaker that's bound to this engine. This class is used to create new Session objects which represent database transactions.
 
+The AsyncSession class is its asyncio counterpart - bound to an engine connecting (to the
+same database) with an asyncio driver (i.e. asyncpg). It is used where blocking the event
+loop must be avoided - e.g. by the FastAPI endpoints.
+
+Both engines pool their connections as per the database_pool_* settings. Their pools also
+keep track of the time spent waiting for connections - see `pool_stats`.
+
 Example:
     To create a new Session object:
         session = Session()
@@ -14,18 +21,194 @@ Example:
     To close a Session object:
         session.close()
 
+    To create (and close) a new AsyncSession object:
+        async with AsyncSession() as session:
+            ...
+
+    To get the stats of the pool of an engine:
+        stats = pool_stats(engine)
+
 Attributes:
     engine (sqlalchemy.engine.Engine): The SQLAlchemy engine.
     Session (sqlalchemy.orm.session.sessionmaker): The SQLAlchemy sessionmaker.
+    async_engine (sqlalchemy.ext.asyncio.AsyncEngine): The SQLAlchemy asyncio engine.
+    AsyncSession (sqlalchemy.ext.asyncio.async_sessionmaker): The SQLAlchemy asyncio
+        sessionmaker.
 """
 
-from sqlalchemy import create_engine
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.engine import URL, Engine, ExceptionContext
+from sqlalchemy.exc import DataError, DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
 
 from src.images.settings.base import Settings
 
 settings = Settings()
 
-engine = create_engine(settings.database_url)
+
+def async_url(database_url: str) -> URL:
+    """
+    Build the URL of the database for its asyncio driver - i.e. asyncpg for PostgreSQL.
+
+    Args:
+        database_url (str): The URL of the database (e.g. Settings.database_url).
+
+    Returns:
+        URL: The URL - unchanged for other databases.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+
+    return url
+
+
+@dataclass
+class PoolStats:
+    """
+    The stats of a connection pool.
+
+    Attributes:
+        size (int): The number of connections kept open by the pool.
+        checked_in (int): The number of open connections available in the pool.
+        checked_out (int): The number of connections in use.
+        overflow (int): The number of connections opened beyond size - negative while
+            fewer than size connections are open.
+        waits (int): The number of connections taken from the pool.
+        wait_seconds (float): The total time spent waiting for connections.
+        max_wait_seconds (float): The longest time spent waiting for a connection.
+    """
+
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waits: int
+    wait_seconds: float
+    max_wait_seconds: float
+
+
+class _TimedPool:
+    """
+    Mixin keeping track of the time spent waiting for connections of a queue pool -
+    including the time spent opening (overflow) connections.
+
+    NOTE: Stats are reset whenever the pool is recreated - e.g. on Engine.dispose.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._wait_lock:
+                self._waits += 1
+                self._wait_seconds += elapsed
+                self._max_wait_seconds = max(self._max_wait_seconds, elapsed)
+
+
+class TimedQueuePool(_TimedPool, QueuePool):
+    """A QueuePool keeping track of the time spent waiting for connections."""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPool, AsyncAdaptedQueuePool):
+    """An AsyncAdaptedQueuePool keeping track of the time spent waiting for connections."""
+
+
+def pool_options(settings: Settings) -> dict[str, Any]:
+    """
+    Build the (create_engine) options of connection pools as per settings.
+
+    Args:
+        settings (Settings): The settings.
+
+    Returns:
+        dict[str, Any]: The options.
+    """
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+
+
+def pool_stats(engine: Engine | AsyncEngine) -> PoolStats:
+    """
+    Get the stats of the connection pool of an engine.
+
+    Args:
+        engine (Engine | AsyncEngine): The engine.
+
+    Returns:
+        PoolStats: The stats.
+    """
+    pool = engine.pool
+    timed = isinstance(pool, _TimedPool)
+    return PoolStats(
+        size=pool.size(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=pool.overflow(),
+        waits=pool._waits if timed else 0,
+        wait_seconds=pool._wait_seconds if timed else 0.0,
+        max_wait_seconds=pool._max_wait_seconds if timed else 0.0,
+    )
+
+
+engine = create_engine(
+    settings.database_url, poolclass=TimedQueuePool, **pool_options(settings)
+)
 
 Session = sessionmaker(bind=engine)
+
+async_engine = create_async_engine(
+    async_url(settings.database_url),
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **pool_options(settings),
+)
+
+
+# NOTE: Listens to every engine - e.g. including ones created by tests.
+@event.listens_for(Engine, "handle_error")
+def _translate_data_error(context: ExceptionContext) -> DataError | None:
+    """
+    Translate data exceptions (i.e. SQLSTATE class 22 - e.g. a value too long for its
+    column) raised via asyncpg to DataError - as they are (by SQLAlchemy) via psycopg2.
+
+    Args:
+        context (ExceptionContext): The context of the error.
+
+    Returns:
+        DataError | None: The translated error - if any.
+    """
+    error = context.sqlalchemy_exception
+    if (
+        isinstance(error, DBAPIError)
+        and not isinstance(error, DataError)
+        and str(getattr(error.orig, "sqlstate", "")).startswith("22")
+    ):
+        return DataError(error.statement, error.params, error.orig)
+
+    return None
+
+
+# NOTE: Attributes are not expired on commit - i.e. objects remain usable after it,
+# since (implicitly) refreshing them would require IO outside of an await.
+AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
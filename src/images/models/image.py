@@ -1,9 +1,22 @@
 from enum import Enum as PyEnum
 
-from sqlalchemy import Column, Unicode, Enum
-from sqlalchemy.orm import validates
+from sqlalchemy import (
+    DDL,
+    UUID,
+    BigInteger,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    Unicode,
+    event,
+)
+from sqlalchemy.orm import relationship, validates
 
-from src.images.models.base import Base
+from src.images.models.base import Base, DeclarativeBase
 from src.images.utils.image import sha256_checksum
 
 
@@ -31,9 +44,14 @@ class Image(Base):
         path (str): The unique path to the image file.
         checksum (str): SHA-256 checksum of the image for integrity verification.
         status (ImageStatus): The processing status of the image.
+        source_checksum (str): SHA-256 checksum of the uploaded (i.e. unprocessed) image
+            for deduplication.
+        renditions (list[Rendition]): The renditions (i.e. other widths) of the image.
     """
 
     __tablename__ = "images"
+    # NOTE: Backs keyset pagination (see ImageService.list).
+    __table_args__ = (Index("ix_images_created_id", "created", "id"),)
 
     path = Column(
         Unicode(255),
@@ -52,6 +70,21 @@ class Image(Base):
         nullable=False,
         doc="The processing status of the image.",
     )
+    source_checksum = Column(
+        Unicode(64),
+        nullable=True,
+        index=True,
+        doc="SHA-256 checksum of the uploaded image for deduplication.",
+    )
+    # NOTE: Never loaded lazily - i.e. listed via LIST_COLUMNS (see ImageService) and
+    # only added to images being created.
+    renditions = relationship(
+        "Rendition",
+        order_by="Rendition.width",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
+    )
 
     def __repr__(self):
         return f"<Image(id={self.id}, path={self.path}, checksum={self.checksum}, status={self.status})>"
@@ -61,6 +94,9 @@ class Image(Base):
         """
         Compute the checksum of the image.
 
+        The computation is skipped if the path is being reserved (see `reserve`) - i.e.
+        the image at path is yet to be written.
+
         Parameters:
             key (str): The key of the attribute.
             value (str): The value of the attribute.
@@ -68,14 +104,64 @@ class Image(Base):
         Returns:
             str: The SHA-256 checksum of the image.
         """
+        if getattr(self, "_reserving", False):
+            self._checksum = None
+            self._status = ImageStatus.IN_PROGRESS
+        else:
+            self._compute_checksum(value)
+
+        return value
+
+    def _compute_checksum(self, path):
+        """
+        Compute the checksum of the image at path and set the status accordingly.
+
+        Parameters:
+            path (str): The path to the image file.
+        """
         try:
-            self._checksum = sha256_checksum(value)
+            self._checksum = sha256_checksum(path)
         except Exception as exc:
             self._status = ImageStatus.CORRUPTED
         else:
             self._status = ImageStatus.DONE
 
-        return value
+    def reserve(self, path):
+        """
+        Reserve the path of an image that is yet to be processed.
+
+        The image remains IN_PROGRESS (and without checksum) until either `complete` or
+        `corrupt` is called.
+
+        Parameters:
+            path (str): The path the image file will be written to.
+        """
+        self._reserving = True
+        try:
+            self.path = path
+        finally:
+            self._reserving = False
+
+    def complete(self, checksum=None):
+        """
+        Complete the processing of an image - i.e. set the checksum of the image at
+        (the previously reserved) path.
+
+        Parameters:
+            checksum (str | None): The (precomputed) SHA-256 checksum of the image - if
+                not given, it is computed from the image at path.
+        """
+        if checksum is None:
+            self._compute_checksum(self.path)
+        else:
+            self._checksum = checksum
+            self._status = ImageStatus.DONE
+
+    def corrupt(self):
+        """
+        Mark the image as CORRUPTED - e.g. when its processing failed.
+        """
+        self._status = ImageStatus.CORRUPTED
 
     @property
     def checksum(self):
@@ -96,3 +182,220 @@ class Image(Base):
         raise AttributeError(
             "Image.status is a derived attribute and cannot be set directly."
         )
+
+
+class Rendition(Base):
+    """
+    Represents a rendition of an image - i.e. the image resized to another width (e.g.
+    for srcset), see `utils.image.process`.
+
+    Attributes:
+        __tablename__ (str): The name of the database table for renditions.
+        image_id (UUID): The ID of the image.
+        path (str): The unique path to the rendition file.
+        width (int): The width of the rendition.
+        height (int): The height of the rendition.
+        size (int): The size (in bytes) of the rendition file.
+        checksum (str): SHA-256 checksum of the rendition file.
+    """
+
+    __tablename__ = "renditions"
+
+    image_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("images.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        doc="The ID of the image.",
+    )
+    path = Column(
+        Unicode(255),
+        unique=True,
+        nullable=False,
+        doc="The unique path to the rendition file.",
+    )
+    width = Column(Integer, nullable=False, doc="The width of the rendition.")
+    height = Column(Integer, nullable=False, doc="The height of the rendition.")
+    size = Column(
+        BigInteger, nullable=False, doc="The size (in bytes) of the rendition file."
+    )
+    checksum = Column(
+        Unicode(64), nullable=False, doc="SHA-256 checksum of the rendition file."
+    )
+
+    def __repr__(self):
+        return f"<Rendition(image_id={self.image_id}, path={self.path}, width={self.width})>"
+
+
+class ImageCount(DeclarativeBase):
+    """
+    Represents the number of images with a given status.
+
+    Rows are maintained by triggers on images (see COUNT_IMAGES_TRIGGERS) so that
+    counting images does not require scanning the images table.
+
+    Attributes:
+        __tablename__ (str): The name of the database table for image counts.
+        status (ImageStatus): The status of the images counted.
+        total (int): The number of images with the status.
+    """
+
+    __tablename__ = "image_counts"
+
+    status = Column(
+        Enum(ImageStatus),
+        primary_key=True,
+        doc="The status of the images counted.",
+    )
+    total = Column(
+        BigInteger,
+        default=0,
+        nullable=False,
+        doc="The number of images with the status.",
+    )
+
+    def __repr__(self):
+        return f"<ImageCount(status={self.status}, total={self.total})>"
+
+
+# NOTE: Statement-level triggers (with transition tables) are used so that bulk
+# statements (e.g. multi-row INSERT, COPY) update each count once - instead of once per
+# row. Rows are upserted in status order to avoid deadlocks between transactions.
+COUNT_IMAGES_FUNCTION = DDL(
+    """
+    CREATE OR REPLACE FUNCTION count_images() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            DELETE FROM image_counts;
+        ELSIF TG_OP = 'INSERT' THEN
+            INSERT INTO image_counts (status, total)
+            SELECT _status, count(*) FROM new_images GROUP BY _status ORDER BY _status
+            ON CONFLICT (status) DO UPDATE SET total = image_counts.total + EXCLUDED.total;
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO image_counts (status, total)
+            SELECT _status, -count(*) FROM old_images GROUP BY _status ORDER BY _status
+            ON CONFLICT (status) DO UPDATE SET total = image_counts.total + EXCLUDED.total;
+        ELSIF TG_OP = 'UPDATE' THEN
+            INSERT INTO image_counts (status, total)
+            SELECT status, sum(delta) FROM (
+                SELECT _status AS status, -1 AS delta FROM old_images
+                UNION ALL
+                SELECT _status AS status, 1 AS delta FROM new_images
+            ) AS deltas
+            GROUP BY status HAVING sum(delta) <> 0 ORDER BY status
+            ON CONFLICT (status) DO UPDATE SET total = image_counts.total + EXCLUDED.total;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+)
+
+COUNT_IMAGES_TRIGGERS = [
+    DDL(
+        "CREATE TRIGGER count_inserted_images AFTER INSERT ON images "
+        "REFERENCING NEW TABLE AS new_images "
+        "FOR EACH STATEMENT EXECUTE FUNCTION count_images()"
+    ),
+    DDL(
+        "CREATE TRIGGER count_deleted_images AFTER DELETE ON images "
+        "REFERENCING OLD TABLE AS old_images "
+        "FOR EACH STATEMENT EXECUTE FUNCTION count_images()"
+    ),
+    DDL(
+        "CREATE TRIGGER count_updated_images AFTER UPDATE ON images "
+        "REFERENCING OLD TABLE AS old_images NEW TABLE AS new_images "
+        "FOR EACH STATEMENT EXECUTE FUNCTION count_images()"
+    ),
+    DDL(
+        "CREATE TRIGGER count_truncated_images AFTER TRUNCATE ON images "
+        "FOR EACH STATEMENT EXECUTE FUNCTION count_images()"
+    ),
+]
+
+for ddl in [COUNT_IMAGES_FUNCTION, *COUNT_IMAGES_TRIGGERS]:
+    event.listen(Image.__table__, "after_create", ddl.execute_if(dialect="postgresql"))
+
+
+class ImageVersion(DeclarativeBase):
+    """
+    Represents the version of the listed images - i.e. a change marker of the images
+    (and renditions) tables, e.g. to validate cached lists (see ETag).
+
+    The version is striped across (up to) IMAGE_VERSION_STRIPES rows, each bumped by
+    triggers on images and renditions (see VERSION_IMAGES_TRIGGERS) - i.e. within the
+    transaction changing them, so a version is never visible before the changes it
+    marks. The version is the sum of the rows (and modified, the latest of them).
+
+    Attributes:
+        __tablename__ (str): The name of the database table for image versions.
+        id (int): The stripe of the row.
+        version (int): The number of statements of the stripe that changed images or
+            renditions.
+        modified (datetime): The timestamp of the last change of the stripe.
+    """
+
+    __tablename__ = "image_versions"
+
+    id = Column(SmallInteger, primary_key=True, doc="The stripe of the row.")
+    version = Column(
+        BigInteger,
+        default=0,
+        nullable=False,
+        doc="The number of statements of the stripe that changed images or renditions.",
+    )
+    modified = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        doc="The timestamp of the last change of the stripe.",
+    )
+
+    def __repr__(self):
+        return f"<ImageVersion(version={self.version}, modified={self.modified})>"
+
+
+IMAGE_VERSION_STRIPES = 16
+
+# NOTE: As with image counts, statement-level triggers bump the version once per
+# statement - the row of the stripe of the session (i.e. of its backend), so
+# transactions changing images only queue on each other's row when their sessions
+# share a stripe, rather than all on a single row. Transactions changing images must
+# still be kept short (e.g. no file IO while they are open, see commands.shard).
+# modified is the time of the statement (i.e. clock_timestamp) - across stripes, a
+# transaction may commit after another modified later, i.e. modified is not a
+# validator (the version is).
+VERSION_IMAGES_FUNCTION = DDL(
+    f"""
+    CREATE OR REPLACE FUNCTION version_images() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO image_versions (id, version, modified)
+        VALUES (mod(pg_backend_pid(), {IMAGE_VERSION_STRIPES}), 1, clock_timestamp())
+        ON CONFLICT (id) DO UPDATE
+        SET version = image_versions.version + 1,
+            modified = GREATEST(image_versions.modified, EXCLUDED.modified);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+)
+
+VERSION_IMAGES_TRIGGERS = {
+    table: DDL(
+        f"CREATE TRIGGER version_{table} "
+        f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+        "FOR EACH STATEMENT EXECUTE FUNCTION version_images()"
+    )
+    for table in ("images", "renditions")
+}
+
+event.listen(
+    Image.__table__,
+    "after_create",
+    VERSION_IMAGES_FUNCTION.execute_if(dialect="postgresql"),
+)
+for table in (Image.__table__, Rendition.__table__):
+    event.listen(
+        table,
+        "after_create",
+        VERSION_IMAGES_TRIGGERS[table.name].execute_if(dialect="postgresql"),
+    )
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from src.images.models.database import Session
 
@@ -8,9 +8,13 @@ from src.images.models.database import Session
 class BaseService(ABC):
     """
     Abstract base class for service classes.
+
+    Attributes:
+        session (Session): The session of the service - a new one by default, i.e.
+            services never share sessions unless explicitly given the same one.
     """
 
-    session: Session = Session()
+    session: Session = field(default_factory=Session)
 
     @abstractmethod
     def create(self):
@@ -19,13 +23,6 @@ class BaseService(ABC):
         """
         pass
 
-    @abstractmethod
-    def update(self):
-        """
-        Abstract method for updating an entity.
-        """
-        pass
-
     @abstractmethod
     def get(self):
         """
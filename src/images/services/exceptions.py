@@ -19,6 +19,18 @@ class ServerError(BaseError):
     pass
 
 
+@dataclass
+class OverloadedError(ServerError):
+    """
+    Exception raised when the server is (temporarily) unable to accept more work.
+
+    Attributes:
+        retry_after (int): The number of seconds after which to retry.
+    """
+
+    retry_after: int = 1
+
+
 @dataclass
 class ClientError(BaseError):
     """
@@ -35,3 +47,12 @@ class ConflictError(ClientError):
     """
 
     pass
+
+
+@dataclass
+class NotFoundError(ClientError):
+    """
+    Exception raised when an entity is not found.
+    """
+
+    pass
@@ -1,21 +1,88 @@
+import asyncio
+import logging
+import mimetypes
 import os.path
+import threading
 import uuid
-from dataclasses import dataclass
+from concurrent.futures import Future
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from dataclasses import asdict, dataclass
+from enum import Enum as PyEnum
+from functools import partial
 from typing import Any
 
 from PIL import Image as PILImage
+from sqlalchemy import (
+    JSON,
+    Row,
+    Select,
+    delete,
+    func,
+    literal_column,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.exc import (
     DataError,
     IntegrityError,
     InvalidRequestError,
     OperationalError,
+    SQLAlchemyError,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.query import Query
 
-from src.images.models.image import Image, ImageStatus
+from src.images.models.database import Session
+from src.images.models.image import (
+    Image,
+    ImageCount,
+    ImageStatus,
+    ImageVersion,
+    Rendition,
+)
 from src.images.services.base import BaseService
-from src.images.services.exceptions import ClientError, ConflictError, ServerError
-from src.images.utils.image import resize
+from src.images.services.exceptions import (
+    ClientError,
+    ConflictError,
+    NotFoundError,
+    ServerError,
+)
+from src.images.services.metrics import (
+    created_total,
+    deduplicated_total,
+    record_processed,
+    stage_seconds,
+)
+from src.images.services.workers import Admission, complete, jobs
+from src.images.settings.base import Settings
+from src.images.utils.bloom import BloomFilter
+from src.images.utils.cache import DiskCache, MemoryCache, SingleFlight, TTLCache
+from src.images.utils.image import (
+    FORMATS,
+    EncodingOptions,
+    RenditionFile,
+    encode,
+    encoding_options,
+    process,
+    process_timed,
+    resize,
+    supported_formats,
+)
+from src.images.utils.layout import (
+    alternate_path,
+    alternate_paths,
+    rendition_paths,
+    sharded_path,
+)
+from src.images.utils.pagination import decode_cursor
+from src.images.utils.storage import Storage, get_storage
+
+
+logger = logging.getLogger(__name__)
+
+settings = Settings()
 
 
 @dataclass
@@ -24,17 +91,55 @@ class TmpImage:
     A temporary image entity.
 
     Temporary as in (1) the image is not yet persisted to the database (and, hence, has not
-    been processed) and (2) is persisted in temporary storage.
+    been processed) and (2) is persisted in temporary storage - i.e. a temporary file
+    or, if small enough, memory.
 
     Attributes:
-        filename (str): The name of the temporary image file.
+        path (str): The path to the temporary image file - or, if its content is in
+            memory, only its name.
         headers (dict[Any, Any]): The headers associated with the image. TODO: Add correct type hints.
         content_type (str): The content type of the image.
+        checksum (str | None): The SHA-256 checksum of the image - if known, images
+            previously created from the same upload are reused (see
+            ImageService.create).
+        content (bytes | None): The content of the image - if in memory (i.e. decoded
+            from it, instead of from the file).
+        delete (bool): Whether the file is deleted once the image is processed (or
+            fails to be) - i.e. whether it is owned by ImageService.
     """
 
     path: str
     headers: dict[Any, Any]  # TODO: Add correct type hints.
     content_type: str
+    checksum: str | None = None
+    content: bytes | None = None
+    delete: bool = False
+
+    @property
+    def source(self) -> str | bytes:
+        """
+        The image as processed - i.e. its content, if in memory, or its path.
+        """
+        return self.path if self.content is None else self.content
+
+    @property
+    def size(self) -> int:
+        """
+        The size (in bytes) of the image.
+        """
+        return os.path.getsize(self.path) if self.content is None else len(self.content)
+
+    def discard(self) -> None:
+        """
+        Delete the temporary file - if owned (see delete) and not yet deleted.
+        """
+        if not self.delete or self.content is not None:
+            return
+
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
 
 
 # NOTE: There should be a more appropriate module for this class.
@@ -53,18 +158,188 @@ class QueryPlus:
     total: int
 
 
+@dataclass
+class ResultPlus:
+    """
+    A list of results with additional metadata - i.e. the asyncio counterpart of
+    QueryPlus, since queries cannot be (lazily) executed outside of an await.
+
+    Attributes:
+        results (list[Image] | list[Row]): The results - images or (see
+            ImageService.alist_rows) rows of their listed columns.
+        total (int): The total number of items in the table queried - i.e. not
+            necessarily in the results themselves.
+    """
+
+    results: list[Image] | list[Row]
+    total: int
+
+
+# NOTE: The renditions of an image - aggregated (i.e. as a JSON array, ordered by
+# width) by a correlated subquery, so that listing remains a single statement.
+RENDITIONS_COLUMN = (
+    select(
+        func.coalesce(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_object(
+                        "path",
+                        Rendition.path,
+                        "width",
+                        Rendition.width,
+                        "height",
+                        Rendition.height,
+                        "size",
+                        Rendition.size,
+                        "checksum",
+                        Rendition.checksum,
+                    ),
+                    Rendition.width,
+                )
+            ),
+            literal_column("'[]'::json"),
+            type_=JSON,
+        )
+    )
+    .where(Rendition.image_id == Image.id)
+    .correlate(Image)
+    .scalar_subquery()
+    .label("renditions")
+)
+
+# NOTE: The columns of images that are listed - labeled as the (public) attributes.
+LIST_COLUMNS = (
+    Image.id,
+    Image.path,
+    Image._status.label("status"),
+    Image._checksum.label("checksum"),
+    Image.created,
+    Image.updated,
+    RENDITIONS_COLUMN,
+)
+
+
+class VariantFormat(PyEnum):
+    """
+    Enumeration class representing the formats variants of an image can be encoded in.
+    """
+
+    JPEG = "jpeg"
+    PNG = "png"
+    WEBP = "webp"
+
+
+@dataclass
+class Variant:
+    """
+    A (resized) variant of an image.
+
+    Once loaded (see ImageService.load_variant), variants are either cached in memory -
+    i.e. content is set - or on disk - i.e. path is set.
+
+    Attributes:
+        key (str): The cache key of the variant.
+        etag (str): The (strong) ETag of the variant.
+        media_type (str): The media type of the variant.
+        width (int | None): The width of the variant - None for the image's width.
+        variant_format (VariantFormat): The format of the variant.
+        content (bytes | None): The encoded variant.
+        path (str | None): The path to the encoded variant.
+    """
+
+    key: str
+    etag: str
+    media_type: str
+    width: int | None
+    variant_format: VariantFormat
+    content: bytes | None = None
+    path: str | None = None
+
+
+@dataclass
+class Encoding:
+    """
+    A (stored) encoding of an image - i.e. its file or an alternate one, see
+    ImageService.get_encodings.
+
+    Attributes:
+        media_type (str): The media type of the encoding.
+        path (str): The path (i.e. key in storage) of the encoding.
+        etag (str): The (strong) ETag of the encoding.
+    """
+
+    media_type: str
+    path: str
+    etag: str
+
+
+_memory_variants = MemoryCache(
+    max_bytes=settings.variants_memory_max_bytes,
+    max_item_bytes=settings.variants_memory_max_item_bytes,
+)
+_disk_variants = DiskCache(
+    directory=settings.variants_path, max_bytes=settings.variants_max_bytes
+)
+_variant_flights = SingleFlight()
+
+# NOTE: Rows (see LIST_COLUMNS) of images by ID - see ImageService.aget_row.
+_images: TTLCache[Row] = TTLCache(
+    max_items=settings.image_cache_max_items, ttl=settings.image_cache_ttl
+)
+
+# NOTE: Formats Pillow cannot encode (e.g. AVIF, without libavif) are disregarded - i.e.
+# images are saved in the format of the upload instead.
+_output_formats = supported_formats(
+    [settings.output_format] if settings.output_format is not None else []
+)
+
+
 @dataclass
 class ImageService(BaseService):
-    """A service for managing images."""
+    """
+    A service for managing images.
+
+    Methods prefixed with `a` (e.g. `acreate`) are the asyncio counterparts of the
+    homonymous ones - i.e. they use async_session and never block the event loop.
+
+    Processed images are written to (and read from) storage - i.e. Image.path is the
+    key of the file, see `utils.storage`.
+
+    Images are also saved in each of rendition_widths (but image_width) - i.e. their
+    renditions (see `models.image.Rendition`), resized from a single decode.
+
+    Processed images (i.e. DONE or CORRUPTED) are cached in memory by ID - see
+    `aget_row`. Their cached rows are invalidated when the image is deleted (see
+    `delete`) by this process and expire otherwise (see image_cache_ttl) - e.g. once
+    other processes mark them CORRUPTED (see `commands.scrub`) or rewrite their paths
+    (see `commands.shard`, whose grace period outlasts them).
+    """
 
     # TODO: make each come from a config file - while maintaining default values.
     base_path: str = "data/images"
     image_width: int = 1500
+    asynchronous: bool = settings.asynchronous_processing
+    fast_resize: bool = settings.fast_resize
+    async_session: AsyncSession | None = None
+    storage: Storage = get_storage(settings)
+    output_format: str | None = _output_formats[0] if _output_formats else None
+    alternate_formats: tuple[str, ...] = tuple(
+        supported_formats(settings.output_alternate_formats)
+    )
+    encoding: EncodingOptions = encoding_options(settings)
+    rendition_widths: tuple[int, ...] = tuple(settings.rendition_widths)
+    max_threads: int = settings.rendition_max_threads
 
     def create(self, uploaded_image: TmpImage) -> Image:
         """
         Create a new image.
 
+        If the service is asynchronous, the image is persisted as IN_PROGRESS and
+        processed in a process pool - see `_dispatch`.
+
+        If the uploaded image's checksum is known and an image was already created from
+        an identical upload, that image is returned instead - see `_find_duplicate`.
+
         Parameters:
             uploaded_image (TmpImage): The uploaded image object.
 
@@ -75,60 +350,895 @@ class ImageService(BaseService):
             ClientError: If there is a data error or an invalid password is provided.
             ConflictError: If there is a conflict error.
             ServerError: If there is an invalid request or operational error.
+            OverloadedError: If too many images are being processed - only if the
+                service is asynchronous.
         """
+        # NOTE: The temporary file is deleted once processed - i.e. by the process
+        # pool, if dispatched to it.
+        dispatched = False
         try:
-            # NOTE: Explicitly setting id - instead of relying on the default value -
-            # to ensure that the id is set before the image is processed (since it is
-            # used as the prefix for the file name (see self._process)).
-            image = Image(id=uuid.uuid4())
-            # TODO: process asynchronously.
-            image = self._process(image, uploaded_image)
-            self.session.add(image)
-            self.session.flush()
-            self.session.commit()
-        except DataError as exc:
-            self.session.rollback()
-            raise ClientError(message=str(exc))
-        except IntegrityError as exc:
-            self.session.rollback()
-            raise ConflictError(message=str(exc))
-        except (InvalidRequestError, OperationalError) as exc:
-            self.session.rollback()
-            raise ServerError(message=str(exc))
+            # NOTE: Only images processed in the process pool are admitted to its
+            # queue - i.e. synchronous ones are never rejected as overloaded.
+            with (
+                jobs.admit([uploaded_image.size])
+                if self.asynchronous
+                else nullcontext()
+            ) as admission:
+                try:
+                    if uploaded_image.checksum is not None:
+                        duplicate = self._find_duplicate(uploaded_image.checksum)
+                        if duplicate is not None:
+                            deduplicated_total.inc()
+                            return duplicate
+                    # NOTE: Explicitly setting id - instead of relying on the
+                    # default value - to ensure that the id is set before the image is
+                    # processed (since it is used as the prefix for the file name (see
+                    # self._output_path)).
+                    image = Image(
+                        id=uuid.uuid4(), source_checksum=uploaded_image.checksum
+                    )
+                    if self.asynchronous:
+                        image.reserve(self._output_path(image, uploaded_image))
+                    else:
+                        image = self._process(image, uploaded_image)
+                    self.session.add(image)
+                    with stage_seconds.time(stage="commit"):
+                        self.session.flush()
+                        # NOTE: Read before commit - i.e. before attributes are
+                        # expired.
+                        image_id, image_path, image_status = (
+                            image.id,
+                            image.path,
+                            image.status,
+                        )
+                        self.session.commit()
+                except DataError as exc:
+                    self.session.rollback()
+                    raise ClientError(message=str(exc))
+                except IntegrityError as exc:
+                    self.session.rollback()
+                    raise ConflictError(message=str(exc))
+                except (InvalidRequestError, OperationalError) as exc:
+                    self.session.rollback()
+                    raise ServerError(message=str(exc))
+
+                if uploaded_image.checksum is not None:
+                    _add_source_checksum(uploaded_image.checksum)
+                created_total.inc(status=image_status.value)
+                if self.asynchronous:
+                    self._dispatch(admission, image_id, uploaded_image, image_path)
+                    dispatched = True
+        finally:
+            if not dispatched:
+                uploaded_image.discard()
+
+        return image
+
+    async def acreate(self, uploaded_image: TmpImage) -> Image:
+        """
+        Create a new image - see `create`.
+
+        The image is processed in the process pool - the request waits for it if the
+        service is not asynchronous.
+
+        Parameters:
+            uploaded_image (TmpImage): The uploaded image object.
+
+        Returns:
+            Image: The newly created image.
+
+        Raises:
+            ClientError: If there is a data error or an invalid password is provided.
+            ConflictError: If there is a conflict error.
+            ServerError: If there is an invalid request or operational error.
+            OverloadedError: If too many images are being processed.
+        """
+        session = self.async_session
+        # NOTE: See create as for when the temporary file is deleted.
+        dispatched = False
+        try:
+            # NOTE: Duplicates are admitted, too - i.e. the queue is checked before
+            # them.
+            with jobs.admit([uploaded_image.size]) as admission:
+                try:
+                    if uploaded_image.checksum is not None:
+                        duplicate = await self._afind_duplicate(uploaded_image.checksum)
+                        if duplicate is not None:
+                            deduplicated_total.inc()
+                            return duplicate
+                    # NOTE: See create as for why id is explicitly set.
+                    image = Image(
+                        id=uuid.uuid4(), source_checksum=uploaded_image.checksum
+                    )
+                    if self.asynchronous:
+                        image.reserve(self._output_path(image, uploaded_image))
+                    else:
+                        image = await self._aprocess(admission, image, uploaded_image)
+                    session.add(image)
+                    with stage_seconds.time(stage="commit"):
+                        await session.flush()
+                        image_id, image_path = image.id, image.path
+                        await session.commit()
+                except DataError as exc:
+                    await session.rollback()
+                    raise ClientError(message=str(exc))
+                except IntegrityError as exc:
+                    await session.rollback()
+                    raise ConflictError(message=str(exc))
+                except (InvalidRequestError, OperationalError) as exc:
+                    await session.rollback()
+                    raise ServerError(message=str(exc))
+
+                if uploaded_image.checksum is not None:
+                    _add_source_checksum(uploaded_image.checksum)
+                created_total.inc(status=image.status.value)
+                if self.asynchronous:
+                    self._dispatch(admission, image_id, uploaded_image, image_path)
+                    dispatched = True
+        finally:
+            if not dispatched:
+                uploaded_image.discard()
+
+        return image
+
+    async def acreate_many(
+        self, uploaded_images: list[TmpImage]
+    ) -> list[Image | ClientError]:
+        """
+        Create new images - i.e. a batch of them.
+
+        Images are processed in parallel (in the process pool) and inserted in a single
+        (bulk) transaction. Failures are isolated - i.e. an image which fails to be
+        processed is created CORRUPTED and one which fails to be inserted is reported as
+        an error, while the rest of the batch is still created.
+
+        Identical uploads are deduplicated (see `create`) - within the batch, too.
+
+        Parameters:
+            uploaded_images (list[TmpImage]): The uploaded image objects.
+
+        Returns:
+            list[Image | ClientError]: The newly created image (or the reason it was not
+                created) for each uploaded image - in order.
+
+        Raises:
+            ServerError: If there is an invalid request or operational error - i.e. no
+                image is created.
+            OverloadedError: If too many images are being processed - i.e. no image
+                is created.
+        """
+        session = self.async_session
+        results: list[Image | ClientError | None] = [None] * len(uploaded_images)
+        # NOTE: Maps the index of an upload to that of an identical one in the batch.
+        aliases: dict[int, int] = {}
+        pending: list[tuple[int, Image, TmpImage]] = []
+        # NOTE: See create as for when the temporary files are deleted.
+        dispatched: set[int] = set()
+        try:
+            try:
+                indexes: dict[str, int] = {}
+                for index, uploaded_image in enumerate(uploaded_images):
+                    checksum = uploaded_image.checksum
+                    if checksum is not None:
+                        if checksum in indexes:
+                            aliases[index] = indexes[checksum]
+                            continue
+                        duplicate = await self._afind_duplicate(checksum)
+                        if duplicate is not None:
+                            deduplicated_total.inc()
+                            results[index] = duplicate
+                            continue
+                        indexes[checksum] = index
+                    image = Image(id=uuid.uuid4(), source_checksum=checksum)
+                    image.reserve(self._output_path(image, uploaded_image))
+                    pending.append((index, image, uploaded_image))
+            except (InvalidRequestError, OperationalError) as exc:
+                await session.rollback()
+                raise ServerError(message=str(exc))
+
+            sizes = [uploaded_image.size for _, _, uploaded_image in pending]
+            with jobs.admit(sizes) as admission:
+                try:
+                    if not self.asynchronous:
+                        await self._process_many(admission, pending)
+
+                    session.add_all([image for _, image, _ in pending])
+                    with stage_seconds.time(stage="commit"):
+                        try:
+                            await session.flush()
+                        except (DataError, IntegrityError):
+                            await session.rollback()
+                            # NOTE: Pinpoints the images failing to be inserted -
+                            # each is inserted in its own savepoint (of the same
+                            # transaction).
+                            for index, image, _ in pending:
+                                try:
+                                    async with session.begin_nested():
+                                        session.add(image)
+                                except DataError as exc:
+                                    results[index] = ClientError(message=str(exc))
+                                except IntegrityError as exc:
+                                    results[index] = ConflictError(message=str(exc))
+                        await session.commit()
+                except (InvalidRequestError, OperationalError) as exc:
+                    await session.rollback()
+                    raise ServerError(message=str(exc))
+
+                # NOTE: The files of images failing to be inserted are deleted (as in
+                # adelete) - i.e. only once their rows are known not to be committed.
+                for index, image, _ in pending:
+                    if results[index] is not None and not self.asynchronous:
+                        await asyncio.to_thread(
+                            self._delete_files, image.id, self._output_paths(image.path)
+                        )
+
+                for index, image, uploaded_image in pending:
+                    if results[index] is not None:
+                        continue
+                    results[index] = image
+                    created_total.inc(status=image.status.value)
+                    if uploaded_image.checksum is not None:
+                        _add_source_checksum(uploaded_image.checksum)
+                    if self.asynchronous:
+                        self._dispatch(admission, image.id, uploaded_image, image.path)
+                        dispatched.add(index)
+        finally:
+            for index, uploaded_image in enumerate(uploaded_images):
+                if index not in dispatched:
+                    uploaded_image.discard()
+
+        for index, alias in aliases.items():
+            results[index] = results[alias]
+
+        return results
+
+    async def _process_many(
+        self, admission: Admission, pending: list[tuple[int, Image, TmpImage]]
+    ) -> None:
+        """
+        Process (reserved) images in parallel - in the process pool.
+
+        Images failing to be processed are marked as CORRUPTED (see `_corrupt`).
+
+        Args:
+            admission (Admission): The admission of the images to the process pool.
+            pending (list[tuple[int, Image, TmpImage]]): The (index,) image and
+                temporary image objects.
+        """
+        outcomes = await asyncio.gather(
+            *(
+                asyncio.wrap_future(
+                    admission.submit(
+                        process_timed,
+                        uploaded_image.source,
+                        image.path,
+                        self.image_width,
+                        fast=self.fast_resize,
+                        storage=self.storage,
+                        options=self.encoding,
+                        alternate_paths=self._alternate_paths(image.path),
+                        renditions=self._renditions(image.path),
+                        max_threads=self.max_threads,
+                    )
+                )
+                for _, image, uploaded_image in pending
+            ),
+            return_exceptions=True,
+        )
+        for (_, image, _), outcome in zip(pending, outcomes):
+            if isinstance(outcome, BaseException):
+                await asyncio.to_thread(self._corrupt, image, outcome)
+            else:
+                checksum, timings, rendered, size = outcome
+                image.complete(checksum)
+                image.renditions = _renditions(rendered)
+                record_processed(image.status, size, timings)
+
+    def get(self, image_id: uuid.UUID) -> Image:
+        """
+        Get an image by ID.
+
+        Parameters:
+            image_id (UUID): The ID of the image.
+
+        Returns:
+            Image: The image.
+
+        Raises:
+            NotFoundError: If there is no image with the given ID.
+        """
+        # NOTE: Always hitting the database - the image may have been processed (see
+        # _complete) since it was loaded into the session.
+        image = self.session.get(Image, image_id, populate_existing=True)
+        if image is None:
+            raise NotFoundError(message=f"Image not found: {image_id}")
+
+        return image
+
+    async def aget(self, image_id: uuid.UUID) -> Image:
+        """
+        Get an image by ID - see `get`.
+
+        Parameters:
+            image_id (UUID): The ID of the image.
+
+        Returns:
+            Image: The image.
+
+        Raises:
+            NotFoundError: If there is no image with the given ID.
+        """
+        image = await self.async_session.get(Image, image_id, populate_existing=True)
+        if image is None:
+            raise NotFoundError(message=f"Image not found: {image_id}")
 
         return image
 
-    def update(self):
-        """Update an existing image."""
-        raise NotImplementedError()
+    async def aget_row(self, image_id: uuid.UUID) -> Row:
+        """
+        Get an image by ID as a row (see LIST_COLUMNS) - served from memory, if cached.
+
+        Processed images are cached (see image_cache_max_items) - i.e. repeated gets
+        of them skip the database. Images being processed are not, since they are
+        about to change (see `_complete`).
+
+        Parameters:
+            image_id (UUID): The ID of the image.
+
+        Returns:
+            Row: The row of the image - shared, i.e. never to be mutated.
+
+        Raises:
+            NotFoundError: If there is no image with the given ID.
+        """
+        row = _images.get(image_id)
+        if row is not None:
+            return row
+
+        row = (
+            await self.async_session.execute(
+                select(*LIST_COLUMNS).where(Image.id == image_id)
+            )
+        ).first()
+        if row is None:
+            raise NotFoundError(message=f"Image not found: {image_id}")
+
+        if row.status != ImageStatus.IN_PROGRESS:
+            _images.put(image_id, row)
+
+        return row
+
+    def get_encodings(self, image: Image) -> list[Encoding]:
+        """
+        Get the (stored) encodings of an image - i.e. its alternate encodings (in the
+        order of alternate_formats) and then its file.
+
+        NOTE: Alternate encodings are those currently configured - i.e. their files may
+        not exist (e.g. for images processed before).
+
+        Parameters:
+            image (Image): The (processed) image.
+
+        Returns:
+            list[Encoding]: The encodings.
+        """
+        encodings = []
+        for alternate_format in self.alternate_formats:
+            path = alternate_path(image.path, FORMATS[alternate_format][1])
+            if path != image.path:
+                encodings.append(
+                    Encoding(
+                        media_type=f"image/{alternate_format}",
+                        path=path,
+                        etag=f'"{image.checksum}.{alternate_format}"',
+                    )
+                )
+        encodings.append(
+            Encoding(
+                media_type=mimetypes.guess_type(image.path)[0],
+                path=image.path,
+                etag=f'"{image.checksum}"',
+            )
+        )
+
+        return encodings
 
-    def get(self):
-        """Get an image by ID."""
-        raise NotImplementedError()
+    def list(
+        self,
+        offset: int | None = None,
+        limit: int | None = None,
+        after: str | None = None,
+        exact: bool = False,
+    ) -> QueryPlus:
+        """List all images - ordered by creation time (and ID, as a tie-breaker).
 
-    def list(self, offset: int | None = None, limit: int | None = None) -> QueryPlus:
-        """List all images.
+        Parameters:
+            offset (int | None): The number of images to skip.
+            limit (int | None): The max. number of images to list.
+            after (str | None): A cursor (see `utils.pagination.encode_cursor`) - only
+                images positioned after it are listed. Unlike offset, the cost of
+                listing does not grow with the position in the list.
+            exact (bool): Whether the total is counted from the images table - see
+                `count`.
 
         Returns:
             Query: A query object representing the list of images.
+
+        Raises:
+            ClientError: If there is a data error or the cursor is malformed.
         """
         try:
-            query = self.session.query(Image).order_by(Image.created.asc())
+            query = self.session.query(Image).order_by(
+                Image.created.asc(), Image.id.asc()
+            )
+            if after is not None:
+                query = query.filter(
+                    tuple_(Image.created, Image.id) > decode_cursor(after)
+                )
             return QueryPlus(
-                query=query.offset(offset).limit(limit), total=query.count()
+                query=query.offset(offset).limit(limit), total=self.count(exact=exact)
             )
         except (DataError, ValueError) as exc:
             self.session.rollback()
             raise ClientError(message=str(exc))
 
-    def delete(self):
-        """Delete an image."""
-        raise NotImplementedError()
+    def count(self, status: ImageStatus | None = None, exact: bool = False) -> int:
+        """Count images.
+
+        By default, images are counted from the counts maintained by triggers on the
+        images table (see `models.image.ImageCount`) - i.e. at constant cost.
+
+        Parameters:
+            status (ImageStatus | None): Only count images with the status.
+            exact (bool): Whether images are counted from the images table itself (i.e.
+                with COUNT) - e.g. if maintained counts are suspected to have drifted.
+
+        Returns:
+            int: The number of images.
+        """
+        if exact:
+            query = self.session.query(func.count(Image.id))
+            if status is not None:
+                query = query.filter(Image._status == status)
+        else:
+            query = self.session.query(func.coalesce(func.sum(ImageCount.total), 0))
+            if status is not None:
+                query = query.filter(ImageCount.status == status)
+
+        return int(query.scalar())
+
+    async def alist(
+        self,
+        offset: int | None = None,
+        limit: int | None = None,
+        after: str | None = None,
+        exact: bool = False,
+    ) -> ResultPlus:
+        """List all images - see `list`.
+
+        Parameters:
+            offset (int | None): The number of images to skip.
+            limit (int | None): The max. number of images to list.
+            after (str | None): A cursor (see `utils.pagination.encode_cursor`) - only
+                images positioned after it are listed.
+            exact (bool): Whether the total is counted from the images table - see
+                `count`.
+
+        Returns:
+            ResultPlus: The list of images.
+
+        Raises:
+            ClientError: If there is a data error or the cursor is malformed.
+        """
+        try:
+            images = await self.async_session.scalars(
+                _list_statement(select(Image), offset, limit, after)
+            )
+            return ResultPlus(
+                results=list(images), total=await self.acount(exact=exact)
+            )
+        except (DataError, ValueError) as exc:
+            await self.async_session.rollback()
+            raise ClientError(message=str(exc))
+
+    async def alist_rows(
+        self,
+        offset: int | None = None,
+        limit: int | None = None,
+        after: str | None = None,
+        exact: bool = False,
+    ) -> ResultPlus:
+        """List all images as rows (see LIST_COLUMNS) - see `alist`.
+
+        Rows are plain tuples - i.e. they skip hydrating (and tracking) Image objects,
+        which dominates the cost of listing large pages.
+
+        Parameters:
+            offset (int | None): The number of images to skip.
+            limit (int | None): The max. number of images to list.
+            after (str | None): A cursor (see `utils.pagination.encode_cursor`) - only
+                images positioned after it are listed.
+            exact (bool): Whether the total is counted from the images table - see
+                `count`.
+
+        Returns:
+            ResultPlus: The list of rows.
+
+        Raises:
+            ClientError: If there is a data error or the cursor is malformed.
+        """
+        try:
+            rows = await self.async_session.execute(
+                _list_statement(select(*LIST_COLUMNS), offset, limit, after)
+            )
+            return ResultPlus(results=list(rows), total=await self.acount(exact=exact))
+        except (DataError, ValueError) as exc:
+            await self.async_session.rollback()
+            raise ClientError(message=str(exc))
+
+    async def acount(
+        self, status: ImageStatus | None = None, exact: bool = False
+    ) -> int:
+        """Count images - see `count`.
+
+        Parameters:
+            status (ImageStatus | None): Only count images with the status.
+            exact (bool): Whether images are counted from the images table itself.
+
+        Returns:
+            int: The number of images.
+        """
+        if exact:
+            statement = select(func.count(Image.id))
+            if status is not None:
+                statement = statement.where(Image._status == status)
+        else:
+            statement = select(func.coalesce(func.sum(ImageCount.total), 0))
+            if status is not None:
+                statement = statement.where(ImageCount.status == status)
+
+        return int(await self.async_session.scalar(statement))
+
+    async def aversion(self) -> tuple[int, datetime | None]:
+        """Get the version of the listed images - i.e. a marker changing whenever images
+        (or their renditions) do, see `models.image.ImageVersion`.
+
+        Reading it costs summing its stripes (at most IMAGE_VERSION_STRIPES rows) -
+        i.e. unlike listing (and counting) images.
+
+        Returns:
+            tuple[int, datetime | None]: The version and the timestamp of the last
+                change - if any.
+        """
+        row = (
+            await self.async_session.execute(
+                select(
+                    func.coalesce(func.sum(ImageVersion.version), 0).label("version"),
+                    func.max(ImageVersion.modified).label("modified"),
+                )
+            )
+        ).one()
+
+        return int(row.version), row.modified
+
+    def delete(self, image_id: uuid.UUID) -> None:
+        """
+        Delete an image - i.e. its row (and those of its renditions) and then its files.
+
+        NOTE: Files are deleted once the deletion is committed - i.e. at worst (e.g.
+        if deleting a file fails) files are left behind, never rows without files.
+
+        NOTE: Only the image's row is deleted - its renditions' rows are by cascade.
+        The image count of its status is locked first, i.e. deletes (as inserts do)
+        lock image counts before the image version (see `models.image`) - a delete
+        locking them the other way around would deadlock with concurrent uploads.
+
+        Parameters:
+            image_id (UUID): The ID of the image.
+
+        Raises:
+            NotFoundError: If there is no image with the given ID.
+            ConflictError: If the image is being processed.
+            ServerError: If there is an internal server error.
+        """
+        try:
+            # NOTE: Locked - i.e. an image being processed is never deleted before it
+            # is completed (see _complete).
+            row = self.session.execute(_delete_lock_statement(image_id)).first()
+            _check_deletable(image_id, row)
+            paths = self.session.scalars(_rendition_paths_statement(image_id)).all()
+            self.session.execute(_count_lock_statement(row.status))
+            self.session.execute(delete(Image).where(Image.id == image_id))
+            self.session.commit()
+        except (NotFoundError, ConflictError):
+            self.session.rollback()
+            raise
+        except SQLAlchemyError as exc:
+            self.session.rollback()
+            raise ServerError(message=str(exc))
+
+        _images.delete(image_id)
+        self._delete_files(
+            image_id, (row.path, *self._alternate_paths(row.path), *paths)
+        )
+
+    async def adelete(self, image_id: uuid.UUID) -> None:
+        """
+        Delete an image - see `delete`.
+
+        Parameters:
+            image_id (UUID): The ID of the image.
+
+        Raises:
+            NotFoundError: If there is no image with the given ID.
+            ConflictError: If the image is being processed.
+            ServerError: If there is an internal server error.
+        """
+        try:
+            row = (
+                await self.async_session.execute(_delete_lock_statement(image_id))
+            ).first()
+            _check_deletable(image_id, row)
+            paths = (
+                await self.async_session.scalars(_rendition_paths_statement(image_id))
+            ).all()
+            await self.async_session.execute(_count_lock_statement(row.status))
+            await self.async_session.execute(delete(Image).where(Image.id == image_id))
+            await self.async_session.commit()
+        except (NotFoundError, ConflictError):
+            await self.async_session.rollback()
+            raise
+        except SQLAlchemyError as exc:
+            await self.async_session.rollback()
+            raise ServerError(message=str(exc))
+
+        _images.delete(image_id)
+        await asyncio.to_thread(
+            self._delete_files,
+            image_id,
+            (row.path, *self._alternate_paths(row.path), *paths),
+        )
+
+    def _delete_files(self, image_id: uuid.UUID, paths: tuple[str, ...]) -> None:
+        """
+        Delete the files of a (deleted) image - i.e. its cached variants and its files
+        in storage, logging (instead of raising) failures.
+
+        Args:
+            image_id (UUID): The ID of the image.
+            paths (tuple[str, ...]): The paths of the files - e.g. of its renditions.
+        """
+        # NOTE: Keys of variants are prefixed with the ID of the image (see
+        # get_variant) - i.e. they no longer take room in the caches.
+        _memory_variants.delete_prefix(f"{image_id}.")
+        _disk_variants.delete_prefix(f"{image_id}.")
+        for path in paths:
+            try:
+                self.storage.delete(path)
+            except Exception as exc:
+                logger.error(f"Failed to delete image file {path}: {exc}")
+
+    def get_variant(
+        self, image: Image, width: int | None, variant_format: VariantFormat | None
+    ) -> Variant:
+        """
+        Get a variant of an image - i.e. the image resized and/or encoded in another
+        format.
+
+        The variant is not loaded (see `load_variant`) - i.e. it is only described.
+
+        Parameters:
+            image (Image): The (processed) image.
+            width (int | None): The width of the variant - images are never upscaled,
+                i.e. it defaults to (and is capped at) the width of the image.
+            variant_format (VariantFormat | None): The format of the variant - defaults
+                to the format of the image.
+
+        Returns:
+            Variant: The variant.
+        """
+        # NOTE: Capped before building the key (and ETag) - i.e. widths beyond the
+        # width images are stored in (see image_width) all share the variant of the
+        # image's width, instead of each producing (and caching) a copy of it.
+        if width is not None and width >= self.image_width:
+            width = None
+        if variant_format is None:
+            media_type = mimetypes.guess_type(image.path)[0]
+            variant_format = next(
+                (
+                    candidate
+                    for candidate in VariantFormat
+                    if media_type == f"image/{candidate.value}"
+                ),
+                VariantFormat.PNG,
+            )
+        # NOTE: The checksum is part of the key, so variants of a changed image are
+        # never served.
+        return Variant(
+            key=f"{image.id}.{image.checksum[:16]}.{width or 0}.{variant_format.value}",
+            etag=f'"{image.checksum}-{width or 0}-{variant_format.value}"',
+            media_type=f"image/{variant_format.value}",
+            width=width,
+            variant_format=variant_format,
+        )
+
+    def load_variant(self, image: Image, variant: Variant) -> Variant:
+        """
+        Load a variant of an image - see `get_variant`.
+
+        Variants are produced on demand and cached - in memory, if small, and on disk.
+        Concurrent requests for a variant that is not cached produce it only once.
+
+        Parameters:
+            image (Image): The (processed) image.
+            variant (Variant): The variant.
+
+        Returns:
+            Variant: The (loaded) variant.
+        """
+        variant.content = _memory_variants.get(variant.key)
+        if variant.content is None:
+            variant.path = _disk_variants.get(variant.key)
+        if variant.content is None and variant.path is None:
+            variant.content, variant.path = _variant_flights.do(
+                variant.key,
+                partial(
+                    self._render_variant,
+                    image.path,
+                    variant.key,
+                    variant.width,
+                    variant.variant_format,
+                ),
+            )
+
+        return variant
+
+    def _render_variant(
+        self, path: str, key: str, width: int | None, variant_format: VariantFormat
+    ) -> tuple[bytes | None, str]:
+        """
+        Produce (and cache) a variant of the image at path.
+
+        Args:
+            path (str): The path (i.e. key in storage) to the image.
+            key (str): The cache key of the variant.
+            width (int | None): The width of the variant.
+            variant_format (VariantFormat): The format of the variant.
+
+        Returns:
+            tuple[bytes | None, str]: The content (if small enough to be cached in
+                memory) and path of the variant.
+        """
+        # NOTE: The variant may have been produced since it was looked up.
+        cached_path = _disk_variants.get(key)
+        if cached_path is not None:
+            return None, cached_path
+
+        with self.storage.open(path) as file, PILImage.open(file) as source:
+            if width is not None and width < source.width:
+                source = resize(source, width, fast=self.fast_resize)
+            content = encode(source, variant_format.name, self.encoding)
+
+        cached_path = _disk_variants.put(key, content)
+        if len(content) > _memory_variants.max_item_bytes:
+            return None, cached_path
+        _memory_variants.put(key, content)
+
+        return content, cached_path
+
+    def _find_duplicate(self, checksum: str) -> Image | None:
+        """
+        Find an image created from an upload with the given checksum.
+
+        Corrupted images are disregarded - i.e. an identical upload is processed anew.
+
+        Args:
+            checksum (str): The SHA-256 checksum of the uploaded image.
+
+        Returns:
+            Image | None: The image, if any.
+        """
+        # NOTE: Avoids querying for (the most common case of) new uploads.
+        if not _may_be_duplicate(checksum):
+            return None
+
+        return self.session.scalars(_duplicate_statement(checksum)).first()
+
+    async def _afind_duplicate(self, checksum: str) -> Image | None:
+        """
+        Find an image created from an upload with the given checksum - see
+        `_find_duplicate`.
+
+        Args:
+            checksum (str): The SHA-256 checksum of the uploaded image.
+
+        Returns:
+            Image | None: The image, if any.
+        """
+        if not _may_be_duplicate(checksum):
+            return None
+
+        return (
+            await self.async_session.scalars(_duplicate_statement(checksum))
+        ).first()
+
+    def _output_path(self, image: Image, uploaded_image: TmpImage) -> str:
+        """
+        Build the path the processed image is written to - sharded, see
+        `utils.layout`.
+
+        Args:
+            image (Image): The image object.
+            uploaded_image (TmpImage): The temporary image object.
+
+        Returns:
+            str: The output path.
+        """
+        filename = os.path.basename(uploaded_image.path)
+        if self.output_format is not None:
+            filename = (
+                f"{os.path.splitext(filename)[0]}{FORMATS[self.output_format][1]}"
+            )
+
+        return sharded_path(self.base_path, image.id, f"{image.id}.{filename}")
+
+    def _alternate_paths(self, path: str) -> tuple[str, ...]:
+        """
+        Build the paths the alternate encodings of an image are written to - see
+        `utils.layout.alternate_paths`.
+
+        Args:
+            path (str): The (reserved) path of the image.
+
+        Returns:
+            tuple[str, ...]: The paths - excluding the format of the image itself.
+        """
+        return alternate_paths(
+            path,
+            (
+                FORMATS[alternate_format][1]
+                for alternate_format in self.alternate_formats
+            ),
+        )
+
+    def _renditions(self, path: str) -> tuple[tuple[int, str], ...]:
+        """
+        Build the widths and paths the renditions of an image are written to - see
+        `utils.layout.rendition_paths`.
+
+        Args:
+            path (str): The (reserved) path of the image.
+
+        Returns:
+            tuple[tuple[int, str], ...]: The width and path of each rendition -
+                excluding the width of the image itself.
+        """
+        return rendition_paths(path, self.rendition_widths, self.image_width)
+
+    def _output_paths(self, path: str) -> tuple[str, ...]:
+        """
+        Build the paths all the files of an image are written to - i.e. the image, its
+        alternate encodings and its renditions.
+
+        Args:
+            path (str): The (reserved) path of the image.
+
+        Returns:
+            tuple[str, ...]: The paths - of files which may not (all) exist.
+        """
+        return (
+            path,
+            *self._alternate_paths(path),
+            *(rendition for _, rendition in self._renditions(path)),
+        )
 
     def _process(self, image: Image, uploaded_image: TmpImage) -> Image:
         """
         Process an image - i.e. resize and set Image.path.
 
+        Images failing to be processed are marked as CORRUPTED (see `_corrupt`) - as
+        in the process pool (see `_complete`).
+
         Args:
             image (Image): The original image object.
             uploaded_image (TmpImage): The temporary image object.
@@ -136,19 +1246,401 @@ class ImageService(BaseService):
         Returns:
             Image: The processed image object.
         """
-        # TODO: Create self.base_path if non-existent?
         # NOTE: We're resizing the image regardless of its size - i.e. downwards or
         # upwards.
-        output_image_path = (
-            f"{self.base_path}/{image.id}.{os.path.basename(uploaded_image.path)}"
-        )
-        with PILImage.open(uploaded_image.path) as input_image:
-            output_image = resize(
-                input_image,
+        image.reserve(self._output_path(image, uploaded_image))
+        # NOTE: The checksum is computed while the image is saved - instead of being
+        # computed from the saved image (i.e. as when Image.path is set).
+        timings: dict[str, float] = {}
+        rendered: list[RenditionFile] = []
+        sizes: list[int] = []
+        try:
+            checksum = process(
+                uploaded_image.source,
+                image.path,
                 self.image_width,
+                fast=self.fast_resize,
+                timings=timings,
+                storage=self.storage,
+                options=self.encoding,
+                alternate_paths=self._alternate_paths(image.path),
+                renditions=self._renditions(image.path),
+                rendered=rendered,
+                max_threads=self.max_threads,
+                sizes=sizes,
+            )
+        except Exception as exc:
+            self._corrupt(image, exc)
+            return image
+
+        image.complete(checksum)
+        image.renditions = _renditions(rendered)
+        record_processed(image.status, sum(sizes), timings)
+
+        return image
+
+    async def _aprocess(
+        self, admission: Admission, image: Image, uploaded_image: TmpImage
+    ) -> Image:
+        """
+        Process an image in the process pool - see `_process`.
+
+        Images failing to be processed are marked as CORRUPTED (see `_corrupt`).
+
+        Args:
+            admission (Admission): The admission of the image to the process pool.
+            image (Image): The original image object.
+            uploaded_image (TmpImage): The temporary image object.
+
+        Returns:
+            Image: The processed image object.
+        """
+        image.reserve(self._output_path(image, uploaded_image))
+        try:
+            checksum, timings, rendered, size = await asyncio.wrap_future(
+                admission.submit(
+                    process_timed,
+                    uploaded_image.source,
+                    image.path,
+                    self.image_width,
+                    fast=self.fast_resize,
+                    storage=self.storage,
+                    options=self.encoding,
+                    alternate_paths=self._alternate_paths(image.path),
+                    renditions=self._renditions(image.path),
+                    max_threads=self.max_threads,
+                )
             )
-            output_image.save(output_image_path)
+        except Exception as exc:
+            await asyncio.to_thread(self._corrupt, image, exc)
+            return image
 
-        image.path = output_image_path
+        image.complete(checksum)
+        image.renditions = _renditions(rendered)
+        record_processed(image.status, size, timings)
 
         return image
+
+    def _corrupt(self, image: Image, exc: BaseException) -> None:
+        """
+        Mark an image failing to be processed as CORRUPTED - deleting whatever of its
+        files (e.g. renditions) was written before it failed.
+
+        Args:
+            image (Image): The (reserved) image object.
+            exc (BaseException): The reason the image failed to be processed.
+        """
+        logger.error(f"Failed to process image {image.id}: {exc}")
+        self._delete_files(image.id, self._output_paths(image.path))
+        image.corrupt()
+        record_processed(image.status)
+
+    def _dispatch(
+        self,
+        admission: Admission,
+        image_id: uuid.UUID,
+        uploaded_image: TmpImage,
+        output_path: str,
+    ) -> None:
+        """
+        Process an (already persisted) image in the process pool - deleting its
+        temporary file (see `TmpImage.discard`) once processed.
+
+        Args:
+            admission (Admission): The admission of the image to the process pool.
+            image_id (UUID): The ID of the image.
+            uploaded_image (TmpImage): The temporary image object.
+            output_path (str): The (reserved) path of the processed image.
+        """
+        future = admission.submit(
+            process_timed,
+            uploaded_image.source,
+            output_path,
+            self.image_width,
+            fast=self.fast_resize,
+            storage=self.storage,
+            options=self.encoding,
+            alternate_paths=self._alternate_paths(output_path),
+            renditions=self._renditions(output_path),
+            max_threads=self.max_threads,
+        )
+        future.add_done_callback(
+            lambda done: complete(_complete, image_id, output_path, done)
+        )
+        future.add_done_callback(lambda _: uploaded_image.discard())
+
+
+def _list_statement(
+    statement: Select, offset: int | None, limit: int | None, after: str | None
+) -> Select:
+    """
+    Order (and paginate) a statement selecting images - see `ImageService.list`.
+
+    Args:
+        statement (Select): The statement.
+        offset (int | None): The number of images to skip.
+        limit (int | None): The max. number of images to list.
+        after (str | None): A cursor - only images positioned after it are listed.
+
+    Returns:
+        Select: The statement.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    statement = statement.order_by(Image.created.asc(), Image.id.asc())
+    if after is not None:
+        statement = statement.where(
+            tuple_(Image.created, Image.id) > decode_cursor(after)
+        )
+
+    return statement.offset(offset).limit(limit)
+
+
+def _delete_lock_statement(image_id: uuid.UUID) -> Select:
+    """
+    Build the statement locking (and selecting the path and status of) an image about
+    to be deleted - see `ImageService.delete`.
+    """
+    return (
+        select(Image.path, Image._status.label("status"))
+        .where(Image.id == image_id)
+        .with_for_update()
+    )
+
+
+def _rendition_paths_statement(image_id: uuid.UUID) -> Select:
+    """
+    Build the statement selecting the paths of the renditions of an image.
+    """
+    return select(Rendition.path).where(Rendition.image_id == image_id)
+
+
+def _count_lock_statement(status: ImageStatus) -> Select:
+    """
+    Build the statement locking the image count of a status - see
+    `ImageService.delete`.
+    """
+    return select(ImageCount.total).where(ImageCount.status == status).with_for_update()
+
+
+def _check_deletable(image_id: uuid.UUID, row: Row | None) -> None:
+    """
+    Check whether an image (i.e. its locked row) can be deleted.
+
+    Raises:
+        NotFoundError: If there is no image with the given ID.
+        ConflictError: If the image is being processed.
+    """
+    if row is None:
+        raise NotFoundError(message=f"Image not found: {image_id}")
+    if row.status == ImageStatus.IN_PROGRESS:
+        raise ConflictError(message=f"Image is {row.status.value}: {image_id}")
+
+
+def _duplicate_statement(checksum: str) -> Select:
+    """
+    Build the statement selecting (non-corrupted) images created from an upload with
+    the given checksum - the first created, first.
+
+    Args:
+        checksum (str): The SHA-256 checksum of the uploaded image.
+
+    Returns:
+        Select: The statement.
+    """
+    return (
+        select(Image)
+        .where(
+            Image.source_checksum == checksum,
+            Image._status != ImageStatus.CORRUPTED,
+        )
+        .order_by(Image.created.asc())
+        .limit(1)
+    )
+
+
+_source_checksums_lock = threading.Lock()
+_source_checksums_filter: BloomFilter | None = None
+# NOTE: Checksums added while the filter is being loaded - i.e. possibly missed by its
+# scan, hence added to it once loaded. None unless loading.
+_source_checksums_pending: list[str] | None = None
+# NOTE: The (database) time the filter was loaded - or last merged - at. Images created
+# a while (see _SOURCE_CHECKSUMS_OVERLAP) before are merged again: Image.created is the
+# start of the transaction creating an image, which may commit after it.
+_source_checksums_since: datetime | None = None
+_SOURCE_CHECKSUMS_OVERLAP = timedelta(minutes=1)
+_SOURCE_CHECKSUMS = (
+    select(Image.source_checksum)
+    .where(Image.source_checksum.is_not(None))
+    .execution_options(yield_per=10_000)
+)
+
+
+def load_source_checksums() -> None:
+    """
+    Load the Bloom filter of checksums of uploaded images from the database - once per
+    process, e.g. in the background at startup (see `endpoints.app`).
+
+    Until it is loaded, duplicates are looked up in the database (see
+    `_may_be_duplicate`) - i.e. uploads never wait for (nor run) the full scan.
+
+    NOTE: The filter is local to the process - i.e. checksums added by other processes
+    after it was loaded are only merged into it periodically, see
+    `refresh_source_checksums`.
+    """
+    global _source_checksums_filter, _source_checksums_pending, _source_checksums_since
+
+    with _source_checksums_lock:
+        if (
+            _source_checksums_filter is not None
+            or _source_checksums_pending is not None
+        ):
+            return
+        _source_checksums_pending = []
+
+    bloom_filter = _new_source_checksums()
+    try:
+        with Session() as session:
+            since = session.scalar(select(func.now()))
+            for checksum in session.scalars(_SOURCE_CHECKSUMS):
+                bloom_filter.add(checksum)
+    except SQLAlchemyError as exc:
+        logger.error(f"Failed to load checksums of uploaded images: {exc}")
+        with _source_checksums_lock:
+            _source_checksums_pending = None
+        return
+
+    with _source_checksums_lock:
+        for checksum in _source_checksums_pending:
+            bloom_filter.add(checksum)
+        _source_checksums_filter, _source_checksums_pending = bloom_filter, None
+        _source_checksums_since = since
+    logger.info("Checksums of uploaded images loaded")
+
+
+def refresh_source_checksums() -> None:
+    """
+    Merge the checksums of images created (by any process) since the Bloom filter was
+    loaded - or last merged - into it. The filter is loaded instead, if it is not.
+
+    Images are looked up by Image.created - i.e. via the index backing pagination.
+    """
+    global _source_checksums_since
+
+    since = _source_checksums_since
+    if _source_checksums_filter is None or since is None:
+        load_source_checksums()
+        return
+
+    try:
+        with Session() as session:
+            merged = session.scalar(select(func.now()))
+            checksums = session.scalars(
+                _SOURCE_CHECKSUMS.where(
+                    Image.created >= since - _SOURCE_CHECKSUMS_OVERLAP
+                )
+            ).all()
+    except SQLAlchemyError as exc:
+        logger.error(f"Failed to merge checksums of uploaded images: {exc}")
+        return
+
+    with _source_checksums_lock:
+        for checksum in checksums:
+            _source_checksums_filter.add(checksum)
+        _source_checksums_since = merged
+
+
+def watch_source_checksums(stop: threading.Event) -> None:
+    """
+    Load the Bloom filter of checksums of uploaded images (see `load_source_checksums`)
+    and keep merging those of images created by other processes into it (see
+    `refresh_source_checksums`) - every deduplication_refresh_interval seconds, until
+    stopped.
+
+    Args:
+        stop (threading.Event): The event stopping the watch.
+    """
+    load_source_checksums()
+    while not stop.wait(settings.deduplication_refresh_interval):
+        refresh_source_checksums()
+
+
+def _new_source_checksums() -> BloomFilter:
+    return BloomFilter(
+        capacity=settings.deduplication_capacity,
+        error_rate=settings.deduplication_error_rate,
+    )
+
+
+def _may_be_duplicate(checksum: str) -> bool:
+    """
+    Check whether an upload may be a duplicate - i.e. whether its checksum is (possibly)
+    in the Bloom filter or the filter is not loaded (yet).
+    """
+    bloom_filter = _source_checksums_filter
+    return bloom_filter is None or checksum in bloom_filter
+
+
+def _add_source_checksum(checksum: str) -> None:
+    """
+    Add the checksum of an uploaded image to the Bloom filter - if loaded or loading.
+    """
+    with _source_checksums_lock:
+        if _source_checksums_filter is not None:
+            _source_checksums_filter.add(checksum)
+        elif _source_checksums_pending is not None:
+            _source_checksums_pending.append(checksum)
+
+
+def _renditions(rendered: list[RenditionFile]) -> list[Rendition]:
+    """
+    Build the renditions (i.e. rows) of the renditions saved while processing an image.
+    """
+    return [Rendition(**asdict(rendition)) for rendition in rendered]
+
+
+def _complete(image_id: uuid.UUID, output_path: str, future: Future) -> None:
+    """
+    Persist the outcome of processing an image in the process pool - i.e. the image
+    becomes either DONE or CORRUPTED.
+
+    NOTE: Runs in a thread completing jobs of the process pool (see
+    `workers.complete`), hence the use of a dedicated session.
+
+    Args:
+        image_id (UUID): The ID of the image.
+        output_path (str): The (reserved) path of the processed image.
+        future (Future): The (done) future of the processing.
+    """
+    exc = future.exception()
+    if exc is not None:
+        logger.error(f"Failed to process image {image_id}: {exc}")
+        checksum, timings, rendered, size = None, None, [], 0
+    else:
+        checksum, timings, rendered, size = future.result()
+
+    with Session() as session:
+        try:
+            image = session.get(Image, image_id)
+            if image is None:
+                logger.error(f"Image not found after processing: {image_id}")
+                return
+            if exc is None:
+                image.complete(checksum)
+                # NOTE: Added on their own - i.e. without loading Image.renditions.
+                for rendition in _renditions(rendered):
+                    rendition.image_id = image_id
+                    session.add(rendition)
+            else:
+                image.corrupt()
+            status = image.status
+            with stage_seconds.time(stage="commit"):
+                session.commit()
+        except SQLAlchemyError as error:
+            session.rollback()
+            logger.error(f"Failed to complete image {image_id}: {error}")
+            return
+
+        record_processed(status, size, timings)
+        logger.info(f"Image processed: {image_id} ({status.value})")
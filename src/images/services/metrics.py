@@ -0,0 +1,62 @@
+"""
+This module defines the metrics of creating (and processing) images - exposed by the
+metrics endpoint (see `endpoints.metrics`).
+
+Stages (see `stage_seconds`) are:
+    - spill: copying the upload to a temporary file (and hashing it).
+    - decode, resize, encode, checksum and write: processing the image - see
+      `utils.image.process`.
+    - commit: persisting the image - i.e. flushing and committing.
+"""
+
+from src.images.models.image import ImageStatus
+from src.images.utils.metrics import Counter, Histogram
+
+
+stage_seconds = Histogram(
+    "images_stage_seconds",
+    "Time spent in each stage of creating an image.",
+    ["stage"],
+)
+created_total = Counter(
+    "images_created_total",
+    "Images created - by status when created.",
+    ["status"],
+)
+processed_total = Counter(
+    "images_processed_total",
+    "Images processed - by outcome (i.e. DONE or CORRUPTED).",
+    ["status"],
+)
+deduplicated_total = Counter(
+    "images_deduplicated_total",
+    "Uploads answered with an image created from an identical upload.",
+)
+uploads_rejected_total = Counter(
+    "images_uploads_rejected_total",
+    "Uploads rejected while received - by reason (i.e. bytes, pixels or format).",
+    ["reason"],
+)
+bytes_in_total = Counter("images_bytes_in_total", "Bytes of uploaded images.")
+bytes_out_total = Counter("images_bytes_out_total", "Bytes of processed images.")
+
+
+def record_processed(
+    status: ImageStatus,
+    size: int = 0,
+    timings: dict[str, float] | None = None,
+) -> None:
+    """
+    Record the outcome of processing an image.
+
+    Args:
+        status (ImageStatus): The outcome - i.e. DONE or CORRUPTED.
+        size (int): The total size (in bytes) of the files saved - i.e. the processed
+            image, its alternate encodings and renditions - counted as bytes out.
+        timings (dict[str, float] | None): The time (in seconds) spent in each stage.
+    """
+    processed_total.inc(status=status.value)
+    for stage, seconds in (timings or {}).items():
+        stage_seconds.observe(seconds, stage=stage)
+    if size:
+        bytes_out_total.inc(size)
@@ -0,0 +1,321 @@
+"""
+This module manages the process pool used to process images off the request path.
+
+The pool is created lazily (i.e. on first use) and is bounded by
+`Settings.processing_workers` - which defaults to the number of CPUs.
+
+Work is admitted to the pool through `jobs` - a queue bounded by
+`Settings.processing_max_queued_jobs` and `Settings.processing_max_queued_bytes` - so
+that bursts of uploads are rejected (see `OverloadedError`) instead of oversubscribing
+CPU and memory.
+
+Example:
+    To submit work to the pool:
+        with jobs.admit([os.path.getsize(input_path)]) as admission:
+            future = admission.submit(process, input_path, output_path, width)
+
+    To persist the outcome of work off the pool's result collection:
+        future.add_done_callback(lambda done: complete(persist, done))
+
+    To wait for pending work and release the pool:
+        shutdown()
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable
+
+from src.images.services.exceptions import OverloadedError
+from src.images.settings.base import Settings
+
+
+settings = Settings()
+
+_lock = threading.Lock()
+_executor: ProcessPoolExecutor | None = None
+_completer: ThreadPoolExecutor | None = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Get the process pool - creating it if needed.
+
+    NOTE: Processes are spawned (instead of forked) so that no state (e.g. database
+    connections, threads) is inherited from the parent process.
+
+    Returns:
+        ProcessPoolExecutor: The process pool.
+    """
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.processing_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return _executor
+
+
+def complete(function: Callable[..., Any], *args: Any) -> None:
+    """
+    Run the completion of a job (e.g. persisting its outcome) in a dedicated thread
+    pool - created lazily, bounded by `Settings.processing_completion_threads`.
+
+    NOTE: Done callbacks of the process pool run in its (single) result collecting
+    thread - i.e. blocking work (e.g. waiting for the database) there would delay the
+    results (and the accounting, see `JobQueue`) of every other job. Callbacks hence
+    only hand their work over to this pool.
+
+    Args:
+        function (Callable[..., Any]): The function run.
+        *args (Any): The arguments of the function.
+    """
+    global _completer
+
+    with _lock:
+        if _completer is None:
+            _completer = ThreadPoolExecutor(
+                max_workers=settings.processing_completion_threads,
+                thread_name_prefix="complete",
+            )
+        _completer.submit(function, *args)
+
+
+def shutdown(wait: bool = True) -> None:
+    """
+    Shut down the process pool (if any) and then the completions of its jobs (see
+    `complete`) - new ones are created on next use.
+
+    Args:
+        wait (bool): Whether to wait for pending work (and completions) to finish.
+    """
+    global _executor, _completer
+
+    with _lock:
+        executor, _executor = _executor, None
+    # NOTE: Outside the lock - i.e. jobs finishing meanwhile still hand over their
+    # completion (see complete).
+    if executor is not None:
+        executor.shutdown(wait=wait)
+    with _lock:
+        completer, _completer = _completer, None
+    if completer is not None:
+        completer.shutdown(wait=wait)
+
+
+@dataclass
+class QueueStats:
+    """
+    The stats of a job queue.
+
+    Attributes:
+        max_workers (int): The max. number of jobs run concurrently.
+        pending_jobs (int): The number of jobs admitted and not yet finished - i.e.
+            waiting or running.
+        pending_bytes (int): The total size of pending jobs.
+        rejected (int): The number of jobs rejected.
+        finished (int): The number of jobs finished.
+        wait_seconds (float): The total time finished jobs waited to be run.
+        max_wait_seconds (float): The longest time a finished job waited to be run.
+        run_seconds (float): The total time finished jobs ran for.
+    """
+
+    max_workers: int
+    pending_jobs: int
+    pending_bytes: int
+    rejected: int
+    finished: int
+    wait_seconds: float
+    max_wait_seconds: float
+    run_seconds: float
+
+
+class Admission:
+    """
+    Jobs admitted to a job queue - to be submitted (see `submit`) or released.
+
+    Used as a context manager, jobs that were not submitted are released on exit.
+    """
+
+    def __init__(self, queue: "JobQueue", sizes: list[int]) -> None:
+        self._queue = queue
+        self._sizes = sizes
+
+    def __enter__(self) -> "Admission":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+    def submit(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Submit (the next admitted) job to the process pool.
+
+        Args:
+            function (Callable[..., Any]): The function run - must be picklable.
+            *args (Any): The positional arguments of the function.
+            **kwargs (Any): The keyword arguments of the function.
+
+        Returns:
+            Future: The future of the job.
+        """
+        size = self._sizes.pop(0)
+        future: Future = Future()
+        submitted = time.time()
+        try:
+            inner = get_executor().submit(_timed, function, *args, **kwargs)
+        except BaseException:
+            self._queue._release(1, size)
+            raise
+        inner.add_done_callback(partial(self._queue._finish, size, submitted, future))
+
+        return future
+
+    def release(self) -> None:
+        """Release the admitted jobs that were not submitted."""
+        if self._sizes:
+            self._queue._release(len(self._sizes), sum(self._sizes))
+            self._sizes = []
+
+
+class JobQueue:
+    """
+    A bounded queue of jobs run in the process pool - i.e. jobs are admitted (see
+    `admit`) only while there is room for them.
+
+    Attributes:
+        max_workers (int): The max. number of jobs run concurrently.
+        max_queued_jobs (int): The max. number of jobs waiting to be run.
+        max_queued_bytes (int): The max. total size of pending jobs.
+    """
+
+    def __init__(
+        self, max_workers: int, max_queued_jobs: int, max_queued_bytes: int
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queued_jobs = max_queued_jobs
+        self.max_queued_bytes = max_queued_bytes
+        self._lock = threading.Lock()
+        self._pending_jobs = 0
+        self._pending_bytes = 0
+        self._rejected = 0
+        self._finished = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def admit(self, sizes: list[int]) -> Admission:
+        """
+        Admit jobs - all or none.
+
+        NOTE: Jobs are always admitted if none are pending - i.e. a batch exceeding the
+        bounds by itself is not rejected forever. No jobs (e.g. a batch of duplicates)
+        are always admitted, too.
+
+        Args:
+            sizes (list[int]): The size (i.e. of the input) of each job.
+
+        Returns:
+            Admission: The admitted jobs.
+
+        Raises:
+            OverloadedError: If there is no room for the jobs.
+        """
+        with self._lock:
+            if (
+                sizes
+                and self._pending_jobs
+                and (
+                    self._pending_jobs + len(sizes)
+                    > self.max_workers + self.max_queued_jobs
+                    or self._pending_bytes + sum(sizes) > self.max_queued_bytes
+                )
+            ):
+                self._rejected += len(sizes)
+                raise OverloadedError(
+                    message=f"Too many images being processed: {self._pending_jobs}",
+                    retry_after=self._retry_after(),
+                )
+            self._pending_jobs += len(sizes)
+            self._pending_bytes += sum(sizes)
+
+        return Admission(self, list(sizes))
+
+    def stats(self) -> QueueStats:
+        """
+        Get the stats of the queue.
+
+        Returns:
+            QueueStats: The stats.
+        """
+        with self._lock:
+            return QueueStats(
+                max_workers=self.max_workers,
+                pending_jobs=self._pending_jobs,
+                pending_bytes=self._pending_bytes,
+                rejected=self._rejected,
+                finished=self._finished,
+                wait_seconds=self._wait_seconds,
+                max_wait_seconds=self._max_wait_seconds,
+                run_seconds=self._run_seconds,
+            )
+
+    def _retry_after(self) -> int:
+        # NOTE: An estimate of the time to run the pending jobs - from the mean run time.
+        if not self._finished:
+            return 1
+        mean = self._run_seconds / self._finished
+        return max(1, math.ceil(mean * self._pending_jobs / self.max_workers))
+
+    def _release(self, jobs: int, size: int) -> None:
+        with self._lock:
+            self._pending_jobs -= jobs
+            self._pending_bytes -= size
+
+    def _finish(
+        self, size: int, submitted: float, future: Future, inner: Future
+    ) -> None:
+        finished = time.time()
+        exc = inner.exception()
+        with self._lock:
+            self._pending_jobs -= 1
+            self._pending_bytes -= size
+            if exc is None:
+                started, _ = inner.result()
+                wait = max(started - submitted, 0.0)
+                self._finished += 1
+                self._wait_seconds += wait
+                self._max_wait_seconds = max(self._max_wait_seconds, wait)
+                self._run_seconds += max(finished - started, 0.0)
+
+        if exc is None:
+            future.set_result(inner.result()[1])
+        else:
+            future.set_exception(exc)
+
+
+def _timed(
+    function: Callable[..., Any], *args: Any, **kwargs: Any
+) -> tuple[float, Any]:
+    """
+    Run a function - in the process pool.
+
+    Returns:
+        tuple[float, Any]: The (wall clock) time it started at and its result.
+    """
+    return time.time(), function(*args, **kwargs)
+
+
+jobs = JobQueue(
+    max_workers=settings.processing_workers or os.cpu_count() or 1,
+    max_queued_jobs=settings.processing_max_queued_jobs,
+    max_queued_bytes=settings.processing_max_queued_bytes,
+)
@@ -1,4 +1,6 @@
-from pydantic import Field
+from typing import Literal
+
+from pydantic import Field, PositiveInt
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +12,85 @@ class Settings(BaseSettings):
         app_name (str): The name of the application.
         description (str): A description of the API service.
         database_url (str): The URL of the database.
+        database_pool_size (int): The number of connections kept open by each
+            connection pool - NOTE: there are two pools (i.e. sync and asyncio) per
+            process.
+        database_max_overflow (int): The max. number of connections opened (and
+            closed once returned) by each pool beyond database_pool_size.
+        database_pool_timeout (float): The max. number of seconds waited for a
+            connection of a pool before giving up.
+        database_pool_recycle (int): The number of seconds after which connections
+            are reopened - -1 to never reopen them.
+        database_pool_pre_ping (bool): Whether connections are tested (and
+            transparently reopened) when taken from a pool.
+        asynchronous_processing (bool): Whether uploaded images are processed off the
+            request path (i.e. in a process pool).
+        processing_workers (int | None): The max. number of processes used to process
+            images - i.e. of images processed concurrently. Defaults to the number of
+            CPUs.
+        processing_max_queued_jobs (int): The max. number of images waiting to be
+            processed - further uploads are rejected (i.e. 503).
+        processing_max_queued_bytes (int): The max. total size of uploaded images
+            waiting to be (or being) processed - further uploads are rejected.
+        processing_completion_threads (int): The max. number of threads persisting
+            the outcome of processed images (i.e. the database work following it).
+        fast_resize (bool): Whether images are resized via the fast path (see
+            `utils.image.resize`) - i.e. decoding at reduced scale when downscaling.
+        rendition_widths (list[int]): The widths images are also saved in (e.g. for
+            srcset) - resized progressively from a single decode, see
+            `utils.image.process`.
+        rendition_max_threads (int): The max. number of threads encoding (the
+            renditions and alternate encodings of) an image in parallel.
+        deduplication_capacity (int): The expected number of distinct uploads - i.e.
+            the capacity of the Bloom filter of uploaded checksums.
+        deduplication_error_rate (float): The rate of false positives of the Bloom
+            filter of uploaded checksums.
+        deduplication_refresh_interval (float): The time (in seconds) between merges
+            of the checksums of images created (e.g. by other processes) into the Bloom
+            filter - i.e. the max. staleness of duplicate detection across processes.
+        variants_path (str): The directory of cached (resized) variants of images.
+        variants_max_bytes (int): The max. total size of variants cached on disk.
+        variants_memory_max_bytes (int): The max. total size of variants cached in
+            memory.
+        variants_memory_max_item_bytes (int): The max. size of a variant cached in
+            memory - i.e. only small variants (e.g. thumbnails) are.
+        image_cache_max_items (int): The max. number of images cached in memory - see
+            `ImageService.aget_row`. 0 to never cache them.
+        image_cache_ttl (float): The time (in seconds) images are cached for - i.e.
+            the max. staleness of images changed by other processes (e.g. the
+            scrubber).
+        response_compression_min_bytes (int | None): The min. size of (list)
+            responses compressed (i.e. with brotli or gzip) - None to never compress
+            them.
+        list_cache_max_age (int): The time (in seconds) lists may be served from
+            (e.g. browser) caches without being revalidated - see ETag.
+        storage_backend (str): Where image files are stored - i.e. local (the
+            filesystem) or s3 (an S3-compatible object store) - see `utils.storage`.
+        storage_s3_bucket (str | None): The bucket image files are stored in - required
+            by the s3 backend.
+        storage_s3_endpoint_url (str | None): The URL of the object store - e.g. of
+            MinIO. Defaults to AWS S3.
+        storage_s3_region (str | None): The region of the bucket.
+        storage_s3_part_size (int): The size of the parts image files are uploaded in
+            - i.e. the max. size buffered per file being written.
+        output_format (str | None): The format images are saved in - i.e. jpeg, png,
+            webp or avif. Defaults to the format of the upload.
+        output_alternate_formats (list[str]): The formats images are also saved in -
+            served instead when accepted (see Accept) by clients, e.g. webp and avif.
+        output_quality (int): The quality of lossy formats - i.e. JPEG, WebP and AVIF.
+        output_optimize (bool): Whether JPEGs, PNGs and GIFs are optimized - i.e.
+            smaller, but slower to encode.
+        output_progressive (bool): Whether JPEGs are progressive.
+        output_strip_metadata (bool): Whether metadata (e.g. EXIF) is stripped.
+        output_webp_method (int): The effort of WebP encoding - 0 (fast) to 6 (small).
+        output_avif_speed (int): The speed of AVIF encoding - 0 (small) to 10 (fast).
+        upload_max_bytes (int | None): The max. size of an uploaded file - larger ones
+            are rejected (i.e. 413) as soon as the limit is crossed. None for no limit.
+        upload_max_pixels (int | None): The max. number of pixels (i.e. width times
+            height, as read from its header) of an uploaded image. None for no limit.
+        upload_memory_max_bytes (int): The max. size of an uploaded file processed from
+            memory - larger ones are spilled to a temporary file (removed once
+            processed).
     """
 
     app_name: str = "images"
@@ -18,3 +99,117 @@ class Settings(BaseSettings):
     database_url: str = Field(
         ..., env="DATABASE_URL", description="Database connection URL."
     )
+    database_pool_size: int = Field(
+        5, ge=0, description="Number of connections kept open by each pool."
+    )
+    database_max_overflow: int = Field(
+        10, ge=0, description="Max. number of connections opened beyond pool size."
+    )
+    database_pool_timeout: float = Field(
+        30.0, gt=0, description="Max. seconds waited for a connection of a pool."
+    )
+    database_pool_recycle: int = Field(
+        -1, ge=-1, description="Seconds after which connections are reopened."
+    )
+    database_pool_pre_ping: bool = Field(
+        False, description="Test connections when taken from a pool."
+    )
+    asynchronous_processing: bool = Field(
+        False, description="Process uploaded images off the request path."
+    )
+    processing_workers: int | None = Field(
+        None, gt=0, description="Max. number of image processing workers."
+    )
+    processing_max_queued_jobs: int = Field(
+        100, ge=0, description="Max. number of images waiting to be processed."
+    )
+    processing_max_queued_bytes: int = Field(
+        1024**3, gt=0, description="Max. total size of images waiting to be processed."
+    )
+    processing_completion_threads: int = Field(
+        4, gt=0, description="Max. number of threads persisting processed images."
+    )
+    fast_resize: bool = Field(
+        False, description="Resize images via the (reduced decoding) fast path."
+    )
+    rendition_widths: list[PositiveInt] = Field(
+        [], description="Widths images are also saved in."
+    )
+    rendition_max_threads: int = Field(
+        4, gt=0, description="Max. number of threads encoding an image."
+    )
+    deduplication_capacity: int = Field(
+        10_000_000, gt=0, description="Expected number of distinct uploads."
+    )
+    deduplication_error_rate: float = Field(
+        0.01, gt=0, lt=1, description="False positive rate of duplicate detection."
+    )
+    deduplication_refresh_interval: float = Field(
+        10.0, gt=0, description="Time between merges of checksums of other processes."
+    )
+    variants_path: str = Field(
+        "data/variants", description="Directory of cached variants of images."
+    )
+    variants_max_bytes: int = Field(
+        1024**3, gt=0, description="Max. total size of variants cached on disk."
+    )
+    variants_memory_max_bytes: int = Field(
+        64 * 1024**2, gt=0, description="Max. total size of variants cached in memory."
+    )
+    variants_memory_max_item_bytes: int = Field(
+        64 * 1024, gt=0, description="Max. size of a variant cached in memory."
+    )
+    image_cache_max_items: int = Field(
+        10_000, ge=0, description="Max. number of images cached in memory."
+    )
+    image_cache_ttl: float = Field(
+        30.0, ge=0, description="Time images are cached in memory for."
+    )
+    response_compression_min_bytes: int | None = Field(
+        1024, ge=0, description="Min. size of (list) responses compressed."
+    )
+    list_cache_max_age: int = Field(
+        0, ge=0, description="Time lists may be served from caches unrevalidated."
+    )
+    storage_backend: Literal["local", "s3"] = Field(
+        "local", description="Where image files are stored."
+    )
+    storage_s3_bucket: str | None = Field(
+        None, description="Bucket image files are stored in."
+    )
+    storage_s3_endpoint_url: str | None = Field(
+        None, description="URL of the (S3-compatible) object store."
+    )
+    storage_s3_region: str | None = Field(None, description="Region of the bucket.")
+    storage_s3_part_size: int = Field(
+        8 * 1024**2, ge=5 * 1024**2, description="Size of uploaded parts."
+    )
+    output_format: Literal["jpeg", "png", "webp", "avif"] | None = Field(
+        None, description="Format images are saved in."
+    )
+    output_alternate_formats: list[Literal["jpeg", "png", "webp", "avif"]] = Field(
+        [], description="Formats images are also saved in."
+    )
+    output_quality: int = Field(
+        75, ge=1, le=100, description="Quality of lossy formats."
+    )
+    output_optimize: bool = Field(True, description="Optimize JPEGs, PNGs and GIFs.")
+    output_progressive: bool = Field(True, description="Save progressive JPEGs.")
+    output_strip_metadata: bool = Field(
+        True, description="Strip metadata (e.g. EXIF) of images."
+    )
+    output_webp_method: int = Field(
+        4, ge=0, le=6, description="Effort of WebP encoding."
+    )
+    output_avif_speed: int = Field(
+        6, ge=0, le=10, description="Speed of AVIF encoding."
+    )
+    upload_max_bytes: int | None = Field(
+        64 * 1024**2, gt=0, description="Max. size of an uploaded file."
+    )
+    upload_max_pixels: int | None = Field(
+        64_000_000, gt=0, description="Max. number of pixels of an uploaded image."
+    )
+    upload_memory_max_bytes: int = Field(
+        4 * 1024**2, ge=0, description="Max. size of an upload processed from memory."
+    )
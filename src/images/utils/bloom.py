@@ -0,0 +1,55 @@
+import math
+
+
+class BloomFilter:
+    """
+    A Bloom filter of (hexadecimal) SHA-256 checksums.
+
+    Membership tests may yield false positives (at about the configured error rate, as
+    long as no more than capacity checksums are added) but never false negatives.
+
+    NOTE: Since checksums are already uniformly distributed, bit positions are derived
+    from the checksum itself (i.e. double hashing over two 64-bit slices of it) instead
+    of rehashing it.
+
+    Attributes:
+        size (int): The number of bits of the filter.
+        hashes (int): The number of bits set per checksum.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """
+        Initialize the filter.
+
+        Args:
+            capacity (int): The expected number of checksums.
+            error_rate (float): The expected rate of false positives.
+        """
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, checksum: str) -> list[int]:
+        digest = bytes.fromhex(checksum)
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, checksum: str) -> None:
+        """
+        Add a checksum to the filter.
+
+        Args:
+            checksum (str): The SHA-256 checksum.
+        """
+        for position in self._positions(checksum):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, checksum: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(checksum)
+        )
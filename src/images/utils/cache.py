@@ -0,0 +1,324 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Generic, Hashable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class MemoryCache:
+    """
+    An in-memory LRU cache of bytes - bounded by the total size of its values.
+
+    Attributes:
+        max_bytes (int): The max. total size of cached values.
+        max_item_bytes (int): The max. size of a cached value - larger ones are not
+            cached.
+    """
+
+    def __init__(self, max_bytes: int, max_item_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Get a cached value - marking it as the most recently used.
+
+        Args:
+            key (str): The key of the value.
+
+        Returns:
+            bytes | None: The value, if cached.
+        """
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+
+            return value
+
+    def put(self, key: str, value: bytes) -> None:
+        """
+        Cache a value - evicting the least recently used ones to make room for it.
+
+        Args:
+            key (str): The key of the value.
+            value (bytes): The value.
+        """
+        if len(value) > self.max_item_bytes:
+            return
+
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._items[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a value from the cache (if cached).
+
+        Args:
+            key (str): The key of the value.
+        """
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                self._size -= len(value)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """
+        Remove the values whose keys start with a prefix from the cache.
+
+        Args:
+            prefix (str): The prefix of the keys.
+        """
+        with self._lock:
+            for key in [key for key in self._items if key.startswith(prefix)]:
+                self._size -= len(self._items.pop(key))
+
+
+class TTLCache(Generic[T]):
+    """
+    An in-memory LRU cache whose values expire - bounded by the number of its values.
+
+    NOTE: Values are shared by (i.e. returned to) every caller - they must be immutable.
+
+    Attributes:
+        max_items (int): The max. number of cached values.
+        ttl (float): The number of seconds a value is cached for.
+    """
+
+    def __init__(self, max_items: int, ttl: float) -> None:
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> T | None:
+        """
+        Get a cached value - marking it as the most recently used.
+
+        Args:
+            key (Hashable): The key of the value.
+
+        Returns:
+            T | None: The value, if cached (and not expired).
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._items[key]
+                return None
+
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: T) -> None:
+        """
+        Cache a value - evicting the least recently used one to make room for it.
+
+        Args:
+            key (Hashable): The key of the value.
+            value (T): The value.
+        """
+        if self.max_items <= 0 or self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Remove a value from the cache (if cached).
+
+        Args:
+            key (Hashable): The key of the value.
+        """
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class DiskCache:
+    """
+    An on-disk LRU cache of files - bounded by the total size of its files.
+
+    Each value is stored as a file (named after its key) in the cache directory. The
+    directory is scanned on first use, so files cached by previous runs are reused -
+    ordered by their modification time, which is updated whenever they are used.
+
+    NOTE: The index of cached files is local to the process - i.e. processes sharing a
+    directory may (temporarily) exceed max_bytes between them.
+
+    Attributes:
+        directory (str): The directory of cached files.
+        max_bytes (int): The max. total size of cached files.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._files: OrderedDict[str, int] | None = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _load(self) -> OrderedDict[str, int]:
+        if self._files is None:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = sorted(
+                (entry.stat().st_mtime, entry.name, entry.stat().st_size)
+                for entry in os.scandir(self.directory)
+                if entry.is_file() and not entry.name.startswith(".")
+            )
+            self._files = OrderedDict((name, size) for _, name, size in entries)
+            self._size = sum(self._files.values())
+
+        return self._files
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> str | None:
+        """
+        Get the path of a cached file - marking it as the most recently used.
+
+        Args:
+            key (str): The key of the file.
+
+        Returns:
+            str | None: The path to the file, if cached.
+        """
+        with self._lock:
+            files = self._load()
+            if key not in files:
+                return None
+            files.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # NOTE: Evicted by another process sharing the directory.
+            with self._lock:
+                self._forget(key)
+            return None
+
+        return path
+
+    def put(self, key: str, value: bytes) -> str:
+        """
+        Cache a file - evicting the least recently used ones to make room for it.
+
+        Args:
+            key (str): The key of the file.
+            value (bytes): The contents of the file.
+
+        Returns:
+            str: The path to the file.
+        """
+        with self._lock:
+            self._load()
+
+        # NOTE: Written to a temporary file first so the file is never read partially.
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, prefix=".", delete=False
+        ) as tmp:
+            tmp.write(value)
+        os.replace(tmp.name, self._path(key))
+
+        with self._lock:
+            files = self._load()
+            self._forget(key)
+            files[key] = len(value)
+            self._size += len(value)
+            while self._size > self.max_bytes and len(files) > 1:
+                evicted, _ = next(iter(files.items()))
+                self._forget(evicted)
+                try:
+                    os.remove(self._path(evicted))
+                except FileNotFoundError:
+                    pass
+
+        return self._path(key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """
+        Remove the files whose keys start with a prefix from the cache.
+
+        Args:
+            prefix (str): The prefix of the keys.
+        """
+        with self._lock:
+            keys = [key for key in self._load() if key.startswith(prefix)]
+            for key in keys:
+                self._forget(key)
+
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, key: str) -> None:
+        size = self._load().pop(key, None)
+        if size is not None:
+            self._size -= size
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key - i.e. while a call is in flight,
+    further calls with its key wait for (and share) its result instead of calling again.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, function: Callable[[], T]) -> T:
+        """
+        Call a function - unless a call with the same key is in flight.
+
+        Args:
+            key (str): The key of the call.
+            function (Callable[[], T]): The function called.
+
+        Returns:
+            T: The result of the (possibly shared) call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if not leader:
+            return call.result()
+
+        try:
+            call.set_result(function())
+        except BaseException as exc:
+            call.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return call.result()
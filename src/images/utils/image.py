@@ -1,7 +1,183 @@
 import hashlib
+import io
+import logging
+import os.path
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, BinaryIO, Sequence
 
 from PIL import Image as PILImage
 
+from src.images.settings.base import Settings
+from src.images.utils.storage import Storage, Writer, create_file
+
+
+logger = logging.getLogger(__name__)
+
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+# NOTE: Images are reduced (i.e. by an integer factor) only while they remain at least
+# REDUCING_GAP times larger than the target size. 3.0 is (per Pillow's docs) virtually
+# indistinguishable from resampling without reduction.
+REDUCING_GAP = 3.0
+
+# NOTE: The (Pillow) format and extension of each output format - see `Settings`.
+FORMATS = {
+    "jpeg": ("JPEG", ".jpg"),
+    "png": ("PNG", ".png"),
+    "webp": ("WEBP", ".webp"),
+    "avif": ("AVIF", ".avif"),
+}
+
+# NOTE: The magic bytes of (sniffed) formats - i.e. at (offset of) the start of files.
+MAGIC_BYTES = (
+    (0, b"\xff\xd8\xff", "JPEG"),
+    (0, b"\x89PNG\r\n\x1a\n", "PNG"),
+    (0, b"GIF87a", "GIF"),
+    (0, b"GIF89a", "GIF"),
+    (8, b"WEBP", "WEBP"),
+    (0, b"II*\x00", "TIFF"),
+    (0, b"MM\x00*", "TIFF"),
+    (0, b"BM", "BMP"),
+)
+
+# NOTE: The number of bytes magic bytes are found within - see `sniff`.
+MAGIC_BYTES_LENGTH = 12
+
+# NOTE: Image.info kept when metadata is stripped - i.e. what rendering depends on.
+KEPT_INFO = ("icc_profile", "transparency", "dpi", "duration", "loop", "background")
+
+
+@dataclass(frozen=True)
+class EncodingOptions:
+    """
+    Options of encoding (i.e. saving) images - each applied to the formats supporting
+    it.
+
+    Attributes:
+        quality (int): The quality of lossy formats (i.e. JPEG, WebP and AVIF) - 1 to
+            100.
+        optimize (bool): Whether JPEGs (i.e. their Huffman tables), PNGs and GIFs are
+            optimized - smaller, but slower to encode.
+        progressive (bool): Whether JPEGs are progressive.
+        strip_metadata (bool): Whether metadata (e.g. EXIF and comments) is stripped -
+            color profiles are kept, as rendering depends on them.
+        webp_method (int): The effort of WebP encoding - 0 (fast) to 6 (small).
+        avif_speed (int): The speed of AVIF encoding - 0 (small) to 10 (fast).
+    """
+
+    quality: int = 75
+    optimize: bool = True
+    progressive: bool = True
+    strip_metadata: bool = True
+    webp_method: int = 4
+    avif_speed: int = 6
+
+    def strip(self, image: PILImage) -> PILImage:
+        """
+        Get the image to be saved - i.e. without metadata, if stripped.
+
+        NOTE: Some encoders (e.g. of JPEG comments) read metadata from Image.info, so it
+        is dropped from a copy of it - set on a new image sharing the pixels of the
+        given one, which is left as is (e.g. while saved by other threads).
+
+        Args:
+            image (PILImage): The image to be saved.
+
+        Returns:
+            PILImage: The image - itself, if there is no metadata to strip.
+        """
+        if not self.strip_metadata or all(key in KEPT_INFO for key in image.info):
+            return image
+
+        image.load()
+        stripped = image._new(image.im)
+        stripped.info = {
+            key: value for key, value in image.info.items() if key in KEPT_INFO
+        }
+
+        return stripped
+
+    def params(self, image: PILImage, image_format: str) -> dict[str, Any]:
+        """
+        Get the (Pillow) save parameters of the image in the given format.
+
+        NOTE: Metadata is stripped from the image itself - see `strip`.
+
+        Args:
+            image (PILImage): The image to be saved.
+            image_format (str): The (Pillow) format.
+
+        Returns:
+            dict[str, Any]: The parameters.
+        """
+        if self.strip_metadata:
+            params: dict[str, Any] = {}
+        else:
+            params = {"exif": image.info["exif"]} if "exif" in image.info else {}
+
+        if image_format == "JPEG":
+            params.update(
+                quality=self.quality,
+                optimize=self.optimize,
+                progressive=self.progressive,
+            )
+        elif image_format == "WEBP":
+            params.update(quality=self.quality, method=self.webp_method)
+        elif image_format == "AVIF":
+            params.update(quality=self.quality, speed=self.avif_speed)
+        elif image_format in ("PNG", "GIF"):
+            params.update(optimize=self.optimize)
+
+        return params
+
+
+def encoding_options(settings: Settings) -> EncodingOptions:
+    """
+    Get the encoding options configured in the settings.
+
+    Args:
+        settings (Settings): The settings.
+
+    Returns:
+        EncodingOptions: The options.
+    """
+    return EncodingOptions(
+        quality=settings.output_quality,
+        optimize=settings.output_optimize,
+        progressive=settings.output_progressive,
+        strip_metadata=settings.output_strip_metadata,
+        webp_method=settings.output_webp_method,
+        avif_speed=settings.output_avif_speed,
+    )
+
+
+def supported_formats(output_formats: Sequence[str]) -> list[str]:
+    """
+    Filter the output formats Pillow can encode - e.g. AVIF requires Pillow to be built
+    with libavif (or a plugin).
+
+    Args:
+        output_formats (Sequence[str]): The output formats - see `FORMATS`.
+
+    Returns:
+        list[str]: The supported output formats.
+    """
+    extensions = PILImage.registered_extensions()
+    supported = []
+    for output_format in output_formats:
+        image_format, extension = FORMATS[output_format]
+        if extensions.get(extension) == image_format and image_format in PILImage.SAVE:
+            supported.append(output_format)
+        else:
+            logger.warning(f"Output format is not supported by Pillow: {output_format}")
+
+    return supported
+
 
 def sha256_checksum(path: str) -> str:
     """
@@ -22,17 +198,532 @@ def sha256_checksum(path: str) -> str:
     return sha256.hexdigest()
 
 
-def resize(input_image: PILImage, width: int) -> PILImage:
+def sniff(head: bytes) -> str | None:
+    """
+    Identify the format of an image from its magic bytes - see `MAGIC_BYTES`.
+
+    Args:
+        head (bytes): The start of the file - at least MAGIC_BYTES_LENGTH bytes, unless
+            the file is shorter.
+
+    Returns:
+        str | None: The (Pillow) format - or None, if it is not an image (of a
+            sniffed format).
+    """
+    for offset, magic, image_format in MAGIC_BYTES:
+        if head[offset : offset + len(magic)] != magic:
+            continue
+        # NOTE: WebP files are RIFF containers - i.e. RIFF<size>WEBP.
+        if image_format == "WEBP" and head[:4] != b"RIFF":
+            continue
+        return image_format
+
+    return None
+
+
+def header_size(head: bytes, image_format: str) -> tuple[int, int]:
+    """
+    Read the size of an image from its header - i.e. without decoding it.
+
+    Args:
+        head (bytes): The start of the file - i.e. including its header.
+        image_format (str): The (Pillow) format of the image - see `sniff`.
+
+    Returns:
+        tuple[int, int]: The (width, height) of the image.
+
+    Raises:
+        ValueError: If the header is invalid - or incomplete, i.e. longer than head.
+        PIL.Image.DecompressionBombError: If the image is (way) larger than
+            PIL.Image.MAX_IMAGE_PIXELS.
+    """
+    if image_format == "WEBP":
+        return _webp_size(head)
+
+    try:
+        with PILImage.open(io.BytesIO(head), formats=[image_format]) as image:
+            return image.size
+    except (OSError, SyntaxError, struct.error) as exc:
+        raise ValueError(f"invalid (or incomplete) {image_format} header") from exc
+
+
+def _webp_size(head: bytes) -> tuple[int, int]:
+    """
+    Read the size of a WebP image from its (first) chunk - i.e. VP8, VP8L or VP8X.
+
+    NOTE: Pillow only opens (i.e. reads the size of) complete WebP files.
+    """
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30 and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(head) >= 25 and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(head) >= 30:
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+
+    raise ValueError("invalid (or incomplete) WEBP header")
+
+
+def copy_with_checksum(source: BinaryIO, destination: BinaryIO) -> str:
+    """
+    Copy the contents of a file object into another while computing their checksum.
+
+    Args:
+        source (BinaryIO): The file object copied from.
+        destination (BinaryIO): The file object copied to.
+
+    Returns:
+        str: The SHA256 checksum of the copied contents.
+    """
+    sha256 = hashlib.sha256()
+
+    for block in iter(lambda: source.read(COPY_BLOCK_SIZE), b""):
+        sha256.update(block)
+        destination.write(block)
+
+    return sha256.hexdigest()
+
+
+def resize(
+    input_image: PILImage, width: int, fast: bool = False, height: int | None = None
+) -> PILImage:
     """
     Resize the input image (given an expected width) while maintaining the aspect ratio.
 
+    The fast path trades (a barely perceptible amount of) quality for speed and memory
+    when downscaling: JPEGs are decoded at a reduced scale (i.e. 1/2, 1/4 or 1/8 - see
+    `PIL.Image.Image.draft`), as long as they are not loaded yet, and images are reduced
+    by an integer factor before being resampled (see `REDUCING_GAP`).
+
     Args:
         input_image (PILImage): The input image to be resized.
         width (int): The desired width of the output image.
+        fast (bool): Whether to take the fast path.
+        height (int | None): The desired height of the output image - defaults to the
+            one maintaining the aspect ratio of the input image.
 
     Returns:
         PILImage: The resized image.
     """
-    height = int(float(input_image.size[1]) * (width / float(input_image.size[0])))
+    if height is None:
+        width, height = scaled_size(input_image, width)
+
+    if not fast:
+        return input_image.resize((width, height), PILImage.BICUBIC)
+
+    # NOTE: Decodes at the smallest scale still larger than (width, height) - a no-op
+    # for other formats or images already loaded.
+    input_image.draft(None, (width, height))
+
+    return input_image.resize(
+        (width, height), PILImage.BICUBIC, reducing_gap=REDUCING_GAP
+    )
+
+
+def scaled_size(input_image: PILImage, width: int) -> tuple[int, int]:
+    """
+    Compute the size of the input image scaled to the given width - i.e. while
+    maintaining the aspect ratio.
+
+    Args:
+        input_image (PILImage): The input image.
+        width (int): The desired width.
+
+    Returns:
+        tuple[int, int]: The (width, height) of the scaled image.
+    """
+    return width, int(float(input_image.size[1]) * (width / float(input_image.size[0])))
+
+
+def encode(
+    image: PILImage, image_format: str, options: EncodingOptions | None = None
+) -> bytes:
+    """
+    Encode the image in the given format.
+
+    Images with modes the format does not support (e.g. RGBA images as JPEG) are
+    converted to RGB.
+
+    Args:
+        image (PILImage): The image to be encoded.
+        image_format (str): The (Pillow) format - e.g. JPEG, PNG, WEBP.
+        options (EncodingOptions | None): The encoding options - defaults to Pillow's.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    image, params = _prepare(image, image_format, options)
+
+    with io.BytesIO() as buffer:
+        image.save(buffer, format=image_format, **params)
+
+        return buffer.getvalue()
+
+
+def _convert(image: PILImage, image_format: str) -> PILImage:
+    """
+    Convert the image to a mode the format supports - e.g. RGBA images to RGB, for JPEG.
+    """
+    if image_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+        return image.convert("RGB")
+
+    return image
+
+
+def _prepare(
+    image: PILImage, image_format: str, options: EncodingOptions | None
+) -> tuple[PILImage, dict[str, Any]]:
+    """
+    Prepare the image to be saved in the format - i.e. converted and stripped (see
+    `EncodingOptions.strip`) - and its save parameters.
+    """
+    image = _convert(image, image_format)
+    if options is None:
+        return image, {}
+
+    image = options.strip(image)
+
+    return image, options.params(image, image_format)
+
+
+def save(
+    image: PILImage,
+    path: str,
+    timings: dict[str, float] | None = None,
+    storage: Storage | None = None,
+    options: EncodingOptions | None = None,
+) -> tuple[str, int]:
+    """
+    Save the image at the path - in the format implied by the path's extension.
+
+    Locally, the image is encoded in memory, hashed and then written at once - i.e.
+    the checksum is known as soon as the file is written, without reading it back. The
+    directory of the path is created if it does not exist (see `utils.layout`).
+
+    Otherwise (e.g. to S3), the image is hashed as it is encoded and streamed to the
+    storage - see `Storage.writer`.
+
+    Args:
+        image (PILImage): The image to be saved.
+        path (str): The path (i.e. key) the image is saved to.
+        timings (dict[str, float] | None): If given, the time (in seconds) spent
+            encoding, hashing and writing is added - i.e. to encode, checksum and write.
+        storage (Storage | None): The storage the image is saved to - defaults to the
+            local filesystem.
+        options (EncodingOptions | None): The encoding options - defaults to Pillow's.
+
+    Returns:
+        tuple[str, int]: The SHA256 checksum and the size (in bytes) of the saved
+            file - i.e. as counted while written, without reading it back.
+
+    Raises:
+        ValueError: If the format cannot be determined from the path's extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    image_format = PILImage.registered_extensions().get(extension)
+    if image_format is None:
+        raise ValueError(f"unknown file extension: {extension}")
+
+    image, params = _prepare(image, image_format, options)
+
+    if storage is not None and storage.path(path) is None:
+        return _stream(image, image_format, params, path, storage, timings)
+
+    start = time.perf_counter()
+    with io.BytesIO() as buffer:
+        image.save(buffer, format=image_format, **params)
+        encoded = time.perf_counter()
+        with buffer.getbuffer() as data, create_file(path) as output:
+            checksum = hashlib.sha256(data).hexdigest()
+            hashed = time.perf_counter()
+            output.write(data)
+            size = len(data)
+
+    if timings is not None:
+        _add(timings, "encode", encoded - start)
+        _add(timings, "checksum", hashed - encoded)
+        _add(timings, "write", time.perf_counter() - hashed)
+
+    return checksum, size
+
+
+def _add(timings: dict[str, float], stage: str, seconds: float) -> None:
+    timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def _stream(
+    image: PILImage,
+    image_format: str,
+    params: dict[str, Any],
+    path: str,
+    storage: Storage,
+    timings: dict[str, float] | None = None,
+) -> tuple[str, int]:
+    """
+    Save the image to the storage - hashed as it is encoded and streamed, see `save`.
+
+    NOTE: Formats whose encoders seek (e.g. TIFF) cannot be streamed - they are encoded
+    in memory and written at once instead.
+
+    Returns:
+        tuple[str, int]: The SHA256 checksum and the size of the saved file.
+    """
+    start = time.perf_counter()
+    try:
+        with storage.writer(path) as output:
+            sink = _HashingWriter(output)
+            image.save(sink, format=image_format, **params)
+            encoded = time.perf_counter()
+        checksum, size = sink.sha256.hexdigest(), sink.size
+    except io.UnsupportedOperation:
+        with io.BytesIO() as buffer:
+            image.save(buffer, format=image_format, **params)
+            encoded = time.perf_counter()
+            with buffer.getbuffer() as data:
+                checksum, size = hashlib.sha256(data).hexdigest(), len(data)
+                storage.write(path, data)
+
+    if timings is not None:
+        # NOTE: Hashing (and writing, but for the last part) is interleaved with
+        # encoding - i.e. write is the time completing the upload.
+        _add(timings, "encode", encoded - start)
+        _add(timings, "write", time.perf_counter() - encoded)
+
+    return checksum, size
+
+
+class _HashingWriter:
+    """
+    A (write-only, non-seekable) file object hashing (and counting) what is written
+    through it.
+    """
+
+    def __init__(self, output: Writer) -> None:
+        self.output = output
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes | memoryview) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.output.write(data)
+
+    def tell(self) -> int:
+        return self.output.tell()
+
+    def flush(self) -> None:
+        self.output.flush()
+
+    def seek(self, *args: int) -> int:
+        raise io.UnsupportedOperation("seek")
+
+
+@dataclass(frozen=True)
+class RenditionFile:
+    """
+    A (saved) rendition of an image - see `process`.
+
+    Attributes:
+        path (str): The path (i.e. key) the rendition is saved to.
+        width (int): The width of the rendition.
+        height (int): The height of the rendition.
+        size (int): The size (in bytes) of the file.
+        checksum (str): The SHA256 checksum of the file.
+    """
+
+    path: str
+    width: int
+    height: int
+    size: int
+    checksum: str
+
+
+def process(
+    source: str | bytes,
+    output_path: str,
+    width: int,
+    fast: bool = False,
+    timings: dict[str, float] | None = None,
+    storage: Storage | None = None,
+    options: EncodingOptions | None = None,
+    alternate_paths: tuple[str, ...] = (),
+    renditions: tuple[tuple[int, str], ...] = (),
+    rendered: list[RenditionFile] | None = None,
+    max_threads: int = 1,
+    sizes: list[int] | None = None,
+) -> str:
+    """
+    Resize the input image and save it at the output path - and, encoded in other
+    formats, at the alternate paths (if any) and, resized to other widths, at the
+    rendition paths (if any).
+
+    The input image is decoded once: the output image and renditions are resized
+    progressively - i.e. each from the next larger one, from the largest down - and
+    then encoded (and saved) in parallel threads, as Pillow releases the GIL while
+    encoding.
+
+    NOTE: Defined at the module level (i.e. picklable) so it can be run in a process
+    pool.
+
+    Args:
+        source (str | bytes): The path to the input image - or its contents, if in
+            memory (i.e. decoded without a round trip to disk).
+        output_path (str): The path the output image is saved to.
+        width (int): The desired width of the output image.
+        fast (bool): Whether to resize via the fast path - see `resize`.
+        timings (dict[str, float] | None): If given, the time (in seconds) spent in
+            each stage is set - i.e. decode, resize and those set by `save` (summed
+            across threads).
+        storage (Storage | None): The storage the output image is saved to - see
+            `save`.
+        options (EncodingOptions | None): The encoding options - see `save`.
+        alternate_paths (tuple[str, ...]): The paths the output image is also saved to
+            - in the format implied by each path's extension.
+        renditions (tuple[tuple[int, str], ...]): The width and path of each rendition
+            of the output image.
+        rendered (list[RenditionFile] | None): If given, the saved renditions are
+            appended - in the order of renditions.
+        max_threads (int): The max. number of threads saving images in parallel.
+        sizes (list[int] | None): If given, the size (in bytes) of each saved file is
+            appended - i.e. of the output image, its alternate encodings and then its
+            renditions.
+
+    Returns:
+        str: The SHA256 checksum of the output image (i.e. at the output path) - see
+            `save`.
+    """
+    start = time.perf_counter()
+    with PILImage.open(
+        io.BytesIO(source) if isinstance(source, bytes) else source
+    ) as input_image:
+        widths = sorted({width, *(target for target, _ in renditions)}, reverse=True)
+        # NOTE: Loaded explicitly (instead of lazily, while resized) so that decoding
+        # is timed on its own - drafting first, as resize would.
+        if fast:
+            input_image.draft(None, scaled_size(input_image, widths[0]))
+        input_image.load()
+        decoded = time.perf_counter()
+        resized_images: dict[int, PILImage] = {}
+        resized_image = input_image
+        for target in widths:
+            # NOTE: Heights are scaled from the input image - i.e. not rounded anew at
+            # each step.
+            resized_image = resize(
+                resized_image,
+                target,
+                fast=fast,
+                height=scaled_size(input_image, target)[1],
+            )
+            resized_images[target] = resized_image
+        resized = time.perf_counter()
+
+        outputs = [
+            (resized_images[width], output_path),
+            *((resized_images[width], path) for path in alternate_paths),
+            *((resized_images[target], path) for target, path in renditions),
+        ]
+        save_timed = partial(_save_timed, storage=storage, options=options)
+        if max_threads > 1 and len(outputs) > 1:
+            with ThreadPoolExecutor(min(max_threads, len(outputs))) as executor:
+                saved = list(executor.map(save_timed, *zip(*outputs)))
+        else:
+            saved = list(map(save_timed, *zip(*outputs)))
+
+    if timings is not None:
+        timings["decode"] = decoded - start
+        timings["resize"] = resized - decoded
+        for _, _, save_timings in saved:
+            for stage, seconds in save_timings.items():
+                _add(timings, stage, seconds)
+    if sizes is not None:
+        sizes.extend(size for _, size, _ in saved)
+    if rendered is not None:
+        for (target, path), (checksum, size, _) in zip(
+            renditions, saved[1 + len(alternate_paths) :]
+        ):
+            rendered.append(
+                RenditionFile(
+                    path=path,
+                    width=target,
+                    height=resized_images[target].size[1],
+                    size=size,
+                    checksum=checksum,
+                )
+            )
+
+    return saved[0][0]
+
+
+def _save_timed(
+    image: PILImage, path: str, storage: Storage | None, options: EncodingOptions | None
+) -> tuple[str, int, dict[str, float]]:
+    """
+    Save the image - see `save` - timing it on its own (i.e. as saved in a thread).
+    """
+    timings: dict[str, float] = {}
+    checksum, size = save(image, path, timings, storage, options)
+
+    return checksum, size, timings
+
+
+def process_timed(
+    source: str | bytes,
+    output_path: str,
+    width: int,
+    fast: bool = False,
+    storage: Storage | None = None,
+    options: EncodingOptions | None = None,
+    alternate_paths: tuple[str, ...] = (),
+    renditions: tuple[tuple[int, str], ...] = (),
+    max_threads: int = 1,
+) -> tuple[str, dict[str, float], list[RenditionFile], int]:
+    """
+    Process an image - see `process` - timing each stage.
+
+    NOTE: Defined at the module level (i.e. picklable) so that timings (and renditions)
+    of images processed in a process pool are returned to (and recorded by) the parent
+    process.
+
+    Args:
+        source (str | bytes): The path to (or the contents of) the input image - see
+            `process`.
+        output_path (str): The path the output image is saved to.
+        width (int): The desired width of the output image.
+        fast (bool): Whether to resize via the fast path - see `resize`.
+        storage (Storage | None): The storage the output image is saved to - see
+            `save`.
+        options (EncodingOptions | None): The encoding options - see `save`.
+        alternate_paths (tuple[str, ...]): The paths the output image is also saved to
+            - see `process`.
+        renditions (tuple[tuple[int, str], ...]): The width and path of each rendition
+            - see `process`.
+        max_threads (int): The max. number of threads saving images in parallel.
+
+    Returns:
+        tuple[str, dict[str, float], list[RenditionFile], int]: The SHA256 checksum of
+            the output image, the time (in seconds) spent in each stage, the saved
+            renditions and the total size (in bytes) of the saved files.
+    """
+    timings: dict[str, float] = {}
+    rendered: list[RenditionFile] = []
+    sizes: list[int] = []
+    checksum = process(
+        source,
+        output_path,
+        width,
+        fast=fast,
+        timings=timings,
+        storage=storage,
+        options=options,
+        alternate_paths=alternate_paths,
+        renditions=renditions,
+        rendered=rendered,
+        max_threads=max_threads,
+        sizes=sizes,
+    )
 
-    return input_image.resize((width, height), PILImage.BICUBIC)
+    return checksum, timings, rendered, sum(sizes)
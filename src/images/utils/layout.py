@@ -0,0 +1,137 @@
+"""
+This module defines the (on-disk) layout of image files - i.e. sharded in fan-out
+directories, so that no directory holds more than a fraction of the files.
+
+Files are laid out as `<base path>/ab/cd/<name>` - where `abcd` is a prefix of the
+SHA-256 of the image ID. Hashing (instead of using the ID itself) spreads files evenly
+regardless of how IDs are generated - e.g. sequentially. Directories are created lazily
+(i.e. when a file is first written to them - see `utils.image.save`).
+
+Alternate encodings (e.g. WebP - see `alternate_path`) and renditions (see
+`rendition_path`) of an image are laid out next to its file.
+
+With two levels of 256 directories, each leaf holds ~1/65536 of the files - i.e. ~15 for
+a million files.
+"""
+
+import hashlib
+import os.path
+import uuid
+from typing import Iterable
+
+
+def shard(image_id: uuid.UUID) -> str:
+    """
+    Get the (relative) fan-out directory of an image.
+
+    Args:
+        image_id (uuid.UUID): The ID of the image.
+
+    Returns:
+        str: The directory - e.g. ab/cd.
+    """
+    digest = hashlib.sha256(image_id.bytes).hexdigest()
+
+    return f"{digest[:2]}/{digest[2:4]}"
+
+
+def sharded_path(base_path: str, image_id: uuid.UUID, filename: str) -> str:
+    """
+    Build the path of an image file.
+
+    Args:
+        base_path (str): The directory images are stored in.
+        image_id (uuid.UUID): The ID of the image.
+        filename (str): The name of the file.
+
+    Returns:
+        str: The path.
+    """
+    return f"{base_path}/{shard(image_id)}/{filename}"
+
+
+def is_sharded(base_path: str, image_id: uuid.UUID, path: str) -> bool:
+    """
+    Check whether the path of an image file is laid out as per `sharded_path`.
+
+    Args:
+        base_path (str): The directory images are stored in.
+        image_id (uuid.UUID): The ID of the image.
+        path (str): The path of the file.
+
+    Returns:
+        bool: Whether the path is sharded.
+    """
+    return path == sharded_path(base_path, image_id, os.path.basename(path))
+
+
+def alternate_path(path: str, extension: str) -> str:
+    """
+    Build the path of an alternate encoding of an image file - i.e. next to it, with
+    another extension.
+
+    Args:
+        path (str): The path of the image file.
+        extension (str): The extension of the alternate encoding - e.g. .webp.
+
+    Returns:
+        str: The path.
+    """
+    return f"{os.path.splitext(path)[0]}{extension}"
+
+
+def rendition_path(path: str, width: int) -> str:
+    """
+    Build the path of a rendition (i.e. of a given width) of an image file - i.e. next
+    to it, suffixed with the width.
+
+    Args:
+        path (str): The path of the image file.
+        width (int): The width of the rendition.
+
+    Returns:
+        str: The path - e.g. data/images/ab/cd/<file>.320w.jpg.
+    """
+    root, extension = os.path.splitext(path)
+
+    return f"{root}.{width}w{extension}"
+
+
+def alternate_paths(path: str, extensions: Iterable[str]) -> tuple[str, ...]:
+    """
+    Build the paths of the alternate encodings of an image file - see
+    `alternate_path`.
+
+    Args:
+        path (str): The path of the image file.
+        extensions (Iterable[str]): The extension of each alternate encoding.
+
+    Returns:
+        tuple[str, ...]: The paths - excluding (that of the format of) the file itself.
+    """
+    paths = (alternate_path(path, extension) for extension in extensions)
+
+    return tuple(alternate for alternate in paths if alternate != path)
+
+
+def rendition_paths(
+    path: str, widths: Iterable[int], width: int
+) -> tuple[tuple[int, str], ...]:
+    """
+    Build the widths and paths of the renditions of an image file - see
+    `rendition_path`.
+
+    Args:
+        path (str): The path of the image file.
+        widths (Iterable[int]): The width of each rendition.
+        width (int): The width of the image file itself.
+
+    Returns:
+        tuple[tuple[int, str], ...]: The width and path of each rendition - in order of
+            width, excluding the width of the file itself.
+    """
+    return tuple(
+        (target, rendition_path(path, target))
+        for target in sorted(set(widths))
+        if target != width
+    )
@@ -0,0 +1,324 @@
+"""
+This module implements (minimal) metrics - i.e. counters and histograms - exposed in the
+Prometheus text format (see `Registry.render`).
+
+Metrics are cheap to update (i.e. a lock and, for histograms, a bisection), so they can
+be left on in production.
+
+NOTE: Metrics are local to the process - i.e. each (worker) process exposes its own.
+
+Example:
+    To count and time something:
+        requests = Counter("requests_total", "Requests.", ["method"])
+        latency = Histogram("latency_seconds", "Latency.", ["stage"])
+
+        requests.labels(method="GET").inc()
+        with latency.time(stage="decode"):
+            ...
+
+    To render all metrics:
+        text = registry.render()
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Generic, Iterator, Protocol, TypeVar
+
+
+# NOTE: From 1ms to ~30s - i.e. covering both DB round trips and decoding large images.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+# NOTE: The type of the children of a metric - see `Metric`.
+ChildT = TypeVar("ChildT")
+
+
+class Renderable(Protocol):
+    """A metric - as rendered by a registry, whatever the type of its children."""
+
+    def render(self) -> list[str]: ...
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """
+    A registry of metrics - and of collectors, i.e. functions rendering (e.g. gauges of)
+    state kept elsewhere.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list[Renderable] = []
+        self._collectors: list[Callable[[], list[str]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Renderable) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], list[str]]) -> None:
+        """
+        Register a collector.
+
+        Args:
+            collector (Callable[[], list[str]]): A function returning lines in the
+                Prometheus text format.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        Returns:
+            str: The metrics.
+        """
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            lines.extend(collector())
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def family(
+    name: str,
+    documentation: str,
+    kind: str,
+    values: dict[tuple[str, ...], float],
+    labelnames: tuple[str, ...] = (),
+) -> list[str]:
+    """
+    Render a family of samples - e.g. from a collector, of state kept elsewhere.
+
+    Args:
+        name (str): The name of the family.
+        documentation (str): The help of the family.
+        kind (str): The type of the family - e.g. gauge or counter.
+        values (dict[tuple[str, ...], float]): The value of each sample by label
+            values.
+        labelnames (tuple[str, ...]): The names of the labels.
+
+    Returns:
+        list[str]: The lines of the family.
+    """
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labelvalues, value in values.items():
+        labels = _format_labels(dict(zip(labelnames, labelvalues)))
+        lines.append(f"{name}{labels} {_format_value(value)}")
+
+    return lines
+
+
+class Metric(Generic[ChildT]):
+    """
+    Base class for metrics - i.e. a family of children (of type ChildT), one per
+    combination of label values.
+
+    Attributes:
+        name (str): The name of the metric.
+        documentation (str): The help of the metric.
+        labelnames (tuple[str, ...]): The names of the labels of the metric.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: list[str] | tuple[str, ...] = (),
+        registry: Registry | None = registry,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], ChildT] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, **labels: str) -> ChildT:
+        """
+        Get the child of the metric with the given label values - creating it if needed.
+
+        Args:
+            **labels (str): The value of each label.
+
+        Returns:
+            ChildT: The child.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._child())
+
+        return child
+
+    def _child(self) -> ChildT:
+        raise NotImplementedError()
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            lines.extend(self._render(dict(zip(self.labelnames, key)), child))
+
+        return lines
+
+    def _render(self, labels: dict[str, str], child: ChildT) -> list[str]:
+        raise NotImplementedError()
+
+
+class _CounterChild:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(Metric[_CounterChild]):
+    """A counter - i.e. a monotonically increasing value."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increment (the child of) the counter.
+
+        Args:
+            amount (float): The increment.
+            **labels (str): The value of each label.
+        """
+        self.labels(**labels).inc(amount)
+
+    def _child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def _render(self, labels: dict[str, str], child: _CounterChild) -> list[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(Metric[_HistogramChild]):
+    """
+    A histogram - i.e. observations counted in (cumulative) buckets.
+
+    Attributes:
+        buckets (tuple[float, ...]): The upper bounds of the buckets - +Inf is implied.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: list[str] | tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: Registry | None = registry,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Observe a value.
+
+        Args:
+            value (float): The value.
+            **labels (str): The value of each label.
+        """
+        self.labels(**labels).observe(value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observe the time (in seconds) taken by the body of the context.
+
+        Args:
+            **labels (str): The value of each label.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _render(self, labels: dict[str, str], child: _HistogramChild) -> list[str]:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+
+        return lines
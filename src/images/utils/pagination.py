@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+
+
+def encode_cursor(created: datetime, id: UUID) -> str:
+    """
+    Encode the position of an entity (within a list ordered by creation time and ID)
+    as an opaque cursor.
+
+    Args:
+        created (datetime): The creation time of the entity.
+        id (UUID): The ID of the entity.
+
+    Returns:
+        str: The (URL-safe) cursor.
+    """
+    position = json.dumps([created.isoformat(), str(id)], separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decode a cursor built by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        tuple[datetime, UUID]: The creation time and ID of the entity.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created), UUID(id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor}") from exc
@@ -0,0 +1,60 @@
+"""
+This module implements a (thread-safe) token bucket - i.e. to rate-limit work (e.g. IO
+bytes/s) across threads.
+
+Example:
+    To read at most 10 MiB/s:
+        limiter = TokenBucket(rate=10 * 1024**2)
+        for block in iter(lambda: file.read(1024**2), b""):
+            limiter.acquire(len(block))
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A token bucket - tokens are added at a (constant) rate, up to a burst, and taken to
+    do work.
+
+    Taking more tokens than available (e.g. more than the burst) is allowed - the
+    caller then waits for the debt to be repaid, so the rate holds on average.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        burst (float): The max. number of tokens available at once.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate must be positive: {rate}")
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Take tokens - waiting until they are available.
+
+        Args:
+            tokens (float): The number of tokens.
+
+        Returns:
+            float: The time (in seconds) waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
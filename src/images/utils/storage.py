@@ -0,0 +1,447 @@
+"""
+This module defines the storage backends of image files - i.e. where processed images are
+written to (see `utils.image.save`) and served from (see `endpoints.image`).
+
+Files are addressed by key - i.e. Image.path. For the local filesystem the key is the
+path itself, for S3-compatible object stores (e.g. AWS S3, MinIO) it is the object key
+within a bucket.
+
+NOTE: Backends are picklable - i.e. passed to (and used by) the processes of the process
+pool. Clients (e.g. of S3) are created lazily in each process.
+
+Example:
+    To write and read back a file:
+        storage = get_storage(Settings())
+
+        with storage.writer("data/images/ab/cd/image.jpg") as output:
+            output.write(data)
+
+        with storage.open("data/images/ab/cd/image.jpg") as file:
+            data = file.read()
+"""
+
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import IO, Any, BinaryIO, Iterator, Protocol
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from src.images.settings.base import Settings
+
+
+CHUNK_SIZE = 256 * 1024
+
+# NOTE: Objects downloaded to be decoded (e.g. into variants) are kept in memory up to
+# this size - and spilled to a temporary file beyond it.
+SPOOL_MAX_BYTES = 8 * 1024**2
+
+# NOTE: S3's minimum size of (all but the last) part of a multipart upload.
+MIN_PART_SIZE = 5 * 1024**2
+
+
+class Writer(Protocol):
+    """
+    A (write-only, non-seekable) file object - see `Storage.writer`.
+    """
+
+    def write(self, data: bytes | memoryview, /) -> int: ...
+
+    def tell(self) -> int: ...
+
+    def flush(self) -> None: ...
+
+
+class Storage:
+    """
+    Base class for storage backends.
+    """
+
+    def path(self, key: str) -> str | None:
+        """
+        Get the local path of a file - e.g. to be served without copying.
+
+        Args:
+            key (str): The key of the file.
+
+        Returns:
+            str | None: The path - or None, if files are not local.
+        """
+        return None
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[Writer]:
+        """
+        Write a file - streamed, i.e. as it is written to the yielded file object.
+
+        The file is only stored once the context exits - and discarded if it raises.
+
+        Args:
+            key (str): The key of the file.
+
+        Yields:
+            Writer: The (write-only) file object.
+        """
+        raise NotImplementedError()
+
+    def write(self, key: str, data: bytes | memoryview) -> None:
+        """
+        Write a file at once.
+
+        Args:
+            key (str): The key of the file.
+            data (bytes | memoryview): The contents of the file.
+        """
+        with self.writer(key) as output:
+            output.write(data)
+
+    def open(self, key: str) -> IO[bytes]:
+        """
+        Open a file for reading - the file object is seekable (e.g. to be decoded).
+
+        Args:
+            key (str): The key of the file.
+
+        Returns:
+            IO[bytes]: The file object.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        raise NotImplementedError()
+
+    def read(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        """
+        Read (a range of) a file in chunks - e.g. to be served.
+
+        Args:
+            key (str): The key of the file.
+            start (int): The first byte read.
+            end (int | None): The last (inclusive) byte read - defaults to the last byte
+                of the file.
+
+        Yields:
+            bytes: The chunks of the file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        raise NotImplementedError()
+
+    def size(self, key: str) -> int:
+        """
+        Get the size of a file.
+
+        Args:
+            key (str): The key of the file.
+
+        Returns:
+            int: The size (in bytes) of the file.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        raise NotImplementedError()
+
+    def delete(self, key: str) -> None:
+        """
+        Delete a file - a no-op if it does not exist.
+
+        Args:
+            key (str): The key of the file.
+        """
+        raise NotImplementedError()
+
+
+class LocalStorage(Storage):
+    """
+    Files stored in the local filesystem - i.e. keys are paths.
+    """
+
+    def path(self, key: str) -> str | None:
+        return key
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[Writer]:
+        output = create_file(key)
+        try:
+            with output:
+                yield output
+        except BaseException:
+            try:
+                os.remove(key)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def open(self, key: str) -> IO[bytes]:
+        return open(key, "rb")
+
+    def read(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        with open(key, "rb") as file:
+            file.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = file.read(
+                    CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+                )
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(key)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(key)
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage(Storage):
+    """
+    Files stored in a bucket of an S3-compatible object store.
+
+    Files are written via multipart uploads, as they are written - i.e. never staged
+    whole (in memory or on disk): at most a part is buffered. Files smaller than a part
+    are written with a single request.
+
+    NOTE: Credentials are looked up by boto3 - e.g. AWS_ACCESS_KEY_ID and
+    AWS_SECRET_ACCESS_KEY.
+
+    Attributes:
+        bucket (str): The bucket.
+        endpoint_url (str | None): The URL of the object store - defaults to AWS S3.
+        region (str | None): The region of the bucket.
+        part_size (int): The size of (all but the last) part of multipart uploads.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        part_size: int = 8 * 1024**2,
+    ) -> None:
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part size must be at least {MIN_PART_SIZE} bytes")
+
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.part_size = part_size
+        self._client = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        # NOTE: Neither clients nor locks are picklable.
+        state["_client"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        """
+        The S3 client - created once (per process) and shared by threads.
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = boto3.client(
+                        "s3",
+                        endpoint_url=self.endpoint_url,
+                        region_name=self.region,
+                        config=Config(retries={"mode": "standard"}),
+                    )
+        return self._client
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[Writer]:
+        output = _MultipartWriter(self.client, self.bucket, key, self.part_size)
+        try:
+            yield output
+        except BaseException:
+            output.abort()
+            raise
+        output.complete()
+
+    def open(self, key: str) -> IO[bytes]:
+        file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            for chunk in self.read(key):
+                file.write(chunk)
+        except BaseException:
+            file.close()
+            raise
+        file.seek(0)
+
+        return file
+
+    def read(self, key: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        arguments = {"Bucket": self.bucket, "Key": key}
+        if start > 0 or end is not None:
+            arguments["Range"] = f"bytes={start}-{'' if end is None else end}"
+        try:
+            body = self.client.get_object(**arguments)["Body"]
+        except ClientError as exc:
+            _raise_not_found(exc, key)
+            raise
+
+        with body:
+            yield from body.iter_chunks(CHUNK_SIZE)
+
+    def size(self, key: str) -> int:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except ClientError as exc:
+            _raise_not_found(exc, key)
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+class _MultipartWriter:
+    """
+    A (write-only) file object uploading what is written to it in parts - see
+    `S3Storage`.
+    """
+
+    def __init__(self, client: Any, bucket: str, key: str, part_size: int) -> None:
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.upload_id: str | None = None
+        self.parts: list[dict[str, Any]] = []
+        self._buffer = bytearray()
+        self._written = 0
+
+    def write(self, data: bytes | memoryview) -> int:
+        self._buffer += data
+        self._written += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(self._buffer[: self.part_size])
+            del self._buffer[: self.part_size]
+
+        return len(data)
+
+    def tell(self) -> int:
+        return self._written
+
+    def flush(self) -> None:
+        # NOTE: Parts are only uploaded once full - S3 rejects (non-last) smaller ones.
+        pass
+
+    def _upload_part(self, data: bytearray) -> None:
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )["UploadId"]
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=bytes(data),
+        )
+        self.parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def complete(self) -> None:
+        """
+        Store the file - i.e. upload the last part and complete the upload.
+        """
+        if self.upload_id is None:
+            self.client.put_object(
+                Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer)
+            )
+            return
+
+        try:
+            if self._buffer:
+                self._upload_part(self._buffer)
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts},
+            )
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        """
+        Discard the file - i.e. abort the upload, so its parts are not kept (and billed).
+        """
+        if self.upload_id is None:
+            return
+
+        self.client.abort_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+        )
+        self.upload_id = None
+
+
+def _raise_not_found(exc: ClientError, key: str) -> None:
+    """
+    Raise FileNotFoundError if the error is S3's equivalent - e.g. NoSuchKey.
+    """
+    if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+        raise FileNotFoundError(f"object not found: {key}") from exc
+
+
+def create_file(path: str) -> BinaryIO:
+    """
+    Open a file for writing - creating its directory (lazily) if it does not exist.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        BinaryIO: The file object.
+    """
+    try:
+        return open(path, "wb")
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, "wb")
+
+
+def get_storage(settings: Settings) -> Storage:
+    """
+    Get the storage backend configured in the settings.
+
+    Args:
+        settings (Settings): The settings.
+
+    Returns:
+        Storage: The storage backend.
+
+    Raises:
+        ValueError: If the backend is misconfigured - e.g. S3 without a bucket.
+    """
+    if settings.storage_backend == "local":
+        return LocalStorage()
+
+    if settings.storage_s3_bucket is None:
+        raise ValueError("storage_s3_bucket is required by the s3 storage backend")
+
+    return S3Storage(
+        settings.storage_s3_bucket,
+        endpoint_url=settings.storage_s3_endpoint_url,
+        region=settings.storage_s3_region,
+        part_size=settings.storage_s3_part_size,
+    )
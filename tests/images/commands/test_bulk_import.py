@@ -0,0 +1,162 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.images.commands.bulk_import import import_directory, walk
+from src.images.models.database import Session
+from src.images.models.image import Image, ImageStatus, Rendition
+from src.images.utils.image import sha256_checksum
+
+
+@pytest.fixture(scope="function")
+def directory():
+    directory = tempfile.mkdtemp(prefix="import.")
+    os.makedirs(os.path.join(directory, "a"))
+    os.makedirs(os.path.join(directory, "b", "c"))
+    shutil.copyfile(
+        "tests/images/fixtures/large.image.jpg",
+        os.path.join(directory, "a", "large.jpg"),
+    )
+    shutil.copyfile(
+        "tests/images/fixtures/small.image.png",
+        os.path.join(directory, "b", "small.png"),
+    )
+    with open(os.path.join(directory, "b", "c", "not-an-image.jpg"), "wb") as file:
+        file.write(b"not an image")
+    with open(os.path.join(directory, "README.txt"), "w") as file:
+        file.write("not an image file")
+
+    yield directory
+
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestBulkImport:
+    """
+    Test class for the bulk import command.
+    """
+
+    def test_walk(self, directory):
+        """
+        Test method for walking a directory tree - i.e. image files are walked in
+        order, after the given path.
+        """
+        assert list(walk(directory)) == [
+            ["a", "large.jpg"],
+            ["b", "c", "not-an-image.jpg"],
+            ["b", "small.png"],
+        ]
+        assert list(walk(directory, after=["a", "large.jpg"])) == [
+            ["b", "c", "not-an-image.jpg"],
+            ["b", "small.png"],
+        ]
+        assert list(walk(directory, after=["b", "c", "z.jpg"])) == [["b", "small.png"]]
+
+    def test_import_directory(self, directory):
+        """
+        Test method for importing a directory tree - i.e. images are created (CORRUPTED,
+        if they fail to be processed), along with their alternate encodings and
+        renditions, and imports resume from their checkpoint.
+        """
+        output = tempfile.mkdtemp(prefix="imported.")
+        base_path = os.path.join(output, "images")
+        checkpoint_path = os.path.join(output, "checkpoint.json")
+
+        checkpoint = import_directory(
+            directory,
+            base_path,
+            checkpoint_path,
+            batch_size=2,
+            width=100,
+            alternate_formats=("webp",),
+            rendition_widths=(50, 100),
+        )
+
+        assert checkpoint.imported == 2
+        assert checkpoint.failed == 1
+        assert checkpoint.after == ["b", "small.png"]
+        assert os.path.exists(checkpoint_path)
+
+        with Session() as session:
+            images = {
+                os.path.basename(image.path).split(".", 1)[1]: image
+                for image in session.query(Image)
+            }
+            renditions = {
+                rendition.image_id: rendition for rendition in session.query(Rendition)
+            }
+
+        assert images["large.jpg"].status == ImageStatus.DONE
+        assert images["large.jpg"].checksum == sha256_checksum(images["large.jpg"].path)
+        assert images["large.jpg"].source_checksum == sha256_checksum(
+            "tests/images/fixtures/large.image.jpg"
+        )
+        assert images["small.png"].status == ImageStatus.DONE
+        assert images["not-an-image.jpg"].status == ImageStatus.CORRUPTED
+        for name in ("large.jpg", "small.png"):
+            image = images[name]
+            assert os.path.exists(f"{os.path.splitext(image.path)[0]}.webp")
+            assert renditions[image.id].width == 50
+            assert renditions[image.id].checksum == sha256_checksum(
+                renditions[image.id].path
+            )
+        assert len(renditions) == 2
+
+        # NOTE: Resumed from the checkpoint - i.e. there is nothing left to import.
+        checkpoint = import_directory(directory, base_path, checkpoint_path)
+
+        assert checkpoint.imported == 2
+
+        # NOTE: Without the checkpoint, imported images are skipped.
+        os.remove(checkpoint_path)
+        checkpoint = import_directory(directory, base_path, checkpoint_path)
+
+        assert checkpoint.imported == 0
+        assert checkpoint.skipped == 3
+
+        with Session() as session:
+            assert session.query(Image).count() == 3
+
+        shutil.rmtree(output, ignore_errors=True)
+
+    def test_import_directories_with_same_relative_paths(self, directory):
+        """
+        Test method for importing two directory trees sharing relative paths - i.e.
+        their files are distinct images, neither overwriting the other.
+        """
+        other = tempfile.mkdtemp(prefix="import.")
+        os.makedirs(os.path.join(other, "a"))
+        shutil.copyfile(
+            "tests/images/fixtures/small.image.jpg",
+            os.path.join(other, "a", "large.jpg"),
+        )
+        output = tempfile.mkdtemp(prefix="imported.")
+        base_path = os.path.join(output, "images")
+
+        for imported in (directory, other):
+            import_directory(
+                imported,
+                base_path,
+                os.path.join(output, f"{os.path.basename(imported)}.json"),
+                width=100,
+            )
+
+        with Session() as session:
+            images = [
+                image
+                for image in session.query(Image)
+                if image.path.endswith(".large.jpg")
+            ]
+
+        assert len(images) == 2
+        assert {image.source_checksum for image in images} == {
+            sha256_checksum("tests/images/fixtures/large.image.jpg"),
+            sha256_checksum("tests/images/fixtures/small.image.jpg"),
+        }
+        for image in images:
+            assert image.checksum == sha256_checksum(image.path)
+
+        shutil.rmtree(other, ignore_errors=True)
+        shutil.rmtree(output, ignore_errors=True)
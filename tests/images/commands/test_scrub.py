@@ -0,0 +1,118 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import EndpointConnectionError
+
+from src.images.commands.scrub import Position, scrub, scrub_batch
+from src.images.models.image import ImageStatus
+from src.images.services.image import ImageService
+
+
+class TestScrub:
+    """
+    Test class for the scrub command.
+    """
+
+    def test_scrub_batch_resumes_from_position(
+        self, image_service, large_image, small_image
+    ):
+        """
+        Test method for scrubbing batches of images - i.e. each batch resumes after the
+        (persisted) position of the previous one.
+        """
+        large = image_service.create(large_image)
+        small = image_service.create(small_image)
+        path = os.path.join(tempfile.mkdtemp(prefix="scrub."), "position.json")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            position = Position()
+
+            assert scrub_batch(position, executor, batch_size=1) == 1
+            assert position.id == str(large.id)
+
+            position.save(path)
+            position = Position.load(path)
+
+            assert scrub_batch(position, executor, batch_size=1) == 1
+            assert position.id == str(small.id)
+            assert scrub_batch(position, executor, batch_size=1) == 0
+
+        assert position.scrubbed == 2
+        assert position.corrupted == 0
+        assert position.bytes == os.path.getsize(large.path) + os.path.getsize(
+            small.path
+        )
+
+        os.remove(path)
+
+    def test_scrub_marks_mismatches_as_corrupted(
+        self, image_service, large_image, small_image
+    ):
+        """
+        Test method for scrubbing images - i.e. images whose file is truncated (or
+        missing) are marked as CORRUPTED.
+        """
+        large = image_service.create(large_image)
+        small = image_service.create(small_image)
+        with open(large.path, "r+b") as file:
+            file.truncate(100)
+        path = os.path.join(tempfile.mkdtemp(prefix="scrub."), "position.json")
+
+        position = scrub(
+            path,
+            batch_size=1,
+            max_bytes_per_second=1024**3,
+            max_rows_per_second=1000,
+            once=True,
+        )
+
+        assert position.passes == 1
+        assert position.scrubbed == 2
+        assert position.corrupted == 1
+        assert position.created is None
+
+        image_service.session.expire_all()
+
+        assert image_service.get(large.id).status == ImageStatus.CORRUPTED
+        assert image_service.get(small.id).status == ImageStatus.DONE
+
+        os.remove(small.path)
+        position = scrub(path, once=True)
+
+        assert position.passes == 2
+        assert position.scrubbed == 3
+        assert position.corrupted == 2
+
+        os.remove(path)
+
+    def test_scrub_batch_skips_storage_failures(
+        self, image_service, s3_storage, large_image, monkeypatch
+    ):
+        """
+        Test method for scrubbing images stored in S3 while it fails - i.e. images are
+        skipped (neither marked CORRUPTED nor failing the scrubber).
+        """
+        image = ImageService(
+            base_path="images", storage=s3_storage, session=image_service.session
+        ).create(large_image)
+        monkeypatch.setattr("src.images.commands.scrub.storage", s3_storage)
+
+        def get_object(**kwargs):
+            raise EndpointConnectionError(endpoint_url="http://s3.invalid")
+
+        monkeypatch.setattr(s3_storage.client, "get_object", get_object)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            position = Position()
+
+            assert scrub_batch(position, executor, batch_size=10) == 1
+
+        assert position.id == str(image.id)
+        assert position.scrubbed == 0
+        assert position.skipped == 1
+        assert position.corrupted == 0
+
+        image_service.session.expire_all()
+
+        assert image_service.get(image.id).status == ImageStatus.DONE
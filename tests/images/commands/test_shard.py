@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+from sqlalchemy import update
+
+from src.images.commands import shard
+from src.images.commands.shard import migrate
+from src.images.models.image import Image
+from src.images.utils.image import sha256_checksum
+from src.images.utils.layout import is_sharded
+
+
+class TestShard:
+    """
+    Test class for the shard (i.e. layout migration) command.
+    """
+
+    def test_migrate(self, image_service, large_image, small_image, monkeypatch):
+        """
+        Test method for migrating images to the sharded layout - i.e. files are moved,
+        paths rewritten and migrations resume from their checkpoint.
+        """
+        monkeypatch.setattr(shard.settings, "image_cache_ttl", 0.0)
+        image_service.base_path = tempfile.mkdtemp(prefix="shard.")
+        images = [image_service.create(large_image), image_service.create(small_image)]
+        # NOTE: Images are laid out flat - i.e. as before sharding.
+        flat_paths = {}
+        for image in images:
+            flat_paths[image.id] = os.path.join(
+                image_service.base_path, os.path.basename(image.path)
+            )
+            os.rename(image.path, flat_paths[image.id])
+            image_service.session.execute(
+                update(Image)
+                .where(Image.id == image.id)
+                .values(path=flat_paths[image.id])
+            )
+        image_service.session.commit()
+        migration_path = os.path.join(image_service.base_path, "migration.json")
+
+        migration = migrate(
+            migration_path, base_path=image_service.base_path, batch_size=1, grace=0
+        )
+
+        assert migration.migrated == 2
+        assert migration.skipped == 0
+        assert migration.pending == []
+
+        image_service.session.expire_all()
+        for image in images:
+            image = image_service.get(image.id)
+
+            assert is_sharded(image_service.base_path, image.id, image.path)
+            assert image.checksum == sha256_checksum(image.path)
+            assert not os.path.exists(flat_paths[image.id])
+
+        migration = migrate(migration_path, base_path=image_service.base_path)
+
+        assert migration.migrated == 2
+
+        shutil.rmtree(image_service.base_path, ignore_errors=True)
+
+    def test_migrate_with_grace_shorter_than_image_cache_ttl(self):
+        """
+        Test method for migrating images with a grace period shorter than images are
+        cached for - i.e. rejected, since cached rows could outlive the former files.
+        """
+        with pytest.raises(ValueError):
+            migrate("migration.json", grace=shard.settings.image_cache_ttl / 2)
@@ -3,13 +3,18 @@ import os
 import shutil
 import tempfile
 
+import boto3
 import pytest
+from moto import mock_aws
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
 from src.images.models.base import DeclarativeBase
-from src.images.models.database import Session
+from src.images.models.database import Session, async_url
 from src.images.services.image import ImageService, TmpImage
 from src.images.settings.base import Settings
+from src.images.utils.storage import MIN_PART_SIZE, S3Storage
 
 
 engine = create_engine(Settings().database_url)
@@ -44,6 +49,20 @@ def database_setup_and_teardown(database_engine):
     session.commit()
 
 
+@pytest.fixture(scope="session")
+def async_sessions():
+    """
+    Returns an asyncio sessionmaker - whose connections are not pooled, since each test
+    runs its own event loop (i.e. asyncio.run).
+    """
+    return async_sessionmaker(
+        bind=create_async_engine(
+            async_url(Settings().database_url), poolclass=NullPool
+        ),
+        expire_on_commit=False,
+    )
+
+
 @pytest.fixture(scope="function")
 def image_service():
     service = ImageService(base_path=tempfile.gettempdir())
@@ -51,6 +70,18 @@ def image_service():
     service.session.rollback()
 
 
+@pytest.fixture(scope="function")
+def s3_storage(monkeypatch):
+    """
+    Returns an S3 storage backed by a (local, in-process) stand-in of S3 - i.e. moto.
+    """
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="images")
+        yield S3Storage("images", region="us-east-1", part_size=MIN_PART_SIZE)
+
+
 def tmp_image(path):
     prefix, suffix = os.path.splitext(os.path.basename(path))
     with (
@@ -71,7 +102,10 @@ def tmp_image(path):
 
 def cleanup_tmp_image(tmp, image_service):
     for path in glob.glob(
-        os.path.join(image_service.base_path, f"*{os.path.basename(tmp.path)}")
+        # NOTE: Files are sharded - see utils.layout.
+        os.path.join(
+            image_service.base_path, "*", "*", f"*{os.path.basename(tmp.path)}"
+        )
     ):
         try:
             os.remove(path)
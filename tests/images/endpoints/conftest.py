@@ -5,4 +5,7 @@ from src.images.endpoints.app import app
 
 @pytest.fixture(scope="session")
 def test_app():
-    return TestClient(app)
+    # NOTE: Used as a context manager so that all requests are handled by the same
+    # event loop - which (pooled) asyncio database connections are bound to.
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,30 @@
+class TestGetPoolsEndpoint:
+    """
+    Test class for the get (connection) pools endpoint.
+    """
+
+    resource: str = "/api/database/pools"
+
+    def test_when_get_pools_is_successful(self, test_app):
+        """
+        Test case for getting the stats of the connection pools - i.e. after a request
+        is handled, its connection is back in the pool.
+
+        Args:
+            test_app: The test client for the application.
+
+        Returns:
+            None
+        """
+        assert test_app.get("/api/list").status_code == 200
+
+        response = test_app.get(self.resource)
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"sync", "asyncio"}
+
+        stats = response.json()["asyncio"]
+        assert stats["checked_out"] == 0
+        assert stats["checked_in"] >= 1
+        assert stats["waits"] >= 1
+        assert stats["max_wait_seconds"] <= stats["wait_seconds"]
@@ -1,9 +1,21 @@
+import asyncio
+import glob
+import io
 import json
 import os.path
+import uuid
+from functools import partial
 
 import pytest
+from PIL import Image as PILImage
 
-from src.images.models.image import Image
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.images.endpoints.responses import FileRangeResponse
+from src.images.models.image import Image, ImageStatus, Rendition
+from src.images.services import image as image_module
+from src.images.services.image import ImageService
+from src.images.services.workers import JobQueue, shutdown
 
 
 # TODO: Fix storage leak of images in test cases on this module.
@@ -61,19 +73,182 @@ class TestCreateImageEndpoint:
         assert response.json()["checksum"] == str(an_image.checksum)
         assert response.json()["status"] == str(an_image.status.value)
 
+    def test_when_create_image_is_duplicate(self, test_app, image_service, large_image):
+        """
+        Test case for creating an image from a file that was already uploaded.
 
-class TestListImagesEndpoint:
-    """
-    Test class for the list images endpoint.
-    """
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
 
-    resource: str = "/api/list"
+        Returns:
+            None
+        """
+        responses = []
+        for _ in range(2):
+            with open(large_image.path, "rb") as image_file:
+                responses.append(
+                    test_app.post(
+                        self.resource,
+                        files={
+                            "image_file": (
+                                os.path.basename(large_image.path),
+                                image_file,
+                                large_image.content_type,
+                            )
+                        },
+                    )
+                )
 
-    def test_when_list_images_is_successful(
-        self, test_app, image_service, large_image, small_image
+        assert image_service.session.query(Image).count() == 1
+        assert [response.status_code for response in responses] == [201, 201]
+        assert responses[0].json()["id"] == responses[1].json()["id"]
+
+    def test_when_create_image_is_asynchronous(
+        self, test_app, image_service, large_image, monkeypatch
     ):
         """
-        Test case for listing images successfully.
+        Test case for creating an image that is processed asynchronously.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(
+            "src.images.endpoints.dependencies.ImageService",
+            partial(ImageService, asynchronous=True),
+        )
+
+        with open(large_image.path, "rb") as image_file:
+            response = test_app.post(
+                self.resource,
+                files={
+                    "image_file": (
+                        os.path.basename(large_image.path),
+                        image_file,
+                        large_image.content_type,
+                    )
+                },
+            )
+
+        assert response.status_code == 202
+        assert response.json()["status"] == ImageStatus.IN_PROGRESS.value
+        assert response.json()["checksum"] is None
+        assert (
+            response.headers["Location"]
+            == f"/api/images/{response.json()['id']}/status"
+        )
+
+        # Waits for the image to be processed.
+        shutdown()
+
+        response = test_app.get(response.headers["Location"])
+
+        an_image = image_service.session.query(Image).one()
+
+        assert response.status_code == 200
+        assert response.json()["id"] == str(an_image.id)
+        assert response.json()["status"] == ImageStatus.DONE.value
+        assert response.json()["checksum"] == str(an_image.checksum)
+
+    @pytest.mark.parametrize("asynchronous", [False, True])
+    @pytest.mark.parametrize("memory_max_bytes", [0, 4 * 1024**2])
+    def test_when_create_image_is_spilled(
+        self,
+        test_app,
+        image_service,
+        large_image,
+        monkeypatch,
+        asynchronous,
+        memory_max_bytes,
+    ):
+        """
+        Test case for creating an image from an upload kept in memory or spilled to a
+        temporary file - i.e. deleted once processed.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(
+            "src.images.endpoints.image.settings.upload_memory_max_bytes",
+            memory_max_bytes,
+        )
+        monkeypatch.setattr(
+            "src.images.endpoints.dependencies.ImageService",
+            partial(ImageService, asynchronous=asynchronous),
+        )
+        filename = os.path.basename(large_image.path)
+        prefix, suffix = os.path.splitext(filename)
+
+        with open(large_image.path, "rb") as image_file:
+            response = test_app.post(
+                self.resource,
+                files={"image_file": (filename, image_file, large_image.content_type)},
+            )
+        # Waits for the image to be processed.
+        shutdown()
+
+        an_image = image_service.session.query(Image).one()
+
+        assert response.status_code in (201, 202)
+        assert an_image.status == ImageStatus.DONE
+        assert an_image.path.endswith(f"{an_image.id}.{filename}") == (
+            memory_max_bytes > 0
+        )
+        assert (
+            glob.glob(
+                os.path.join(
+                    os.path.dirname(large_image.path),
+                    f"{prefix}.*{suffix}",
+                )
+            )
+            == []
+        )
+
+    def test_when_create_image_is_overloaded(self, test_app, large_image, monkeypatch):
+        """
+        Test case for creating an image while too many images are being processed.
+
+        Args:
+            test_app: The test client for the application.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        queue = JobQueue(max_workers=1, max_queued_jobs=0, max_queued_bytes=1)
+        monkeypatch.setattr("src.images.services.image.jobs", queue)
+
+        with queue.admit([1]), open(large_image.path, "rb") as image_file:
+            response = test_app.post(
+                self.resource,
+                files={
+                    "image_file": (
+                        os.path.basename(large_image.path),
+                        image_file,
+                        large_image.content_type,
+                    )
+                },
+            )
+
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        assert queue.stats().rejected == 1
+        assert test_app.get("/api/processing/queue").status_code == 200
+
+    def test_when_create_image_is_not_an_image(self, test_app, image_service):
+        """
+        Test case for creating an image from a file that is not an image - i.e. rejected
+        (by its magic bytes) while received.
 
         Args:
             test_app: The test client for the application.
@@ -82,51 +257,984 @@ class TestListImagesEndpoint:
         Returns:
             None
         """
+        response = test_app.post(
+            self.resource,
+            files={"image_file": ("image.jpg", b"not an image" * 100, "image/jpeg")},
+        )
+
+        assert response.status_code == 415
+        assert response.headers["Connection"] == "close"
         assert image_service.session.query(Image).count() == 0
 
-        for image in [large_image, small_image]:
-            with open(image.path, "rb") as image_file:
-                test_app.post(
-                    "/api/submit",
-                    files={
-                        "image_file": (
-                            os.path.basename(image.path),
-                            image_file,
-                            image.content_type,
-                        )
-                    },
+    def test_when_create_image_header_is_beyond_head(
+        self, test_app, image_service, large_image, monkeypatch
+    ):
+        """
+        Test case for creating an image whose header lies beyond the sniffed head (e.g.
+        after large APPn segments of a JPEG) - i.e. it is not rejected as invalid.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(
+            "src.images.endpoints.uploads.settings.upload_max_pixels", 1
+        )
+        with open(large_image.path, "rb") as image_file:
+            content = image_file.read()
+        # NOTE: Two (max. sized) APP15 segments right after SOI - i.e. 128 KiB.
+        segment = b"\xff\xef" + (65535).to_bytes(2, "big") + b"\x00" * 65533
+        content = content[:2] + segment * 2 + content[2:]
+
+        response = test_app.post(
+            self.resource,
+            files={
+                "image_file": (
+                    os.path.basename(large_image.path),
+                    content,
+                    large_image.content_type,
                 )
+            },
+        )
 
-        response = test_app.get(self.resource)
+        assert response.status_code == 201
+        assert image_service.session.query(Image).count() == 1
 
-        expected_list = image_service.list()
-        expected_large_image = expected_list.query.first()
-        expected_small_image = expected_list.query.all()[-1]
+    @pytest.mark.parametrize(
+        "setting, limit",
+        [("upload_max_bytes", 1000), ("upload_max_pixels", 1000)],
+    )
+    def test_when_create_image_is_too_large(
+        self, test_app, image_service, large_image, monkeypatch, setting, limit
+    ):
+        """
+        Test case for creating an image larger than the limits - i.e. of bytes (by its
+        Content-Length) or pixels (by its header) - rejected while received.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(f"src.images.endpoints.uploads.settings.{setting}", limit)
+
+        with open(large_image.path, "rb") as image_file:
+            response = test_app.post(
+                self.resource,
+                files={
+                    "image_file": (
+                        os.path.basename(large_image.path),
+                        image_file,
+                        large_image.content_type,
+                    )
+                },
+            )
+
+        assert response.status_code == 413
+        assert str(limit) in response.json()["detail"]
+        assert image_service.session.query(Image).count() == 0
+
+
+class TestCreateImagesEndpoint:
+    """
+    Test class for the create images (i.e. batch) endpoint.
+    """
+
+    resource: str = "/api/submit/batch"
+
+    def test_when_create_images_is_successful(
+        self, test_app, image_service, large_image, small_image
+    ):
+        """
+        Test case for creating a batch of images - i.e. a file that is not an image
+        does not fail the batch.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+
+        Returns:
+            None
+        """
+        with (
+            open(large_image.path, "rb") as large_file,
+            open(small_image.path, "rb") as small_file,
+        ):
+            response = test_app.post(
+                self.resource,
+                files=[
+                    (
+                        "image_files",
+                        (
+                            os.path.basename(large_image.path),
+                            large_file,
+                            large_image.content_type,
+                        ),
+                    ),
+                    (
+                        "image_files",
+                        ("not-an-image.jpg", b"not an image", "image/jpeg"),
+                    ),
+                    (
+                        "image_files",
+                        (
+                            os.path.basename(small_image.path),
+                            small_file,
+                            small_image.content_type,
+                        ),
+                    ),
+                ],
+            )
 
         assert response.status_code == 200
-        assert len(response.json()) == expected_list.query.count() == 2
+        assert image_service.session.query(Image).count() == 3
 
-        large_image = response.json()[0]
-        small_image = response.json()[1]
+        large, not_an_image, small = response.json()
 
-        assert large_image["id"] == str(expected_large_image.id)
-        assert large_image["created"] == expected_large_image.created.strftime(
-            "%Y-%m-%dT%H:%M:%S.%fZ"
-        )
-        assert large_image["updated"] == expected_large_image.updated.strftime(
-            "%Y-%m-%dT%H:%M:%S.%fZ"
+        assert large["filename"] == os.path.basename(large_image.path)
+        assert large["status_code"] == small["status_code"] == 201
+        assert large["image"]["status"] == small["image"]["status"] == "DONE"
+        assert not_an_image["status_code"] == 201
+        assert not_an_image["image"]["status"] == ImageStatus.CORRUPTED.value
+        assert not_an_image["image"]["checksum"] is None
+
+    def test_when_create_images_is_too_large(
+        self, test_app, image_service, large_image, small_image, monkeypatch
+    ):
+        """
+        Test case for creating a batch with an image larger than the limit of bytes -
+        i.e. rejected while its body is parsed.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(
+            "src.images.endpoints.uploads.settings.upload_max_bytes",
+            os.path.getsize(large_image.path) - 1,
         )
-        assert large_image["path"] == expected_large_image.path
-        assert large_image["checksum"] == expected_large_image.checksum
-        assert large_image["status"] == expected_large_image.status.value
 
-        assert small_image["id"] == str(expected_small_image.id)
-        assert small_image["created"] == expected_small_image.created.strftime(
-            "%Y-%m-%dT%H:%M:%S.%fZ"
+        with (
+            open(large_image.path, "rb") as large_file,
+            open(small_image.path, "rb") as small_file,
+        ):
+            response = test_app.post(
+                self.resource,
+                files=[
+                    (
+                        "image_files",
+                        (
+                            os.path.basename(small_image.path),
+                            small_file,
+                            small_image.content_type,
+                        ),
+                    ),
+                    (
+                        "image_files",
+                        (
+                            os.path.basename(large_image.path),
+                            large_file,
+                            large_image.content_type,
+                        ),
+                    ),
+                ],
+            )
+
+        assert response.status_code == 413
+        assert image_service.session.query(Image).count() == 0
+
+
+class TestGetImageEndpoint:
+    """
+    Test class for the get image endpoint.
+    """
+
+    resource: str = "/api/images/{image_id}"
+
+    def test_when_get_image_is_cached(
+        self, test_app, image_service, large_image, monkeypatch
+    ):
+        """
+        Test case for getting an image (with renditions) twice - i.e. the second time
+        from memory, without a database round trip.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(
+            "src.images.endpoints.dependencies.ImageService",
+            partial(ImageService, rendition_widths=(320,)),
         )
-        assert small_image["updated"] == expected_small_image.updated.strftime(
-            "%Y-%m-%dT%H:%M:%S.%fZ"
+
+        with open(large_image.path, "rb") as image_file:
+            created = test_app.post(
+                "/api/submit",
+                files={
+                    "image_file": (
+                        os.path.basename(large_image.path),
+                        image_file,
+                        large_image.content_type,
+                    )
+                },
+            ).json()
+
+        response = test_app.get(self.resource.format(image_id=created["id"]))
+
+        assert response.status_code == 200
+        assert response.json()["path"] == created["path"]
+        assert response.json()["status"] == ImageStatus.DONE.value
+        assert [r["width"] for r in response.json()["renditions"]] == [320]
+
+        async def execute(*args, **kwargs):
+            raise AssertionError("database is not hit")
+
+        monkeypatch.setattr(AsyncSession, "execute", execute)
+
+        assert test_app.get(self.resource.format(image_id=created["id"])).json() == (
+            response.json()
         )
-        assert small_image["path"] == expected_small_image.path
-        assert small_image["checksum"] == expected_small_image.checksum
-        assert small_image["status"] == expected_small_image.status.value
+
+        monkeypatch.undo()
+        os.remove(response.json()["renditions"][0]["path"])
+
+    def test_when_image_is_not_found(self, test_app):
+        """
+        Test case for getting an image that does not exist.
+
+        Args:
+            test_app: The test client for the application.
+
+        Returns:
+            None
+        """
+        response = test_app.get(self.resource.format(image_id=uuid.uuid4()))
+
+        assert response.status_code == 404
+
+
+class TestDeleteImageEndpoint:
+    """
+    Test class for the delete image endpoint.
+    """
+
+    resource: str = "/api/images/{image_id}"
+
+    def test_when_delete_image_is_successful(
+        self, test_app, image_service, large_image, monkeypatch
+    ):
+        """
+        Test case for deleting a (cached) image - i.e. its row, its files and its
+        cached row are deleted.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(
+            "src.images.endpoints.dependencies.ImageService",
+            partial(ImageService, rendition_widths=(320,)),
+        )
+
+        with open(large_image.path, "rb") as image_file:
+            created = test_app.post(
+                "/api/submit",
+                files={
+                    "image_file": (
+                        os.path.basename(large_image.path),
+                        image_file,
+                        large_image.content_type,
+                    )
+                },
+            ).json()
+        image = test_app.get(self.resource.format(image_id=created["id"])).json()
+
+        response = test_app.delete(self.resource.format(image_id=created["id"]))
+
+        assert response.status_code == 204
+        assert image_service.session.query(Image).count() == 0
+        assert image_service.session.query(Rendition).count() == 0
+        assert not os.path.exists(image["path"])
+        assert not os.path.exists(image["renditions"][0]["path"])
+        assert (
+            test_app.get(self.resource.format(image_id=created["id"])).status_code
+            == 404
+        )
+        assert (
+            test_app.delete(self.resource.format(image_id=created["id"])).status_code
+            == 404
+        )
+
+    def test_when_delete_image_is_in_progress(self, test_app, image_service):
+        """
+        Test case for deleting an image being processed.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+
+        Returns:
+            None
+        """
+        image = Image(id=uuid.uuid4())
+        image.reserve(os.path.join(image_service.base_path, f"{image.id}.jpg"))
+        image_service.session.add(image)
+        image_service.session.commit()
+
+        response = test_app.delete(self.resource.format(image_id=image.id))
+
+        assert response.status_code == 409
+        assert image_service.session.query(Image).count() == 1
+
+
+class TestGetImageStatusEndpoint:
+    """
+    Test class for the get image status endpoint.
+    """
+
+    resource: str = "/api/images/{image_id}/status"
+
+    def test_when_image_is_not_found(self, test_app):
+        """
+        Test case for getting the status of an image that does not exist.
+
+        Args:
+            test_app: The test client for the application.
+
+        Returns:
+            None
+        """
+        response = test_app.get(self.resource.format(image_id=uuid.uuid4()))
+
+        assert response.status_code == 404
+
+
+class TestListImagesEndpoint:
+    """
+    Test class for the list images endpoint.
+    """
+
+    resource: str = "/api/list"
+
+    def test_when_list_images_is_successful(
+        self, test_app, image_service, large_image, small_image
+    ):
+        """
+        Test case for listing images successfully.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+
+        Returns:
+            None
+        """
+        assert image_service.session.query(Image).count() == 0
+
+        for image in [large_image, small_image]:
+            with open(image.path, "rb") as image_file:
+                test_app.post(
+                    "/api/submit",
+                    files={
+                        "image_file": (
+                            os.path.basename(image.path),
+                            image_file,
+                            image.content_type,
+                        )
+                    },
+                )
+
+        response = test_app.get(self.resource)
+
+        expected_list = image_service.list()
+        expected_large_image = expected_list.query.first()
+        expected_small_image = expected_list.query.all()[-1]
+
+        assert response.status_code == 200
+        assert len(response.json()) == expected_list.query.count() == 2
+
+        large_image = response.json()[0]
+        small_image = response.json()[1]
+
+        assert large_image["id"] == str(expected_large_image.id)
+        assert large_image["created"] == expected_large_image.created.strftime(
+            "%Y-%m-%dT%H:%M:%S.%fZ"
+        )
+        assert large_image["updated"] == expected_large_image.updated.strftime(
+            "%Y-%m-%dT%H:%M:%S.%fZ"
+        )
+        assert large_image["path"] == expected_large_image.path
+        assert large_image["checksum"] == expected_large_image.checksum
+        assert large_image["status"] == expected_large_image.status.value
+
+        assert small_image["id"] == str(expected_small_image.id)
+        assert small_image["created"] == expected_small_image.created.strftime(
+            "%Y-%m-%dT%H:%M:%S.%fZ"
+        )
+        assert small_image["updated"] == expected_small_image.updated.strftime(
+            "%Y-%m-%dT%H:%M:%S.%fZ"
+        )
+        assert small_image["path"] == expected_small_image.path
+        assert small_image["checksum"] == expected_small_image.checksum
+        assert small_image["status"] == expected_small_image.status.value
+        assert large_image["renditions"] == small_image["renditions"] == []
+
+    def test_when_list_images_is_not_modified(
+        self, test_app, image_service, large_image, small_image, monkeypatch
+    ):
+        """
+        Test case for listing images conditionally - i.e. answered with 304 (without
+        listing images) until images change.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+
+        def submit(image):
+            with open(image.path, "rb") as image_file:
+                test_app.post(
+                    "/api/submit",
+                    files={
+                        "image_file": (
+                            os.path.basename(image.path),
+                            image_file,
+                            image.content_type,
+                        )
+                    },
+                )
+
+        submit(large_image)
+        response = test_app.get(self.resource)
+        etag = response.headers["ETag"]
+
+        assert response.status_code == 200
+        assert etag.startswith('W/"')
+        assert "must-revalidate" in response.headers["Cache-Control"]
+
+        async def alist_rows(*args, **kwargs):
+            raise AssertionError("images listed")
+
+        with monkeypatch.context() as context:
+            context.setattr(ImageService, "alist_rows", alist_rows)
+            not_modified = test_app.get(self.resource, headers={"If-None-Match": etag})
+        # NOTE: Last-Modified is not a validator of lists (see list_images).
+        modified_since = test_app.get(
+            self.resource,
+            headers={"If-Modified-Since": response.headers["Last-Modified"]},
+        )
+
+        assert not_modified.status_code == 304
+        assert modified_since.status_code == 200
+        assert not_modified.headers["ETag"] == etag
+        assert not_modified.content == b""
+
+        submit(small_image)
+        response = test_app.get(self.resource, headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert len(response.json()) == 2
+
+    @pytest.mark.parametrize("asynchronous", [False, True])
+    def test_when_list_images_has_renditions(
+        self, test_app, image_service, large_image, monkeypatch, asynchronous
+    ):
+        """
+        Test case for listing images with renditions - i.e. recorded when the image
+        is processed (in the process pool, too) and listed from the database.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(
+            "src.images.endpoints.dependencies.ImageService",
+            partial(
+                ImageService,
+                asynchronous=asynchronous,
+                rendition_widths=(640, 320, 1500),
+            ),
+        )
+
+        with open(large_image.path, "rb") as image_file:
+            test_app.post(
+                "/api/submit",
+                files={
+                    "image_file": (
+                        os.path.basename(large_image.path),
+                        image_file,
+                        large_image.content_type,
+                    )
+                },
+            )
+        # Waits for the image to be processed.
+        shutdown()
+
+        response = test_app.get(self.resource)
+
+        assert response.status_code == 200
+
+        (an_image,) = response.json()
+        renditions = an_image["renditions"]
+
+        assert [rendition["width"] for rendition in renditions] == [320, 640]
+        for rendition in renditions:
+            assert rendition["path"] != an_image["path"]
+            assert rendition["size"] == os.path.getsize(rendition["path"])
+            with PILImage.open(rendition["path"]) as img:
+                assert img.size == (rendition["width"], rendition["height"])
+            os.remove(rendition["path"])
+
+    def test_when_list_images_is_paginated_by_cursor(
+        self, test_app, image_service, large_image, small_image
+    ):
+        """
+        Test case for listing images by following X-Next-Cursor.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+
+        Returns:
+            None
+        """
+        for image in [large_image, small_image]:
+            with open(image.path, "rb") as image_file:
+                test_app.post(
+                    "/api/submit",
+                    files={
+                        "image_file": (
+                            os.path.basename(image.path),
+                            image_file,
+                            image.content_type,
+                        )
+                    },
+                )
+
+        expected_ids = [str(image.id) for image in image_service.list().query]
+
+        response = test_app.get(self.resource, params={"limit": 1})
+
+        assert response.status_code == 200
+        assert [image["id"] for image in response.json()] == expected_ids[:1]
+
+        response = test_app.get(
+            self.resource,
+            params={"limit": 1, "after": response.headers["X-Next-Cursor"]},
+        )
+
+        assert response.status_code == 200
+        assert [image["id"] for image in response.json()] == expected_ids[1:]
+
+        response = test_app.get(
+            self.resource,
+            params={"limit": 1, "after": response.headers["X-Next-Cursor"]},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == []
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_when_list_images_is_compressed(
+        self, test_app, monkeypatch, image_service, small_image
+    ):
+        """
+        Test case for listing images when the response is large enough to be
+        compressed - i.e. as negotiated via Accept-Encoding.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+
+        Returns:
+            None
+        """
+        image_service.create(small_image)
+        monkeypatch.setattr(
+            "src.images.endpoints.image.settings.response_compression_min_bytes", 0
+        )
+
+        expected = test_app.get(self.resource, headers={"Accept-Encoding": "identity"})
+
+        assert "Content-Encoding" not in expected.headers
+        assert expected.headers["Vary"] == "Accept-Encoding"
+
+        for accept_encoding, encoding in [
+            ("gzip, br", "br"),
+            ("gzip, br;q=0", "gzip"),
+            ("*", "br"),
+        ]:
+            response = test_app.get(
+                self.resource, headers={"Accept-Encoding": accept_encoding}
+            )
+
+            assert response.status_code == 200
+            assert response.headers["Content-Encoding"] == encoding
+            assert response.json() == expected.json()
+            assert response.headers["X-Total-Count"] == "1"
+
+    def test_when_list_images_cursor_is_malformed(self, test_app):
+        """
+        Test case for listing images with a malformed cursor.
+
+        Args:
+            test_app: The test client for the application.
+
+        Returns:
+            None
+        """
+        response = test_app.get(self.resource, params={"after": "not-a-cursor"})
+
+        assert response.status_code == 400
+
+
+class TestGetImageFileEndpoint:
+    """
+    Test class for the get image file endpoint.
+    """
+
+    resource: str = "/api/images/{image_id}/file"
+
+    def test_when_get_image_file_is_successful(
+        self, test_app, image_service, small_image
+    ):
+        """
+        Test case for getting (ranges of) an image file - conditionally or not.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+
+        Returns:
+            None
+        """
+        image = image_service.create(small_image)
+        resource = self.resource.format(image_id=image.id)
+        with open(image.path, "rb") as image_file:
+            content = image_file.read()
+
+        response = test_app.get(resource)
+
+        assert response.status_code == 200
+        assert response.content == content
+        assert response.headers["ETag"] == f'"{image.checksum}"'
+        assert response.headers["Accept-Ranges"] == "bytes"
+
+        response = test_app.get(
+            resource, headers={"If-None-Match": f'"{image.checksum}"'}
+        )
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+        response = test_app.get(resource, headers={"Range": "bytes=10-19"})
+
+        assert response.status_code == 206
+        assert response.content == content[10:20]
+        assert response.headers["Content-Range"] == f"bytes 10-19/{len(content)}"
+
+        response = test_app.get(resource, headers={"Range": "bytes=-10"})
+
+        assert response.status_code == 206
+        assert response.content == content[-10:]
+
+        response = test_app.get(
+            resource, headers={"Range": "bytes=10-19", "If-Range": '"stale"'}
+        )
+
+        assert response.status_code == 200
+        assert response.content == content
+
+        response = test_app.get(resource, headers={"Range": f"bytes={len(content)}-"})
+
+        assert response.status_code == 416
+        assert response.headers["Content-Range"] == f"bytes */{len(content)}"
+
+    @pytest.mark.parametrize(
+        "extension, ranged, sent_as",
+        [
+            (None, False, "http.response.body"),
+            ("http.response.zerocopy", False, "http.response.zerocopy"),
+            ("http.response.zerocopy", True, "http.response.zerocopy"),
+            ("http.response.pathsend", False, "http.response.pathsend"),
+            ("http.response.pathsend", True, "http.response.body"),
+        ],
+    )
+    def test_when_get_image_file_is_sent_by_the_server(
+        self, small_image, extension, ranged, sent_as
+    ):
+        """
+        Test case for getting (ranges of) an image file from ASGI servers supporting
+        zero-copy transfers (see FileRangeResponse) - i.e. the file is handed to the
+        server, instead of being read in chunks, whenever the extension can send it.
+
+        Args:
+            small_image: The small image.
+            extension: The ASGI extension supported by the server - if any.
+            ranged: Whether a range of the file is requested.
+            sent_as: The type of the message(s) sending the file.
+
+        Returns:
+            None
+        """
+        with open(small_image.path, "rb") as image_file:
+            content = image_file.read()
+        start, end = (10, 19) if ranged else (0, len(content) - 1)
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "extensions": {} if extension is None else {extension: {}},
+        }
+        messages = []
+        sent = []
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message["type"])
+            if message["type"] == "http.response.zerocopy":
+                message["file"].seek(message["offset"])
+                sent.append(message["file"].read(message["count"]))
+            elif message["type"] == "http.response.pathsend":
+                with open(message["path"], "rb") as file:
+                    sent.append(file.read())
+            elif message["type"] == "http.response.body":
+                sent.append(message["body"])
+
+        response = FileRangeResponse(
+            small_image.path,
+            len(content),
+            start=start,
+            end=end,
+            status_code=206 if ranged else 200,
+        )
+        asyncio.run(response(scope, receive, send))
+
+        assert messages[0] == "http.response.start"
+        assert set(messages[1:]) == {sent_as}
+        assert b"".join(sent) == content[start : end + 1]
+
+    def test_when_get_image_file_is_negotiated(
+        self, test_app, image_service, small_image, monkeypatch
+    ):
+        """
+        Test case for getting an image file stored in alternate formats - i.e. the best
+        encoding accepted (see Accept) is served.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(
+            "src.images.endpoints.dependencies.ImageService",
+            partial(ImageService, alternate_formats=("webp",)),
+        )
+        image_service.alternate_formats = ("webp",)
+        image = image_service.create(small_image)
+        webp = image_service.get_encodings(image)[0]
+        resource = self.resource.format(image_id=image.id)
+
+        response = test_app.get(
+            resource, headers={"Accept": "image/webp,image/*;q=0.8"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "image/webp"
+        assert response.headers["ETag"] == webp.etag
+        assert response.headers["Vary"] == "Accept"
+        with PILImage.open(io.BytesIO(response.content)) as img:
+            assert img.format == "WEBP"
+
+        response = test_app.get(
+            resource,
+            headers={"Accept": "image/webp,*/*", "If-None-Match": webp.etag},
+        )
+
+        assert response.status_code == 304
+
+        for headers in ({"Accept": "image/jpeg,image/webp;q=0.5"}, {}):
+            response = test_app.get(resource, headers=headers)
+
+            assert response.status_code == 200
+            assert response.headers["Content-Type"] == "image/jpeg"
+            assert response.headers["ETag"] == f'"{image.checksum}"'
+
+        os.remove(webp.path)
+        response = test_app.get(resource, headers={"Accept": "image/webp"})
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "image/jpeg"
+
+    def test_when_get_image_file_is_stored_in_s3(
+        self, test_app, small_image, s3_storage, monkeypatch
+    ):
+        """
+        Test case for getting (ranges of) an image file stored in S3 - i.e. streamed
+        from the object store.
+
+        Args:
+            test_app: The test client for the application.
+            s3_storage: The S3 storage.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        monkeypatch.setattr(
+            "src.images.endpoints.dependencies.ImageService",
+            partial(ImageService, storage=s3_storage),
+        )
+        service = ImageService(base_path="images", storage=s3_storage)
+        image = service.create(small_image)
+        resource = self.resource.format(image_id=image.id)
+        with s3_storage.open(image.path) as image_file:
+            content = image_file.read()
+
+        response = test_app.get(resource)
+
+        assert response.status_code == 200
+        assert response.content == content
+        assert response.headers["Content-Length"] == str(len(content))
+
+        response = test_app.get(resource, headers={"Range": "bytes=10-19"})
+
+        assert response.status_code == 206
+        assert response.content == content[10:20]
+        assert response.headers["Content-Range"] == f"bytes 10-19/{len(content)}"
+
+        s3_storage.delete(image.path)
+        response = test_app.get(resource)
+
+        assert response.status_code == 404
+
+        service.session.close()
+
+    def test_when_get_image_variant_is_successful(
+        self, test_app, image_service, small_image
+    ):
+        """
+        Test case for getting a (resized and re-encoded) variant of an image - which is
+        produced once and then served from cache.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+
+        Returns:
+            None
+        """
+        image = image_service.create(small_image)
+        resource = self.resource.format(image_id=image.id)
+
+        response = test_app.get(resource, params={"w": 320, "fmt": "webp"})
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "image/webp"
+
+        with PILImage.open(io.BytesIO(response.content)) as variant:
+            assert variant.format == "WEBP"
+            assert variant.size[0] == 320
+
+        cached_response = test_app.get(resource, params={"w": 320, "fmt": "webp"})
+
+        assert cached_response.status_code == 200
+        assert cached_response.content == response.content
+        assert cached_response.headers["ETag"] == response.headers["ETag"]
+
+        response = test_app.get(
+            resource,
+            params={"w": 320, "fmt": "webp"},
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+
+        assert response.status_code == 304
+
+        response = test_app.get(
+            resource, params={"w": image_service.image_width + 1, "fmt": "webp"}
+        )
+
+        assert response.status_code == 422
+
+    def test_when_get_image_variant_is_evicted(
+        self, test_app, image_service, small_image, monkeypatch
+    ):
+        """
+        Test case for getting a variant (cached on disk) which is evicted before it is
+        served - i.e. it is produced again, instead of not found.
+
+        Args:
+            test_app: The test client for the application.
+            image_service: The image service.
+            monkeypatch: The pytest monkeypatch fixture.
+
+        Returns:
+            None
+        """
+        image = image_service.create(small_image)
+        resource = self.resource.format(image_id=image.id)
+        monkeypatch.setattr(image_module._memory_variants, "max_item_bytes", 0)
+        response = test_app.get(resource, params={"w": 320, "fmt": "png"})
+        load_variant = ImageService.load_variant
+        evicted = []
+
+        def evicting_load_variant(self, image, variant):
+            variant = load_variant(self, image, variant)
+            if not evicted:
+                evicted.append(variant.path)
+                os.remove(variant.path)
+            return variant
+
+        monkeypatch.setattr(ImageService, "load_variant", evicting_load_variant)
+
+        evicted_response = test_app.get(resource, params={"w": 320, "fmt": "png"})
+
+        assert len(evicted) == 1
+        assert evicted_response.status_code == 200
+        assert evicted_response.content == response.content
+
+    def test_when_image_is_not_found(self, test_app):
+        """
+        Test case for getting the file of an image that does not exist.
+
+        Args:
+            test_app: The test client for the application.
+
+        Returns:
+            None
+        """
+        response = test_app.get(self.resource.format(image_id=uuid.uuid4()))
+
+        assert response.status_code == 404
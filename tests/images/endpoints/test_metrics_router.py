@@ -0,0 +1,64 @@
+import os.path
+
+from src.images.models.image import ImageStatus
+
+
+class TestGetMetricsEndpoint:
+    """
+    Test class for the get metrics endpoint.
+    """
+
+    resource: str = "/metrics"
+
+    def test_when_get_metrics_is_successful(self, test_app, large_image):
+        """
+        Test case for getting the metrics - i.e. after an image is created, the time
+        spent in each stage, its outcome and its bytes in/out are exposed.
+
+        Args:
+            test_app: The test client for the application.
+
+        Returns:
+            None
+        """
+        with open(large_image.path, "rb") as image_file:
+            response = test_app.post(
+                "/api/submit",
+                files={
+                    "image_file": (
+                        os.path.basename(large_image.path),
+                        image_file,
+                        large_image.content_type,
+                    )
+                },
+            )
+
+        assert response.status_code == 201
+
+        response = test_app.get(self.resource)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+        samples = {}
+        for line in response.text.splitlines():
+            if not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+
+        for stage in ("spill", "decode", "resize", "encode", "checksum", "commit"):
+            assert samples[f'images_stage_seconds_count{{stage="{stage}"}}'] >= 1
+            assert (
+                samples[f'images_stage_seconds_bucket{{stage="{stage}",le="+Inf"}}']
+                == samples[f'images_stage_seconds_count{{stage="{stage}"}}']
+            )
+        assert (
+            samples[f'images_processed_total{{status="{ImageStatus.DONE.value}"}}'] >= 1
+        )
+        assert (
+            samples[f'images_created_total{{status="{ImageStatus.DONE.value}"}}'] >= 1
+        )
+        assert samples["images_bytes_in_total"] >= os.path.getsize(large_image.path)
+        assert samples["images_bytes_out_total"] > 0
+        assert samples["images_queue_pending_jobs"] == 0
+        assert 'images_database_pool_checked_out{pool="asyncio"}' in samples
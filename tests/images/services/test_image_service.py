@@ -1,11 +1,51 @@
+import asyncio
+import dataclasses
+import io
 import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 from PIL import Image as PILImage
+from sqlalchemy import select, text, update
+
+from src.images.models.database import Session
+from src.images.models.image import (
+    IMAGE_VERSION_STRIPES,
+    Image,
+    ImageCount,
+    ImageStatus,
+    Rendition,
+)
+from src.images.services.exceptions import ClientError, ConflictError, NotFoundError
+from src.images.services import image as image_module
+from src.images.services.image import ImageService, TmpImage, VariantFormat
+from src.images.services.metrics import bytes_out_total
+from src.images.services.workers import JobQueue, shutdown
+from src.images.utils.image import encode, resize, sha256_checksum
+from src.images.utils.layout import rendition_path, sharded_path
+from src.images.utils.pagination import encode_cursor
+
+
+class TestImageService:
+    """
+    Test class for the image service itself.
+    """
+
+    def test_image_service_sessions_are_not_shared(self):
+        """
+        Test method for the session of the image service - i.e. each service gets its
+        own session by default.
+        """
+        service, other_service = ImageService(), ImageService()
+
+        assert service.session is not other_service.session
 
-from src.images.models.image import Image, ImageStatus
-from src.images.services.image import ImageService
-from src.images.utils.image import sha256_checksum
+        service.session.close()
+        other_service.session.close()
 
 
 class TestCreateImageService:
@@ -25,9 +65,10 @@ class TestCreateImageService:
         image = image_service.create(large_image)
 
         assert image_service.session.query(Image).count() == 1
-        assert (
-            image.path
-            == f"{image_service.base_path}/{image.id}.{os.path.basename(large_image.path)}"
+        assert image.path == sharded_path(
+            image_service.base_path,
+            image.id,
+            f"{image.id}.{os.path.basename(large_image.path)}",
         )
         assert image.checksum == sha256_checksum(image.path)
         assert image.status == ImageStatus.DONE
@@ -50,9 +91,10 @@ class TestCreateImageService:
         image = image_service.create(small_image)
 
         assert image_service.session.query(Image).count() == 1
-        assert (
-            image.path
-            == f"{image_service.base_path}/{image.id}.{os.path.basename(small_image.path)}"
+        assert image.path == sharded_path(
+            image_service.base_path,
+            image.id,
+            f"{image.id}.{os.path.basename(small_image.path)}",
         )
         assert image.checksum == sha256_checksum(image.path)
         assert image.status == ImageStatus.DONE
@@ -63,18 +105,402 @@ class TestCreateImageService:
         with PILImage.open(image.path) as img:
             assert img.size[0] == image_service.image_width
 
+    def test_successful_image_service_create_with_fast_resize(
+        self, image_service, large_image
+    ):
+        """
+        Test method for the create image service when images are resized via the fast
+        (i.e. reduced decoding) path.
+        """
+        image_service.fast_resize = True
 
-class TestUpdateImageService:
-    """
-    Test class for the update image service.
-    """
+        image = image_service.create(large_image)
+
+        assert image.checksum == sha256_checksum(image.path)
+        assert image.status == ImageStatus.DONE
+
+        with PILImage.open(image.path) as img:
+            assert img.size[0] == image_service.image_width
+
+    def test_successful_image_service_create_with_encodings(
+        self, image_service, small_image
+    ):
+        """
+        Test method for the create image service when images are saved in another
+        format (i.e. as PNG), metadata stripped, and in alternate formats (i.e. WebP).
+        """
+        with PILImage.open(small_image.path) as img:
+            exif = PILImage.Exif()
+            exif[0x010E] = "description"
+            img.save(small_image.path, exif=exif, comment=b"comment")
+        image_service.output_format = "png"
+        image_service.alternate_formats = ("webp", "png")
+
+        image = image_service.create(small_image)
+        encodings = image_service.get_encodings(image)
+
+        assert image.status == ImageStatus.DONE
+        assert image.path.endswith(".png")
+        assert [encoding.media_type for encoding in encodings] == [
+            "image/webp",
+            "image/png",
+        ]
+        assert encodings[0].path == f"{os.path.splitext(image.path)[0]}.webp"
+        assert encodings[0].etag != encodings[1].etag
+
+        with PILImage.open(image.path) as img:
+            assert img.format == "PNG"
+            assert "exif" not in img.info
+        with PILImage.open(encodings[0].path) as img:
+            assert img.format == "WEBP"
+            assert img.size[0] == image_service.image_width
+        os.remove(encodings[0].path)
+
+    def test_image_service_create_counts_bytes_out(self, image_service, small_image):
+        """
+        Test method for the create image service counting the bytes saved - i.e. of
+        the image, its alternate encodings and renditions.
+        """
+        image_service.alternate_formats = ("webp",)
+        image_service.rendition_widths = (320,)
+        before = bytes_out_total.labels().value
+
+        image = image_service.create(small_image)
+
+        paths = [
+            image.path,
+            f"{os.path.splitext(image.path)[0]}.webp",
+            rendition_path(image.path, 320),
+        ]
+        assert bytes_out_total.labels().value - before == sum(
+            os.path.getsize(path) for path in paths
+        )
+        for path in paths[1:]:
+            os.remove(path)
+
+    def test_image_service_strips_metadata_of_a_copy(self, image_service, small_image):
+        """
+        Test method for stripping metadata - i.e. from a copy of the image, since the
+        image itself may be saved by other threads (e.g. in alternate formats).
+        """
+        with PILImage.open(small_image.path) as img:
+            img.save(small_image.path, comment=b"comment")
+
+        with PILImage.open(small_image.path) as img:
+            stripped = image_service.encoding.strip(img)
+
+            assert img.info["comment"] == b"comment"
+            assert "comment" not in stripped.info
+            assert stripped.tobytes() == img.tobytes()
+            with PILImage.open(
+                io.BytesIO(encode(img, "JPEG", image_service.encoding))
+            ) as encoded:
+                assert "comment" not in encoded.info
+
+    def test_image_service_create_with_progressive_jpeg(
+        self, image_service, small_image
+    ):
+        """
+        Test method for the create image service when JPEGs are saved progressive and
+        optimized - i.e. smaller than with Pillow's defaults.
+        """
+        image_service.encoding = dataclasses.replace(
+            image_service.encoding, strip_metadata=False
+        )
+        with PILImage.open(small_image.path) as img:
+            exif = PILImage.Exif()
+            exif[0x010E] = "description"
+            img.save(small_image.path, exif=exif)
+            img.load()
+            baseline = len(encode(resize(img, image_service.image_width), "JPEG"))
+
+        image = image_service.create(small_image)
+
+        assert os.path.getsize(image.path) < baseline
+        with PILImage.open(image.path) as img:
+            assert img.info.get("progressive")
+            assert img.getexif()[0x010E] == "description"
+
+    def test_successful_image_service_create_asynchronously(
+        self, image_service, large_image
+    ):
+        """
+        Test method for the create image service when images are processed in the
+        process pool - i.e. the image is IN_PROGRESS until processed.
+        """
+        image_service.asynchronous = True
+
+        image = image_service.create(large_image)
+
+        assert image_service.session.query(Image).count() == 1
+        assert image.status == ImageStatus.IN_PROGRESS
+        assert image.checksum is None
+
+        # Waits for the image to be processed.
+        shutdown()
+
+        image = image_service.get(image.id)
+
+        assert image.status == ImageStatus.DONE
+        assert image.checksum == sha256_checksum(image.path)
+
+        with PILImage.open(image.path) as img:
+            assert img.size[0] == image_service.image_width
+
+    def test_image_service_create_with_duplicate_upload(
+        self, image_service, large_image
+    ):
+        """
+        Test method for the create image service when an identical image was already
+        uploaded - i.e. the existing image is returned.
+        """
+        large_image.checksum = sha256_checksum(large_image.path)
+
+        image = image_service.create(large_image)
+        duplicate = image_service.create(large_image)
+
+        assert image_service.session.query(Image).count() == 1
+        assert duplicate.id == image.id
+        assert image.source_checksum == large_image.checksum
+
+    def test_image_service_create_when_overloaded(
+        self, image_service, small_image, monkeypatch
+    ):
+        """
+        Test method for the create image service while the process pool is overloaded
+        - i.e. synchronous images (not processed in it) are not rejected.
+        """
+        queue = JobQueue(max_workers=1, max_queued_jobs=0, max_queued_bytes=1)
+        monkeypatch.setattr("src.images.services.image.jobs", queue)
+
+        with queue.admit([1]):
+            image = image_service.create(small_image)
+
+        assert image.status == ImageStatus.DONE
+        assert queue.stats().rejected == 0
+
+    def test_image_service_create_with_source_checksums_loaded(
+        self, image_service, large_image, small_image, monkeypatch
+    ):
+        """
+        Test method for the create image service once the checksums of uploaded images
+        are loaded - i.e. duplicates are still detected (and new uploads are not looked
+        up), including uploads created while loading.
+        """
+        monkeypatch.setattr(image_module, "_source_checksums_filter", None)
+        monkeypatch.setattr(image_module, "_source_checksums_pending", None)
+        monkeypatch.setattr(image_module, "_source_checksums_since", None)
+        large_image.checksum = sha256_checksum(large_image.path)
+        small_image.checksum = sha256_checksum(small_image.path)
+        image = image_service.create(large_image)
+
+        image_module.load_source_checksums()
+        small = image_service.create(small_image)
+
+        assert image_module._may_be_duplicate(large_image.checksum)
+        assert image_module._may_be_duplicate(small_image.checksum)
+        assert not image_module._may_be_duplicate(sha256_checksum(__file__))
+        assert image_service.create(large_image).id == image.id
+        assert image_service.create(small_image).id == small.id
+        assert image_service.session.query(Image).count() == 2
+
+    def test_image_service_create_with_source_checksums_of_other_processes(
+        self, image_service, large_image, monkeypatch
+    ):
+        """
+        Test method for the create image service once the checksums of uploaded images
+        are loaded - i.e. those of images created by other processes are merged (see
+        refresh_source_checksums) and their duplicates detected.
+        """
+        monkeypatch.setattr(image_module, "_source_checksums_filter", None)
+        monkeypatch.setattr(image_module, "_source_checksums_pending", None)
+        monkeypatch.setattr(image_module, "_source_checksums_since", None)
+        image_module.load_source_checksums()
+        large_image.checksum = sha256_checksum(large_image.path)
+        # NOTE: Created by another process - i.e. not added to this one's filter.
+        with Session() as session:
+            image = Image(id=uuid.uuid4(), source_checksum=large_image.checksum)
+            image.reserve(os.path.join(image_service.base_path, f"{image.id}.jpg"))
+            image.complete("0" * 64)
+            session.add(image)
+            session.commit()
+            image_id = image.id
+
+        assert not image_module._may_be_duplicate(large_image.checksum)
+
+        image_module.refresh_source_checksums()
+
+        assert image_module._may_be_duplicate(large_image.checksum)
+        assert image_service.create(large_image).id == image_id
+        assert image_service.session.query(Image).count() == 1
+
+    def test_image_service_create_with_renditions(
+        self, image_service, large_image, monkeypatch
+    ):
+        """
+        Test method for the create image service with renditions - i.e. resized
+        progressively (from the largest width down) and recorded with the image.
+        """
+        resized = []
+
+        def spy(input_image, width, **kwargs):
+            resized.append((input_image.size[0], width))
+            return resize(input_image, width, **kwargs)
+
+        monkeypatch.setattr("src.images.utils.image.resize", spy)
+        image_service.rendition_widths = (100, 2000, 200)
+        with PILImage.open(large_image.path) as img:
+            width = img.size[0]
+
+        image = image_service.create(large_image)
+        renditions = (
+            image_service.session.query(Rendition)
+            .filter_by(image_id=image.id)
+            .order_by(Rendition.width)
+            .all()
+        )
+
+        assert resized == [(width, 2000), (2000, 1500), (1500, 200), (200, 100)]
+        assert [rendition.width for rendition in renditions] == [100, 200, 2000]
+        for rendition in renditions:
+            assert rendition.image_id == image.id
+            assert rendition.checksum == sha256_checksum(rendition.path)
+            assert rendition.size == os.path.getsize(rendition.path)
+            with PILImage.open(rendition.path) as img:
+                assert img.size == (rendition.width, rendition.height)
+            os.remove(rendition.path)
+
+    def test_image_service_create_when_processing_fails(
+        self, image_service, large_image, monkeypatch
+    ):
+        """
+        Test method for the create image service when processing fails unexpectedly
+        (e.g. storage fails while renditions are written) - i.e. the image is created
+        CORRUPTED and the files written before the failure are deleted.
+        """
+
+        def failing_resize(input_image, width, **kwargs):
+            if width == 100:
+                raise OSError("No space left on device")
+            return resize(input_image, width, **kwargs)
+
+        monkeypatch.setattr("src.images.utils.image.resize", failing_resize)
+        image_service.rendition_widths = (200, 100)
+
+        image = image_service.create(large_image)
+
+        assert image.status == ImageStatus.CORRUPTED
+        assert image_service.session.query(Image).count() == 1
+        assert image_service.session.query(Rendition).count() == 0
+        assert not os.path.exists(image.path)
+        assert not os.path.exists(rendition_path(image.path, 200))
+
+    def test_image_service_create_from_memory(self, image_service, large_image):
+        """
+        Test method for the create image service when the upload is in memory - i.e.
+        processed as if it was read from its (owned, hence deleted) file.
+        """
+        with open(large_image.path, "rb") as file:
+            content = file.read()
+        from_file = dataclasses.replace(large_image, delete=True)
+        from_memory = dataclasses.replace(large_image, content=content, delete=True)
+
+        image = image_service.create(from_file)
+        other_image = image_service.create(from_memory)
+
+        assert not os.path.exists(large_image.path)
+        assert image.status == other_image.status == ImageStatus.DONE
+        assert image.checksum == other_image.checksum
+
+    def test_successful_image_service_acreate(
+        self, image_service, async_sessions, large_image
+    ):
+        """
+        Test method for the (asyncio) acreate image service.
+        """
+
+        async def acreate():
+            async with async_sessions() as session:
+                image_service.async_session = session
+                return await image_service.acreate(large_image)
+
+        image = asyncio.run(acreate())
+
+        assert image_service.session.query(Image).count() == 1
+        assert image.checksum == sha256_checksum(image.path)
+        assert image.status == ImageStatus.DONE
+        assert image.created is not None
+        assert image.updated is not None
+
+        with PILImage.open(image.path) as img:
+            assert img.size[0] == image_service.image_width
 
-    def test_update_image_service(self, image_service):
+    def test_image_service_acreate_many(
+        self, image_service, async_sessions, large_image, small_image
+    ):
         """
-        Test method for the update image service.
+        Test method for the (asyncio) acreate many image service - i.e. failures are
+        isolated (and the files of images failing to be inserted deleted) and identical
+        uploads (within the batch) are deduplicated.
         """
-        with pytest.raises(NotImplementedError):
-            image_service.update()
+        image_service.base_path = tempfile.mkdtemp(prefix="acreate_many.")
+        image_service.rendition_widths = (32,)
+        large_image.checksum = sha256_checksum(large_image.path)
+        with tempfile.NamedTemporaryFile(
+            prefix="not-an-image.", suffix=".jpg", delete=False
+        ) as tmp:
+            tmp.write(b"not an image")
+        not_an_image = dataclasses.replace(small_image, path=tmp.name)
+        # NOTE: The path of the image (i.e. its output path) is too long to be inserted -
+        # though not to be written.
+        with (
+            tempfile.NamedTemporaryFile(
+                prefix="x" * 190, suffix=".jpg", delete=False
+            ) as tmp,
+            open(small_image.path, "rb") as image_file,
+        ):
+            shutil.copyfileobj(image_file, tmp)
+        too_long = dataclasses.replace(small_image, path=tmp.name)
+
+        async def acreate_many(uploaded_images):
+            async with async_sessions() as session:
+                image_service.async_session = session
+                return await image_service.acreate_many(uploaded_images)
+
+        try:
+            results = asyncio.run(
+                acreate_many(
+                    [
+                        large_image,
+                        dataclasses.replace(large_image),
+                        not_an_image,
+                        too_long,
+                        small_image,
+                    ]
+                )
+            )
+        finally:
+            os.remove(not_an_image.path)
+            os.remove(too_long.path)
+
+        large, duplicate, corrupted, failed, small = results
+
+        assert image_service.session.query(Image).count() == 3
+        assert duplicate.id == large.id
+        assert large.status == small.status == ImageStatus.DONE
+        assert large.checksum == sha256_checksum(large.path)
+        assert small.checksum == sha256_checksum(small.path)
+        assert large.created is not None
+        assert corrupted.status == ImageStatus.CORRUPTED
+        assert isinstance(failed, ClientError)
+        assert not any(
+            "x" * 190 in filename
+            for _, _, filenames in os.walk(image_service.base_path)
+            for filename in filenames
+        )
+        assert os.path.exists(rendition_path(small.path, 32))
+
+        shutil.rmtree(image_service.base_path, ignore_errors=True)
 
 
 class TestGetImageService:
@@ -82,12 +508,45 @@ class TestGetImageService:
     Test class for the get image service.
     """
 
-    def test_get_image_service(self, image_service):
+    def test_get_image_service(self, image_service, small_image):
         """
         Test method for the get image service.
         """
-        with pytest.raises(NotImplementedError):
-            image_service.get()
+        small_image = image_service.create(small_image)
+
+        image = image_service.get(small_image.id)
+
+        assert image.id == small_image.id
+        assert image.path == small_image.path
+        assert image.checksum == small_image.checksum
+        assert image.status == small_image.status
+
+    def test_get_image_service_when_not_found(self, image_service):
+        """
+        Test method for the get image service when there is no image with the given ID.
+        """
+        with pytest.raises(NotFoundError):
+            image_service.get(uuid.uuid4())
+
+    def test_aget_image_service(self, image_service, async_sessions, small_image):
+        """
+        Test method for the (asyncio) aget image service.
+        """
+        small_image = image_service.create(small_image)
+
+        async def aget(image_id):
+            async with async_sessions() as session:
+                image_service.async_session = session
+                return await image_service.aget(image_id)
+
+        image = asyncio.run(aget(small_image.id))
+
+        assert image.id == small_image.id
+        assert image.checksum == small_image.checksum
+        assert image.status == small_image.status
+
+        with pytest.raises(NotFoundError):
+            asyncio.run(aget(uuid.uuid4()))
 
 
 class TestListImageService:
@@ -139,15 +598,277 @@ class TestListImageService:
         assert the_list.query.count() == 0
         assert the_list.total == 2
 
+    def test_list_image_service_after_cursor(
+        self, image_service, large_image, small_image
+    ):
+        """
+        Test method for the list image service when paginating by cursor.
+        """
+        large_image = image_service.create(large_image)
+        small_image = image_service.create(small_image)
+
+        the_list = image_service.list(
+            after=encode_cursor(large_image.created, large_image.id), limit=1
+        )
+
+        assert the_list.query.count() == 1
+        assert the_list.total == 2
+        assert the_list.query.first().id == small_image.id
+
+        the_list = image_service.list(
+            after=encode_cursor(small_image.created, small_image.id), limit=1
+        )
+
+        assert the_list.query.count() == 0
+        assert the_list.total == 2
+
+    def test_list_image_service_with_malformed_cursor(self, image_service):
+        """
+        Test method for the list image service when the cursor is malformed.
+        """
+        with pytest.raises(ClientError):
+            image_service.list(after="not-a-cursor")
+
+    def test_alist_image_service(
+        self, image_service, async_sessions, large_image, small_image
+    ):
+        """
+        Test method for the (asyncio) alist image service - i.e. it lists the same
+        images as the list image service.
+        """
+        image_service.create(large_image)
+        image_service.create(small_image)
+
+        async def alist(**kwargs):
+            async with async_sessions() as session:
+                image_service.async_session = session
+                return await image_service.alist(**kwargs)
+
+        the_list = asyncio.run(alist())
+
+        assert [image.id for image in the_list.results] == [
+            image.id for image in image_service.list().query
+        ]
+        assert the_list.total == 2
+
+        the_list = asyncio.run(alist(offset=1, limit=1, exact=True))
+
+        assert [image.id for image in the_list.results] == [
+            image_service.list().query.all()[-1].id
+        ]
+        assert the_list.total == 2
+
+        with pytest.raises(ClientError):
+            asyncio.run(alist(after="not-a-cursor"))
+
+
+class TestCountImageService:
+    """
+    Test class for the count image service.
+    """
+
+    def test_count_image_service(self, image_service, large_image, small_image):
+        """
+        Test method for the count image service - i.e. maintained counts match the
+        images table.
+        """
+        assert image_service.count() == image_service.count(exact=True) == 0
+
+        image_service.create(large_image)
+        image_service.create(small_image)
+
+        assert image_service.count() == image_service.count(exact=True) == 2
+        assert (
+            image_service.count(status=ImageStatus.DONE)
+            == image_service.count(status=ImageStatus.DONE, exact=True)
+            == 2
+        )
+        assert (
+            image_service.count(status=ImageStatus.CORRUPTED)
+            == image_service.count(status=ImageStatus.CORRUPTED, exact=True)
+            == 0
+        )
+
+
+class TestVersionImageService:
+    """
+    Test class for the version image service.
+    """
+
+    def test_aversion_image_service_concurrently(self, image_service, async_sessions):
+        """
+        Test method for the version image service while images are changed
+        concurrently - i.e. sessions of other stripes do not wait for each other, and
+        the version sums their changes once they commit.
+
+        NOTE: Images are updated (without changing their status), since inserts queue
+        on the image count of their status - whatever their stripe.
+        """
+
+        async def aversion():
+            async with async_sessions() as session:
+                image_service.async_session = session
+                return await image_service.aversion()
+
+        images = []
+        for _ in range(2):
+            image = Image(id=uuid.uuid4())
+            image.reserve(os.path.join(image_service.base_path, f"{image.id}.png"))
+            image_service.session.add(image)
+            images.append(image.id)
+        image_service.session.commit()
+        version, _ = asyncio.run(aversion())
+
+        sessions = [Session()]
+        stripe = sessions[0].scalar(text("SELECT pg_backend_pid()"))
+        stripe %= IMAGE_VERSION_STRIPES
+        while True:
+            sessions.append(Session())
+            other = sessions[-1].scalar(text("SELECT pg_backend_pid()"))
+            if other % IMAGE_VERSION_STRIPES != stripe:
+                break
+        first, second = sessions[0], sessions[-1]
+        try:
+            second.execute(text("SET LOCAL lock_timeout = '1s'"))
+            for session, image_id in zip((first, second), images):
+                session.execute(
+                    update(Image)
+                    .where(Image.id == image_id)
+                    .values(path=f"{image_id}.jpg")
+                )
+            second.commit()
+
+            assert asyncio.run(aversion())[0] == version + 1
+
+            first.commit()
+        finally:
+            for session in sessions:
+                session.close()
+
+        assert asyncio.run(aversion())[0] == version + 2
+
+    """
+    Test class for the get variant image service.
+    """
+
+    def test_get_variant_image_service_when_wider_than_image(
+        self, image_service, small_image
+    ):
+        """
+        Test method for the get variant image service for widths beyond the width of
+        the image - i.e. they all share the variant of the image's width.
+        """
+        image = image_service.create(small_image)
+
+        variant = image_service.get_variant(
+            image, image_service.image_width + 1, VariantFormat.PNG
+        )
+        other_variant = image_service.get_variant(
+            image, image_service.image_width * 4, VariantFormat.PNG
+        )
+
+        assert variant.key == other_variant.key
+        assert variant.etag == other_variant.etag
+        assert variant == image_service.get_variant(image, None, VariantFormat.PNG)
+        assert (
+            image_service.get_variant(image, 320, VariantFormat.PNG).key != variant.key
+        )
+
 
 class TestDeleteImageService:
     """
     Test class for the delete image service.
     """
 
-    def test_delete_image_service(self, image_service):
+    def test_delete_image_service(self, image_service, small_image):
         """
-        Test method for the delete image service.
+        Test method for the delete image service - i.e. the image, its alternate
+        encodings and its cached variants are deleted.
         """
-        with pytest.raises(NotImplementedError):
-            image_service.delete()
+        image_service.alternate_formats = ("webp",)
+        image = image_service.create(small_image)
+        image_id, path = image.id, image.path
+        (alternate,) = image_service._alternate_paths(path)
+        variant = image_service.get_variant(image, 100, VariantFormat.PNG)
+        variant = image_service.load_variant(image, variant)
+        assert os.path.exists(alternate)
+        assert os.path.exists(variant.path)
+
+        image_service.delete(image_id)
+
+        assert image_service.session.query(Image).count() == 0
+        assert not os.path.exists(path)
+        assert not os.path.exists(alternate)
+        assert not os.path.exists(variant.path)
+        assert image_module._memory_variants.get(variant.key) is None
+        with pytest.raises(NotFoundError):
+            image_service.delete(image_id)
+
+    def test_delete_image_service_when_in_progress(self, image_service):
+        """
+        Test method for the delete image service when the image is being processed.
+        """
+        image = Image(id=uuid.uuid4())
+        image.reserve(os.path.join(image_service.base_path, f"{image.id}.jpg"))
+        image_service.session.add(image)
+        image_service.session.commit()
+
+        with pytest.raises(ConflictError):
+            image_service.delete(image.id)
+
+        assert image_service.session.query(Image).count() == 1
+
+    def test_delete_image_service_concurrently_with_create(self, image_service):
+        """
+        Test method for the delete image service while an image is created - i.e. the
+        upload holds the image count (as its insert does) when the delete starts, and
+        only then bumps the image version: deletes lock them in the same order, never
+        deadlocking.
+        """
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
+            PILImage.new("RGB", (64, 64), "red").save(tmp, format="PNG")
+        image_service.rendition_widths = (32,)
+        image_id = image_service.create(
+            TmpImage(
+                path=tmp.name,
+                headers={"Content-Length": 100, "Content-Type": "image/png"},
+                content_type="image/png",
+            )
+        ).id
+
+        def delete():
+            service = ImageService(base_path=image_service.base_path)
+            try:
+                service.delete(image_id)
+            finally:
+                service.session.close()
+
+        def waiting_for_locks():
+            with Session() as session:
+                return session.execute(
+                    text(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                    )
+                ).scalar()
+
+        upload = Session()
+        upload.execute(
+            select(ImageCount.total)
+            .where(ImageCount.status == ImageStatus.DONE)
+            .with_for_update()
+        )
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            deleted = executor.submit(delete)
+            while not waiting_for_locks() and not deleted.done():
+                time.sleep(0.01)
+            image = Image(id=uuid.uuid4())
+            image.reserve(os.path.join(image_service.base_path, f"{image.id}.png"))
+            upload.add(image)
+            upload.commit()
+            upload.close()
+            deleted.result()
+
+        assert image_service.session.query(Image).count() == 1
+        assert image_service.session.query(Rendition).count() == 0
+        assert image_service.count() == image_service.count(exact=True) == 1
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+import pytest
+from PIL import Image as PILImage
+
+from src.images.models.image import ImageStatus, Rendition
+from src.images.services.image import ImageService, VariantFormat
+from src.images.utils.storage import MIN_PART_SIZE, LocalStorage, S3Storage
+
+
+class TestLocalStorage:
+    """
+    Test class for the local (filesystem) storage.
+    """
+
+    def test_local_storage(self):
+        """
+        Test method for writing, reading (ranges of) and deleting a file - in a
+        directory created lazily.
+        """
+        storage = LocalStorage()
+        key = os.path.join(tempfile.mkdtemp(), "ab", "cd", "file.bin")
+        data = os.urandom(1000)
+
+        storage.write(key, data)
+
+        assert storage.path(key) == key
+        assert storage.size(key) == len(data)
+        assert b"".join(storage.read(key)) == data
+        assert b"".join(storage.read(key, 10, 19)) == data[10:20]
+        with storage.open(key) as file:
+            assert file.read() == data
+
+        storage.delete(key)
+        storage.delete(key)
+
+        with pytest.raises(FileNotFoundError):
+            storage.size(key)
+
+    def test_local_storage_writer_when_failed(self):
+        """
+        Test method for a failed write - i.e. the partial file is removed.
+        """
+        storage = LocalStorage()
+        key = os.path.join(tempfile.mkdtemp(), "file.bin")
+
+        with pytest.raises(RuntimeError):
+            with storage.writer(key) as output:
+                output.write(b"partial")
+                raise RuntimeError()
+
+        assert not os.path.exists(key)
+
+
+class TestS3Storage:
+    """
+    Test class for the S3 storage.
+    """
+
+    def test_s3_storage_streams_multipart_upload(self, s3_storage):
+        """
+        Test method for writing a file larger than a part - i.e. uploaded in parts as
+        it is written, buffering at most a part.
+        """
+        data = os.urandom(2 * MIN_PART_SIZE + 1000)
+
+        with s3_storage.writer("images/large.bin") as output:
+            for start in range(0, len(data), 64 * 1024):
+                output.write(data[start : start + 64 * 1024])
+                assert len(output._buffer) < s3_storage.part_size
+            assert len(output.parts) == 2
+
+        head = s3_storage.client.head_object(
+            Bucket=s3_storage.bucket, Key="images/large.bin"
+        )
+        # NOTE: ETags of multipart uploads are suffixed with the number of parts.
+        assert head["ETag"].endswith('-3"')
+        assert s3_storage.size("images/large.bin") == len(data)
+        assert b"".join(s3_storage.read("images/large.bin")) == data
+        assert (
+            b"".join(
+                s3_storage.read(
+                    "images/large.bin", MIN_PART_SIZE - 5, MIN_PART_SIZE + 4
+                )
+            )
+            == data[MIN_PART_SIZE - 5 : MIN_PART_SIZE + 5]
+        )
+
+    def test_s3_storage_writer_when_failed(self, s3_storage):
+        """
+        Test method for a failed write - i.e. the upload is aborted, so neither the
+        object nor its parts are kept.
+        """
+        with pytest.raises(RuntimeError):
+            with s3_storage.writer("images/failed.bin") as output:
+                output.write(os.urandom(MIN_PART_SIZE + 1))
+                raise RuntimeError()
+
+        uploads = s3_storage.client.list_multipart_uploads(Bucket=s3_storage.bucket)
+        assert uploads.get("Uploads", []) == []
+        with pytest.raises(FileNotFoundError):
+            s3_storage.size("images/failed.bin")
+
+    def test_s3_storage(self, s3_storage):
+        """
+        Test method for writing a file smaller than a part, reading it back, deleting
+        it and pickling the storage (i.e. to the process pool).
+        """
+        s3_storage.write("images/small.bin", b"small")
+
+        assert s3_storage.path("images/small.bin") is None
+        with s3_storage.open("images/small.bin") as file:
+            assert file.read() == b"small"
+
+        copy = pickle.loads(pickle.dumps(s3_storage))
+        assert copy._client is None
+        assert copy.size("images/small.bin") == 5
+
+        s3_storage.delete("images/small.bin")
+        with pytest.raises(FileNotFoundError):
+            list(s3_storage.read("images/small.bin"))
+
+    def test_image_service_create_with_s3_storage(self, s3_storage, large_image):
+        """
+        Test method for creating an image (and a variant of it) stored in S3.
+        """
+        service = ImageService(
+            base_path="images", storage=s3_storage, rendition_widths=(320,)
+        )
+        # NOTE: Sizes of renditions are counted as they are written - i.e. objects are
+        # never read back (nor HEAD).
+        head_object = s3_storage.client.head_object
+        s3_storage.client.head_object = None
+
+        image = service.create(large_image)
+
+        s3_storage.client.head_object = head_object
+        (rendition,) = service.session.query(Rendition).filter_by(image_id=image.id)
+        assert rendition.size == s3_storage.size(rendition.path)
+
+        assert image.status == ImageStatus.DONE
+        assert not os.path.exists(image.path)
+        with s3_storage.open(image.path) as file:
+            assert hashlib.sha256(file.read()).hexdigest() == image.checksum
+            file.seek(0)
+            with PILImage.open(file) as img:
+                assert img.size[0] == service.image_width
+
+        variant = service.load_variant(
+            image, service.get_variant(image, 100, VariantFormat.PNG)
+        )
+        with PILImage.open(variant.path) as img:
+            assert img.size[0] == 100
+
+        service.session.rollback()
+        service.session.close()
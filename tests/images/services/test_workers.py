@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from src.images.services.exceptions import OverloadedError
+from src.images.services.workers import JobQueue, complete, shutdown
+
+
+class TestJobQueue:
+    """
+    Test class for the (bounded) job queue of the process pool.
+    """
+
+    def test_job_queue_admission(self):
+        """
+        Test method for admitting jobs - i.e. jobs beyond the bounds are rejected until
+        admitted ones are released.
+        """
+        queue = JobQueue(max_workers=1, max_queued_jobs=1, max_queued_bytes=100)
+
+        admission = queue.admit([10, 10])
+
+        with pytest.raises(OverloadedError) as exc_info:
+            queue.admit([10])
+
+        assert exc_info.value.retry_after >= 1
+        assert queue.stats().pending_jobs == 2
+        assert queue.stats().pending_bytes == 20
+        assert queue.stats().rejected == 1
+
+        admission.release()
+
+        with queue.admit([90]):
+            with pytest.raises(OverloadedError):
+                queue.admit([20])
+
+        assert queue.stats().pending_jobs == 0
+        assert queue.stats().pending_bytes == 0
+
+    def test_job_queue_admission_when_idle(self):
+        """
+        Test method for admitting jobs exceeding the bounds by themselves - i.e. they
+        are admitted if no jobs are pending.
+        """
+        queue = JobQueue(max_workers=1, max_queued_jobs=0, max_queued_bytes=1)
+
+        with queue.admit([10, 10]):
+            assert queue.stats().pending_jobs == 2
+
+            with queue.admit([]):
+                assert queue.stats().rejected == 0
+
+    def test_job_queue_submit(self):
+        """
+        Test method for submitting admitted jobs - i.e. they are released once finished.
+        """
+        queue = JobQueue(max_workers=1, max_queued_jobs=1, max_queued_bytes=100)
+
+        with queue.admit([10, 10]) as admission:
+            future = admission.submit(pow, 2, 10)
+
+        assert future.result() == 1024
+
+        # Waits for the job to be released.
+        shutdown()
+
+        stats = queue.stats()
+
+        assert stats.pending_jobs == stats.pending_bytes == 0
+        assert stats.finished == 1
+        assert stats.max_wait_seconds <= stats.wait_seconds
+
+    def test_job_queue_completions_do_not_block_results(self):
+        """
+        Test method for completing jobs (see `complete`) - i.e. a blocked completion
+        never delays the results of other jobs, and shutdown waits for completions.
+        """
+        queue = JobQueue(max_workers=1, max_queued_jobs=1, max_queued_bytes=100)
+        blocked, completed = threading.Event(), []
+
+        def block(done):
+            blocked.wait(timeout=10)
+            completed.append(done.result())
+
+        with queue.admit([10, 10]) as admission:
+            first = admission.submit(pow, 2, 10)
+            first.add_done_callback(lambda done: complete(block, done))
+            second = admission.submit(pow, 2, 11)
+
+        assert first.result(timeout=10) == 1024
+        assert second.result(timeout=5) == 2048
+        assert completed == []
+
+        blocked.set()
+        shutdown()
+
+        assert completed == [1024]